@@ -1,9 +1,369 @@
 import streamlit as st
 import pandas as pd
+import html
 from datetime import datetime
-import matplotlib.pyplot as plt
-from news_speed.utils import get_analyzers, process_sentiment_analysis, generate_keyword_analysis
-from news_speed.exporter import DataExporter
+from news_speed.utils import get_analyzers, iter_sentiment_batches, get_keyword_stream, get_trend_detector, get_analysis_pipeline, get_article_store, get_metrics_server
+from functools import partial
+from news_speed.exporter import DataExporter, EXPORT_FORMATS, export_dataset
+from news_speed.matcher import get_keyword_filter
+from news_speed.dataset import Dataset
+from news_speed import metrics, profiling
+from news_speed.cache import cache_stats
+from news_speed.models import get_model_registry
+from news_speed.store import history_key
+
+HEADLINES_PER_PAGE = 25
+
+def build_headlines_html(df):
+	"""Build one HTML block of headline cards using vectorized string formatting"""
+	sentiment_colors = df['sentiment_label'].map({
+		'Positive': 'green', 
+		'Neutral': 'white',
+		'Negative': 'red'
+	}).fillna('gray')
+	
+	cards = (
+		'<div class="metric-card"><h4>' + df['title'].map(html.escape) + '</h4>'
+		+ '<p><strong>Source:</strong> ' + df['source'].map(html.escape) + ' | '
+		+ '<strong>Sentiment:</strong> <span style="color: ' + sentiment_colors + '">'
+		+ df['sentiment_label'] + '</span></p></div><br>'
+	)
+	return ''.join(cards)
+
+@st.fragment
+def show_headlines(df):
+	"""Display one page of headline cards; changing page reruns only this fragment"""
+	page_count = max(1, -(-len(df) // HEADLINES_PER_PAGE))
+	page = 1
+	if page_count > 1:
+		page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+	
+	start = (page - 1) * HEADLINES_PER_PAGE
+	st.markdown(build_headlines_html(df.iloc[start:start + HEADLINES_PER_PAGE]), unsafe_allow_html=True)
+
+@st.fragment
+def show_wordcloud(analysis, visualizer, exclude_words):
+	"""Display the word cloud and its options; changing them reruns only this fragment"""
+	col1, col2 = st.columns([3, 1])
+	
+	with col1:
+		colormap = st.selectbox("WordCloud Color Scheme", 
+							   options=['viridis', 'plasma', 'inferno', 'magma', 'Blues'],
+							   key="wordcloud_colormap")
+	
+	with col2:
+		preview = st.checkbox("Fast Preview", value=False, key="wordcloud_preview",
+							  help="Render a low-resolution word cloud for display; downloads are always full resolution")
+	
+	wordcloud_png = visualizer.create_wordcloud(analysis['dataset'].titles, 
+											   exclude_words=exclude_words,
+											   colormap=colormap,
+											   preview=preview)
+	
+	if wordcloud_png:
+		st.image(wordcloud_png, use_container_width=True)
+	else:
+		st.warning("Could not generate word cloud")
+	
+	# Remember the chosen colormap for the Export tab
+	analysis['wordcloud_colormap'] = colormap
+
+@st.fragment
+def show_data_table(df):
+	"""Display the raw data with selectable columns; changing columns reruns only this fragment"""
+	show_columns = st.multiselect(
+		"Select columns to display",
+		options=df.columns.tolist(),
+		default=['title', 'source', 'sentiment_label']
+	)
+	
+	if show_columns:
+		st.dataframe(df[show_columns], use_container_width=True)
+
+def show_sentiment_metrics(df, sentiment_labels):
+	"""Display the metric row for the headlines analyzed so far"""
+	col1, col2, col3, col4, col5, col6 = st.columns(6)
+	
+	sentiment_counts = pd.Series(sentiment_labels, dtype=object).value_counts()
+	total_articles = len(df)
+	analyzed_articles = max(len(sentiment_labels), 1)
+
+	with col1:
+		st.metric("Total Articles", total_articles)
+	
+	with col2:
+		positive_pct = (sentiment_counts.get('positive', 0) / analyzed_articles) * 100
+		st.metric("Positive %", f"{positive_pct:.1f}%")
+
+	with col3:
+		neutral_pct = (sentiment_counts.get('neutral', 0) / analyzed_articles) * 100
+		st.metric("Neutral %", f"{neutral_pct:.1f}%")
+
+	with col4:
+		negative_pct = (sentiment_counts.get('negative', 0) / analyzed_articles) * 100
+		st.metric("Negative %", f"{negative_pct:.1f}%")
+	
+	if negative_pct > 0:
+		with col5:
+			ratio = positive_pct / negative_pct
+			st.metric("Positive-to-Negative Ratio", f"{ratio:.2f}")
+		
+	with col6:
+		top_source = df['source'].value_counts().index[0] if total_articles > 0 else "N/A"
+		st.metric("Top Source", top_source)
+
+def pipeline_inputs(dataset, exclude_words):
+	"""Inputs of the analysis pipeline for a dataset and the current display options"""
+	inputs = {
+		'titles': dataset.titles,
+		'published': dataset['published'],
+		'exclude_words': exclude_words,
+		'colormap': st.session_state.get('wordcloud_colormap', 'viridis')
+	}
+	if 'sentiment_label' in dataset:
+		inputs['sentiment_labels'] = dataset['sentiment_label']
+	return inputs
+
+def run_analysis(collector, query, region, category, max_articles, keyword_filter, exclude_words, whole_words=True):
+	"""Collect and analyze news while showing progress; returns the analysis result or None"""
+	with st.spinner("Collecting news data..."):
+		# Collect news data
+		articles = collector.collect_news_data(
+			query=query if query else None,
+			region=region,
+			category=category,
+			max_articles=max_articles
+		)
+	
+	if not articles:
+		st.error("No articles found. Try adjusting your search parameters.")
+		return None
+	
+	# Feed newly seen articles into the streaming keyword statistics for this query
+	stream_key = history_key(query, region, category)
+	get_keyword_stream().add_articles(stream_key, articles)
+	get_trend_detector(stream_key).add_articles(articles)
+	
+	# Hash the articles once; every cached stage keys on this digest
+	dataset = Dataset.from_articles(articles)
+	
+	# Apply keyword filtering (one pass over all titles, however many terms)
+	keyword_filter = get_keyword_filter(keyword_filter, whole_words)
+	if keyword_filter:
+		dataset = dataset.subset(keyword_filter.mask(dataset.titles))
+	
+	if not len(dataset):
+		st.warning("No articles match your filter criteria.")
+		return None
+	
+	# Convert to DataFrame
+	df = dataset.to_frame()
+	titles = dataset.titles
+	total_articles = len(df)
+	
+	# Start keywords, word cloud and summary in the background; they only need the titles
+	pipeline_run = get_analysis_pipeline().start(pipeline_inputs(dataset, exclude_words), pending=('sentiment_labels',))
+	
+	# Live view that fills in as each sentiment batch completes
+	live_view = st.empty()
+	sentiment_labels = []
+	
+	def show_progress():
+		"""Redraw metrics, progress and the first headlines for the sentiment labels known so far"""
+		# Capitalize the first letter of each sentiment label (e.g., 'positive' → 'Positive')
+		df['sentiment_label'] = [label.capitalize() for label in sentiment_labels] + ['Pending'] * (total_articles - len(sentiment_labels))
+		with live_view.container():
+			show_sentiment_metrics(df, sentiment_labels)
+			st.progress(len(sentiment_labels) / total_articles, 
+						text=f"Analyzed {len(sentiment_labels)} of {total_articles} headlines")
+			st.markdown(build_headlines_html(df.head(HEADLINES_PER_PAGE)), unsafe_allow_html=True)
+	
+	# Show headlines as soon as they are collected, then fill in sentiment batch by batch
+	show_progress()
+	for batch in iter_sentiment_batches(titles):
+		sentiment_labels.extend(result['sentiment_label'] for result in batch)
+		show_progress()
+	live_view.empty()
+	
+	# Sentiment-dependent stages (charts, clusters) start as soon as the labels are known
+	dataset = dataset.with_column('sentiment_label', df['sentiment_label'])
+	pipeline_run.provide('sentiment_labels', dataset['sentiment_label'])
+	
+	# Keep the analyzed articles in the history used for long-range exports
+	get_article_store().add_articles(dataset.records(), query=stream_key)
+	
+	return {
+		'df': df,
+		'dataset': dataset,
+		'sentiment_labels': sentiment_labels,
+		'stream_key': stream_key
+	}
+
+def export_wordcloud(analysis, visualizer, exclude_words):
+	"""Full-resolution word cloud PNG in the colormap selected when the download is clicked"""
+	wordcloud_png = visualizer.create_wordcloud(analysis['dataset'].titles, 
+											   exclude_words=exclude_words,
+											   colormap=analysis.get('wordcloud_colormap', 'viridis'))
+	return DataExporter.wordcloud_to_png(wordcloud_png) or b''
+
+def export_bundle(analysis, visualizer, exclude_words, file_name):
+	"""ZIP of every download format plus the word cloud, built in one pass"""
+	files = [(f"{file_name}.{fmt}", export_dataset(analysis['dataset'], fmt)) for fmt in EXPORT_FORMATS]
+	files.append((f"{file_name}.png", export_wordcloud(analysis, visualizer, exclude_words)))
+	return DataExporter.to_zip(files)
+
+def show_export_buttons(analysis, visualizer, exclude_words):
+	"""Download buttons whose files are only rendered when clicked (and then cached by dataset digest)"""
+	file_name = f"newsspeed_data_{datetime.utcnow().strftime('%Y%m%d_%H%M')}-UTC"
+	labels = {
+		'csv': "📄 Download CSV",
+		'json': "📋 Download JSON",
+		'parquet': "🧱 Download Parquet",
+		'feather': "🪶 Download Feather"
+	}
+	downloads = [
+		(labels[fmt], partial(export_dataset, analysis['dataset'], fmt), f"{file_name}.{fmt}", mime)
+		for fmt, (mime, _) in EXPORT_FORMATS.items()
+	]
+	downloads.append(("🖼️ Download WordCloud", partial(export_wordcloud, analysis, visualizer, exclude_words),
+					  f"{file_name}.png", "image/png"))
+	downloads.append(("📦 Download All (ZIP)", partial(export_bundle, analysis, visualizer, exclude_words, file_name),
+					  f"{file_name}.zip", "application/zip"))
+	
+	for row in range(0, len(downloads), 3):
+		for col, (label, data, name, mime) in zip(st.columns(3), downloads[row:row + 3]):
+			with col:
+				st.download_button(label=label, data=data, file_name=name, mime=mime, on_click='ignore')
+
+def show_results(analysis, visualizer, summarizer, max_headlines, exclude_words):
+	"""Display the metrics and result tabs of a completed analysis"""
+	df = analysis['df']
+	dataset = analysis['dataset']
+	stream_key = analysis['stream_key']
+	total_articles = len(df)
+	
+	show_sentiment_metrics(df, analysis['sentiment_labels'])
+	
+	# All stages run concurrently; finished or cached ones resolve immediately
+	pipeline_run = get_analysis_pipeline().start(pipeline_inputs(dataset, exclude_words))
+	
+	# Tabs for different views
+	tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📰 Overview", "🎨 Visualizations", "📝 Summary", "🔥 Trending", "📋 Data", "💾 Export"])
+	
+	with tab1, metrics.timer('render', tab='overview'):
+		# Convert input to integer if it's a digit-only string (e.g., "50"); otherwise, use total_articles as fallback
+		max_headlines = int(max_headlines.strip()) if max_headlines.strip().isdigit() else total_articles
+		displayable_headlines = min(max_headlines, total_articles)
+		st.header(f"Headlines | {displayable_headlines}")
+		
+		# Display headlines with sentiment, one HTML block per page
+		show_headlines(df.head(displayable_headlines))
+	
+	with tab2, metrics.timer('render', tab='visualizations'):
+		st.header("Data Visualizations")
+		
+		col, = st.columns(1)
+		
+		with col:
+			# Sentiment distribution
+			fig_sentiment = pipeline_run.result('distribution')
+			st.plotly_chart(fig_sentiment, use_container_width=True)
+			
+			# Sentiment over time
+			fig_timeline = pipeline_run.result('timeline')
+			if fig_timeline:
+				st.plotly_chart(fig_timeline, use_container_width=True)
+		
+		# Word cloud
+		st.subheader("Word Cloud")
+		
+		show_wordcloud(analysis, visualizer, exclude_words)
+	
+	with tab3, metrics.timer('render', tab='summary'):
+		st.header("AI-Generated Summary")
+		
+		# The model is loaded on first use, so availability is only known once the summary stage is done
+		with st.spinner("Generating summary..."):
+			summary = pipeline_run.result('summary')
+		if summarizer.available and summary:
+			st.info(summary)
+		else:
+			st.warning("Summary feature not available")
+		
+		# Topic clusters
+		st.subheader("Topic Clusters")
+		with st.spinner("Clustering headlines..."):
+			clusters = pipeline_run.result('clusters')
+		
+		for cluster in clusters:
+			with st.expander(f"{', '.join(cluster['terms']) or 'Misc'} | {cluster['size']} headlines"):
+				if summarizer.available:
+					st.info(cluster['summary'])
+				
+				sentiment_breakdown = " | ".join(
+					f"**{label}:** {cluster['sentiment'].get(label, 0):.1f}%"
+					for label in ['Positive', 'Neutral', 'Negative']
+				)
+				st.markdown(sentiment_breakdown)
+				
+				for headline in cluster['headlines']:
+					st.markdown(f"- {headline}")
+		
+		# Top keywords
+		top_keywords = pipeline_run.result('keywords')
+		st.subheader(f"Top {len(top_keywords)} Keywords")
+		
+		keyword_df = pd.DataFrame(top_keywords, columns=['Keyword', 'Frequency'])
+		st.dataframe(keyword_df, use_container_width=True)
+		
+		# Keywords accumulated across every run of this query in the last 24 hours
+		recent_keywords = get_keyword_stream().top_terms(stream_key, k=20, window=24 * 3600, exclude_words=exclude_words)
+		st.subheader("Keywords in the Last 24 Hours")
+		st.caption("Approximate counts over all articles seen for this query; each count is within ± Error of the true value")
+		
+		recent_df = pd.DataFrame(recent_keywords, columns=['Keyword', 'Frequency', 'Error'])
+		st.dataframe(recent_df, use_container_width=True)
+	
+	with tab4, metrics.timer('render', tab='trending'):
+		st.header("Trending Terms")
+		
+		# Terms whose count this hour stands out against their hourly baseline
+		trending_terms = get_trend_detector(stream_key).trending(k=20, exclude_words=exclude_words)
+		if trending_terms:
+			trending_df = pd.DataFrame(trending_terms, columns=['Term', 'This Hour', 'Hourly Baseline', 'Z-Score'])
+			trending_df['Status'] = ['🆕 New' if baseline == 0 else '📈 Rising' for baseline in trending_df['Hourly Baseline']]
+			st.dataframe(trending_df, use_container_width=True)
+		else:
+			st.info("No emerging terms yet. Trends appear as this query is analyzed over time.")
+		
+		st.caption("Z-Score compares each term's count in the current hour with its mean and spread over the previous 24 hours")
+	
+	with tab5, metrics.timer('render', tab='data'):
+		st.header("Raw Data")
+		
+		show_data_table(df)
+	
+	with tab6, metrics.timer('render', tab='export'):
+		st.header("Export Data")
+		
+		show_export_buttons(analysis, visualizer, exclude_words)
+
+def show_debug_panel():
+	"""Sidebar tables of stage timings, counters, cache and model statistics (only when metrics are enabled)"""
+	get_metrics_server()
+	stages, counters = metrics.snapshot()
+	with st.sidebar.expander("🐞 Debug Metrics"):
+		st.caption("Stage timings")
+		st.dataframe(pd.DataFrame(stages), hide_index=True)
+		st.caption("Counters")
+		st.dataframe(pd.DataFrame(counters), hide_index=True)
+		st.caption("Caches")
+		st.dataframe(pd.DataFrame.from_dict(cache_stats(), orient='index'))
+		st.caption("Models")
+		st.dataframe(pd.DataFrame.from_dict(get_model_registry().stats(), orient='index'))
+		if profiling.enabled():
+			st.caption("Inference profile")
+			st.dataframe(pd.DataFrame(profiling.report()), hide_index=True)
 
 # Main function for the NewsSpeed application.
 # Sets up the Streamlit interface, collects and filters news articles,
@@ -93,7 +453,9 @@ def main():
 	# Filtering options
 	st.sidebar.header("🔍 Filtering")
 	keyword_filter = st.sidebar.text_input("Filter by Keywords", 
-										  help="Only display headlines containing these words; use commas to separate filter keywords")
+										  help="Only display headlines containing any of these words or phrases; use commas to separate filter keywords, prefix a keyword with + to require it or with - to exclude it (e.g. tesla, rivian, +recall, -stock)")
+	whole_words = st.sidebar.checkbox("Match whole words only", value=True,
+									  help="When unchecked, keywords also match inside longer words")
 	
 	# Headlines
 	st.sidebar.header("📰 Overview")
@@ -105,206 +467,29 @@ def main():
 	exclude_words = st.sidebar.text_area("Exclude Words from WordCloud and Top Keywords display", 
 										value="news, says, new, get, make, with, this",
 										help="Comma-separated words to exclude")
-	
-	colormap = st.sidebar.selectbox("WordCloud Color Scheme", 
-								   options=['viridis', 'plasma', 'inferno', 'magma', 'Blues'])
+	exclude_words = {w.strip().lower() for w in exclude_words.split(',') if w.strip()}
 	
 	# Main content
+	params = (query, region, category, max_articles, keyword_filter, whole_words)
 	if st.sidebar.button("🚀 Analyze News", type="primary"):
-		
-		with st.spinner("Collecting news data..."):
-			# Collect news data
-			articles = collector.collect_news_data(
-				query=query if query else None,
-				region=region,
-				category=category_map[category],
-				max_articles=max_articles
-			)
-		
-		if not articles:
-			st.error("No articles found. Try adjusting your search parameters.")
-			return
-		
-		# Convert to DataFrame
-		df = pd.DataFrame(articles)
-		
-		# Apply keyword filtering
-		if keyword_filter:
-			keywords = [k.strip().lower() for k in keyword_filter.split(',')]
-			mask = df['title'].str.lower().str.contains('|'.join(keywords), na=False)
-			df = df[mask]
-		
-		if df.empty:
-			st.warning("No articles match your filter criteria.")
+		analysis = run_analysis(collector, query, region, category_map[category], max_articles, keyword_filter, exclude_words, whole_words)
+		if analysis is None:
+			st.session_state.pop('analysis', None)
 			return
 		
-		# Perform sentiment analysis
-		with st.spinner("Analyzing sentiment..."):
-			titles = df['title'].tolist()
-			sentiment_results = process_sentiment_analysis(titles)
-	
-			# Show visual progress
-			progress_bar = st.progress(0)
-			for idx in range(len(titles)):
-				progress_bar.progress((idx + 1) / len(titles))
-			progress_bar.empty()
-		
-		# Add sentiment data to DataFrame
-		sentiment_df = pd.DataFrame(sentiment_results)
-		df = pd.concat([df.reset_index(drop=True), sentiment_df.reset_index(drop=True)], axis=1)
-		
-		# Display metrics
-		col1, col2, col3, col4, col5, col6 = st.columns(6)
-		
-		sentiment_counts = df['sentiment_label'].value_counts()
-		total_articles = len(df)
-
-		with col1:
-			st.metric("Total Articles", total_articles)
-		
-		with col2:
-			positive_pct = (sentiment_counts.get('positive', 0) / total_articles) * 100
-			st.metric("Positive %", f"{positive_pct:.1f}%")
-
-		with col3:
-			neutral_pct = (sentiment_counts.get('neutral', 0) / total_articles) * 100
-			st.metric("Neutral %", f"{neutral_pct:.1f}%")
-
-		with col4:
-			negative_pct = (sentiment_counts.get('negative', 0) / total_articles) * 100
-			st.metric("Negative %", f"{negative_pct:.1f}%")
-		
-		if negative_pct > 0:
-			with col5:
-				ratio = positive_pct / negative_pct
-				st.metric("Positive-to-Negative Ratio", f"{ratio:.2f}")
-			
-		with col6:
-			top_source = df['source'].value_counts().index[0] if total_articles > 0 else "N/A"
-			st.metric("Top Source", top_source)
-		
-		# Capitalize the first letter of each sentiment label (e.g., 'positive' → 'Positive') before proceeding
-		df['sentiment_label'] = df['sentiment_label'].str.capitalize()
-		
-		# Tabs for different views
-		tab1, tab2, tab3, tab4, tab5 = st.tabs(["📰 Overview", "🎨 Visualizations", "📝 Summary", "📋 Data", "💾 Export"])
-		
-		with tab1:
-			# Convert input to integer if it's a digit-only string (e.g., "50"); otherwise, use total_articles as fallback
-			max_headlines = int(max_headlines.strip()) if max_headlines.strip().isdigit() else total_articles
-			displayable_headlines = min(max_headlines, total_articles)
-			st.header(f"Headlines | {displayable_headlines}")
-			
-			# Display headlines with sentiment
-			for _, row in df.iterrows():
-				sentiment_color = {
-					'Positive': 'green', 
-					'Neutral': 'white',
-					'Negative': 'red'
-				}.get(row['sentiment_label'], 'gray')
-				
-				st.markdown(f"""
-				<div class="metric-card">
-					<h4>{row['title']}</h4>
-					<p><strong>Source:</strong> {row['source']} | 
-					<strong>Sentiment:</strong> <span style="color: {sentiment_color}">{row['sentiment_label']}</span></p>
-				</div>
-				""", unsafe_allow_html=True)
-				st.markdown("<br>", unsafe_allow_html=True)
-		
-		with tab2:
-			st.header("Data Visualizations")
-			
-			col, = st.columns(1)
-			
-			with col:
-				# Sentiment distribution
-				fig_sentiment = visualizer.plot_sentiment_distribution(df['sentiment_label'])
-				st.plotly_chart(fig_sentiment, use_container_width=True)
-			
-			# Word cloud
-			st.subheader("Word Cloud")
-			
-			exclude_words = {w.strip().lower() for w in exclude_words.split(',') if w.strip()}
-			wordcloud = visualizer.create_wordcloud(df['title'].tolist(), 
-												   exclude_words=exclude_words,
-												   colormap=colormap)
-			
-			if wordcloud:
-				fig, ax = plt.subplots(figsize=(12, 6))
-				ax.imshow(wordcloud, interpolation='bilinear')
-				ax.axis('off')
-				st.pyplot(fig)
-			else:
-				st.warning("Could not generate word cloud")
-		
-		with tab3:
-			st.header("AI-Generated Summary")
-			
-			if summarizer.available:
-				with st.spinner("Generating summary..."):
-					summary = summarizer.summarize_headlines(df['title'].tolist())
-					st.info(summary)
-			else:
-				st.warning("Summary feature not available")
-			
-			# Top keywords
-			top_keywords = generate_keyword_analysis(df['title'].tolist(), exclude_words)
-			st.subheader(f"Top {len(top_keywords)} Keywords")
-			
-			keyword_df = pd.DataFrame(top_keywords, columns=['Keyword', 'Frequency'])
-			st.dataframe(keyword_df, use_container_width=True)
-		
-		with tab4:
-			st.header("Raw Data")
-			
-			# Display options
-			show_columns = st.multiselect(
-				"Select columns to display",
-				options=df.columns.tolist(),
-				default=['title', 'source', 'sentiment_label']
-			)
-			
-			if show_columns:
-				st.dataframe(df[show_columns], use_container_width=True)
-		
-		with tab5:
-			st.header("Export Data")
-			
-			col1, col2, col3 = st.columns(3)
-			
-			file_name = f"newsspeed_data_{datetime.utcnow().strftime('%Y%m%d_%H%M')}-UTC"
-			with col1:
-				# CSV Export
-				csv_data = DataExporter.to_csv(df)
-				st.download_button(
-					label="📄 Download CSV",
-					data=csv_data,
-					file_name=f"{file_name}.csv",
-					mime="text/csv"
-				)
-			
-			with col2:
-				# JSON Export
-				json_data = DataExporter.to_json(df)
-				st.download_button(
-					label="📋 Download JSON",
-					data=json_data,
-					file_name=f"{file_name}.json",
-					mime="application/json"
-				)
-			
-			with col3:
-				# WordCloud PNG Export
-				if 'wordcloud' in locals() and wordcloud:
-					png_data = DataExporter.wordcloud_to_png(wordcloud)
-					if png_data:
-						st.download_button(
-							label="🖼️ Download WordCloud",
-							data=png_data,
-							file_name=f"{file_name}.png",
-							mime="image/png"
-						)
+		# Keep the completed analysis so later reruns never refetch or re-infer
+		analysis['params'] = params
+		st.session_state['analysis'] = analysis
+	
+	analysis = st.session_state.get('analysis')
+	if analysis:
+		if analysis['params'] != params:
+			st.info("Showing the previous analysis. Click 🚀 Analyze News to apply the new search settings.")
+		show_results(analysis, visualizer, summarizer, max_headlines, exclude_words)
+	
+	if metrics.enabled():
+		show_debug_panel()
+		metrics.write_prometheus()
 	
 	# Footer
 	st.markdown("---")
@@ -1,31 +1,43 @@
-import streamlit as st
+import logging
+from . import metrics, profiling
+from .cache import memoize
+from .models import get_model_registry, load_pipeline, model_loader
 
 # NLP libraries
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from transformers import pipeline
-
-@st.cache_resource
-def load_models():
-	"""Load sentiment analysis models"""
-	try:
-		hf_analyzer = pipeline("sentiment-analysis", 
-								model="cardiffnlp/twitter-roberta-base-sentiment-latest")
-		return hf_analyzer, True
-	except Exception as e:
-		st.warning(f"Advanced sentiment model not available, using VADER\n\nReason:\n{e}")
-		return SentimentIntensityAnalyzer(), False
+
+logger = logging.getLogger(__name__)
+
+@model_loader('sentiment')
+def load_sentiment_model():
+	"""Load the transformer sentiment model"""
+	return load_pipeline("sentiment-analysis", 
+						 model="cardiffnlp/twitter-roberta-base-sentiment-latest")
 
 class SentimentAnalyzer:
-	"""Advanced sentiment analysis using multiple models"""
+	"""Advanced sentiment analysis using multiple models
+	
+	The transformer model lives in the model registry, which loads it on
+	first use and may evict it when idle; VADER is the always-resident fallback.
+	"""
 	
-	def __init__(self):
-		self.hf_analyzer, self.use_hf = load_models()
-		if not self.use_hf:
-			self.vader = self.hf_analyzer
+	def __init__(self, registry=None):
+		self.registry = registry or get_model_registry()
+		self.vader = SentimentIntensityAnalyzer()
+
+	@property
+	def use_hf(self):
+		return self.registry.available('sentiment')
+
+	@property
+	def hf_analyzer(self):
+		return self.registry.get('sentiment')
 
 	def get_hf_sentiment_label(self, text):
 		"""Convert Hugging Face model prediction to descriptive sentiment label"""
-		return self.hf_analyzer(text)[0]["label"]
+		with self.registry.use('sentiment') as model:
+			with profiling.profile('sentiment', model, 1):
+				return model(text)[0]["label"]
 
 	def get_vader_sentiment_label(self, compound_score):
 		"""Convert vader compound score to descriptive label using best practices"""
@@ -36,7 +48,7 @@ class SentimentAnalyzer:
 		else:
 			return "negative"
 	
-	@st.cache_data
+	@memoize('sentiment', max_entries=4096)
 	def analyze_text(_self, text):
 		"""Comprehensive sentiment analysis"""
 		# Use Hugging Face if available
@@ -46,4 +58,20 @@ class SentimentAnalyzer:
 			except:
 				pass
 		# Else, use VADER
-		return {'sentiment_label': _self.get_vader_sentiment_label(_self.vader.polarity_scores(text)['compound'])}
\ No newline at end of file
+		return {'sentiment_label': _self.get_vader_sentiment_label(_self.vader.polarity_scores(text)['compound'])}
+
+	@memoize('sentiment', max_entries=4096)
+	def analyze_batch(_self, texts):
+		"""Sentiment analysis of a batch of texts in one model call"""
+		# Use Hugging Face if available
+		if _self.use_hf:
+			try:
+				with _self.registry.use('sentiment') as model, metrics.timer('sentiment', items=len(texts), backend='hf'), \
+						profiling.profile('sentiment', model, len(texts)):
+					predictions = model(list(texts), batch_size=len(texts))
+				return [{'sentiment_label': prediction["label"]} for prediction in predictions]
+			except:
+				pass
+		# Else, analyze text by text
+		with metrics.timer('sentiment', items=len(texts), backend='vader'):
+			return [_self.analyze_text(text) for text in texts]
@@ -0,0 +1,504 @@
+import functools
+import hashlib
+import inspect
+import logging
+import os
+import pickle
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Limits applied to namespaces that were not configured explicitly, so no cache grows without bound
+DEFAULT_LIMITS = {'ttl': None, 'max_entries': 1024, 'max_bytes': 256 * 1024 * 1024}
+
+_namespace_limits = {}  # namespace -> {'ttl', 'max_entries', 'max_bytes'}
+
+def configure_namespace(namespace, **limits):
+	"""Set the TTL (seconds), max_entries and/or max_bytes of a namespace; None means unlimited"""
+	unknown = set(limits) - set(DEFAULT_LIMITS)
+	if unknown:
+		raise ValueError(f"Unknown cache limits: {', '.join(sorted(unknown))}")
+	_namespace_limits.setdefault(namespace, dict(DEFAULT_LIMITS)).update(limits)
+
+def namespace_limits(namespace):
+	"""Return the effective limits of a namespace"""
+	return _namespace_limits.get(namespace, DEFAULT_LIMITS)
+
+# Shared bookkeeping of every backend
+class CacheBackend:
+	"""Base class keeping hit/miss/eviction counters per namespace
+
+	Subclasses implement get/set/clear and `_sizes()`, which returns the
+	stored entries and bytes per namespace. Counters are per process.
+	"""
+
+	def __init__(self):
+		self._counters = {}
+		self._counters_lock = threading.Lock()
+
+	def _count(self, namespace, event, n=1):
+		with self._counters_lock:
+			self._counters.setdefault(namespace, Counter())[event] += n
+
+	def _sizes(self):
+		return {}
+
+	def stats(self):
+		"""Return {namespace: {hits, misses, evictions, expirations, hit_rate, entries, bytes}}"""
+		sizes = self._sizes()
+		with self._counters_lock:
+			counters = {namespace: Counter(counter) for namespace, counter in self._counters.items()}
+		stats = {}
+		for namespace in sorted(set(sizes) | set(counters)):
+			counter = counters.get(namespace, Counter())
+			lookups = counter['hits'] + counter['misses']
+			entries, size = sizes.get(namespace, (0, 0))
+			stats[namespace] = {
+				'hits': counter['hits'],
+				'misses': counter['misses'],
+				'evictions': counter['evictions'],
+				'expirations': counter['expirations'],
+				'hit_rate': counter['hits'] / lookups if lookups else 0.0,
+				'entries': entries,
+				'bytes': size
+			}
+		return stats
+
+# In-process store for cached results
+class MemoryCache(CacheBackend):
+	"""Pickled values per namespace, evicted least recently used first and expired after their TTL"""
+
+	def __init__(self):
+		super().__init__()
+		self._namespaces = {}  # namespace -> OrderedDict(key -> (value, expires))
+		self._bytes = Counter()
+		self._lock = threading.Lock()
+
+	def get(self, namespace, key):
+		"""Return the stored bytes of a key, or None on a miss"""
+		with self._lock:
+			entries = self._namespaces.get(namespace)
+			entry = entries.get(key) if entries else None
+			if entry is not None and entry[1] is not None and entry[1] <= time.time():
+				del entries[key]
+				self._bytes[namespace] -= len(entry[0])
+				self._count(namespace, 'expirations')
+				entry = None
+			if entry is None:
+				self._count(namespace, 'misses')
+				return None
+			entries.move_to_end(key)
+		self._count(namespace, 'hits')
+		return entry[0]
+
+	def set(self, namespace, key, value, ttl=None, max_entries=None, max_bytes=None):
+		"""Store the bytes of a key, then evict the least recently used entries over the limits"""
+		if max_bytes and len(value) > max_bytes:
+			return  # Would evict the whole namespace and still not fit
+		with self._lock:
+			entries = self._namespaces.setdefault(namespace, OrderedDict())
+			old = entries.pop(key, None)
+			if old is not None:
+				self._bytes[namespace] -= len(old[0])
+			entries[key] = (value, time.time() + ttl if ttl else None)
+			self._bytes[namespace] += len(value)
+
+			evicted = 0
+			while entries and ((max_entries and len(entries) > max_entries) or (max_bytes and self._bytes[namespace] > max_bytes)):
+				_, (old_value, _) = entries.popitem(last=False)
+				self._bytes[namespace] -= len(old_value)
+				evicted += 1
+		if evicted:
+			self._count(namespace, 'evictions', evicted)
+
+	def clear(self, namespace=None):
+		"""Drop every entry, or only those of one namespace"""
+		with self._lock:
+			if namespace is None:
+				self._namespaces.clear()
+				self._bytes.clear()
+			else:
+				self._namespaces.pop(namespace, None)
+				self._bytes.pop(namespace, None)
+
+	def _sizes(self):
+		with self._lock:
+			return {namespace: (len(entries), self._bytes[namespace]) for namespace, entries in self._namespaces.items()}
+
+# Persistent store in a directory, one file per entry
+class DiskCache(CacheBackend):
+	"""Pickled values as files under `directory/<namespace>/`, surviving restarts
+
+	Each file starts with its expiry time; file modification times record
+	the last use, so the least recently used files are evicted first. The
+	in-memory index is rebuilt from the directory on first use of a
+	namespace, so one process should own the directory (use SQLiteCache to
+	share a cache between processes).
+	"""
+
+	HEADER = struct.Struct('<d')  # Expiry timestamp, 0 for none
+
+	def __init__(self, directory):
+		super().__init__()
+		self.directory = directory
+		self._index = {}  # namespace -> OrderedDict(key -> size), least recently used first
+		self._lock = threading.Lock()
+
+	def _path(self, namespace, key):
+		return os.path.join(self.directory, namespace, key)
+
+	def _entries(self, namespace):
+		"""Index of a namespace, loaded from the directory the first time"""
+		entries = self._index.get(namespace)
+		if entries is None:
+			folder = os.path.join(self.directory, namespace)
+			os.makedirs(folder, exist_ok=True)
+			files = []
+			for entry in os.scandir(folder):
+				if entry.is_file() and not entry.name.startswith('.'):
+					stat = entry.stat()
+					files.append((stat.st_mtime, entry.name, stat.st_size))
+			entries = self._index[namespace] = OrderedDict((name, size) for _, name, size in sorted(files))
+		return entries
+
+	def _remove(self, namespace, key):
+		self._index[namespace].pop(key, None)
+		try:
+			os.remove(self._path(namespace, key))
+		except FileNotFoundError:
+			pass
+
+	def get(self, namespace, key):
+		"""Return the stored bytes of a key, or None on a miss"""
+		with self._lock:
+			entries = self._entries(namespace)
+			if key not in entries:
+				self._count(namespace, 'misses')
+				return None
+			path = self._path(namespace, key)
+			try:
+				with open(path, 'rb') as f:
+					data = f.read()
+			except FileNotFoundError:
+				entries.pop(key, None)
+				self._count(namespace, 'misses')
+				return None
+
+			expires, = self.HEADER.unpack_from(data)
+			if expires and expires <= time.time():
+				self._remove(namespace, key)
+				self._count(namespace, 'expirations')
+				self._count(namespace, 'misses')
+				return None
+			os.utime(path)
+			entries.move_to_end(key)
+		self._count(namespace, 'hits')
+		return data[self.HEADER.size:]
+
+	def set(self, namespace, key, value, ttl=None, max_entries=None, max_bytes=None):
+		"""Write the bytes of a key atomically, then evict the least recently used files over the limits"""
+		size = self.HEADER.size + len(value)
+		if max_bytes and size > max_bytes:
+			return
+		with self._lock:
+			entries = self._entries(namespace)
+			folder = os.path.join(self.directory, namespace)
+			fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.tmp-')
+			try:
+				with os.fdopen(fd, 'wb') as f:
+					f.write(self.HEADER.pack(time.time() + ttl if ttl else 0))
+					f.write(value)
+				os.replace(tmp_path, self._path(namespace, key))
+			except BaseException:
+				os.unlink(tmp_path)
+				raise
+			entries.pop(key, None)
+			entries[key] = size
+
+			evicted = 0
+			total = sum(entries.values())
+			while entries and ((max_entries and len(entries) > max_entries) or (max_bytes and total > max_bytes)):
+				old_key = next(iter(entries))
+				total -= entries[old_key]
+				self._remove(namespace, old_key)
+				evicted += 1
+		if evicted:
+			self._count(namespace, 'evictions', evicted)
+
+	def clear(self, namespace=None):
+		"""Delete every entry, or only those of one namespace"""
+		with self._lock:
+			if namespace is None:
+				namespaces = [entry.name for entry in os.scandir(self.directory) if entry.is_dir()] if os.path.isdir(self.directory) else []
+			else:
+				namespaces = [namespace]
+			for name in namespaces:
+				for key in list(self._entries(name)):
+					self._remove(name, key)
+
+	def _sizes(self):
+		with self._lock:
+			return {namespace: (len(entries), sum(entries.values())) for namespace, entries in self._index.items()}
+
+# Store shared by every process on the machine (Streamlit workers, CLI runs)
+class SQLiteCache(CacheBackend):
+	"""Pickled values in one SQLite database (WAL mode), safe for concurrent processes"""
+
+	def __init__(self, path):
+		super().__init__()
+		self.path = path
+		directory = os.path.dirname(os.path.abspath(path))
+		os.makedirs(directory, exist_ok=True)
+		self._lock = threading.Lock()
+		self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+		self._connection.execute("PRAGMA journal_mode=WAL")
+		self._connection.execute("PRAGMA synchronous=NORMAL")
+		self._connection.execute(
+			"CREATE TABLE IF NOT EXISTS entries ("
+			"namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, size INTEGER NOT NULL, "
+			"expires REAL, accessed REAL NOT NULL, PRIMARY KEY (namespace, key))"
+		)
+		self._connection.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (namespace, accessed)")
+
+	def get(self, namespace, key):
+		"""Return the stored bytes of a key, or None on a miss"""
+		now = time.time()
+		with self._lock:
+			row = self._connection.execute(
+				"SELECT value, expires FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+			).fetchone()
+			if row is not None and row[1] is not None and row[1] <= now:
+				self._connection.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+				self._count(namespace, 'expirations')
+				row = None
+			if row is None:
+				self._count(namespace, 'misses')
+				return None
+			self._connection.execute("UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?", (now, namespace, key))
+		self._count(namespace, 'hits')
+		return row[0]
+
+	def set(self, namespace, key, value, ttl=None, max_entries=None, max_bytes=None):
+		"""Store the bytes of a key, then evict the least recently used rows over the limits"""
+		if max_bytes and len(value) > max_bytes:
+			return
+		now = time.time()
+		with self._lock:
+			connection = self._connection
+			connection.execute("BEGIN IMMEDIATE")
+			try:
+				connection.execute(
+					"INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+					(namespace, key, sqlite3.Binary(value), len(value), now + ttl if ttl else None, now)
+				)
+				count, total = connection.execute(
+					"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE namespace = ?", (namespace,)
+				).fetchone()
+
+				evicted = 0
+				if (max_entries and count > max_entries) or (max_bytes and total > max_bytes):
+					rows = connection.execute(
+						"SELECT key, size FROM entries WHERE namespace = ? ORDER BY accessed", (namespace,)
+					).fetchall()
+					victims = []
+					for old_key, size in rows:
+						if not ((max_entries and count > max_entries) or (max_bytes and total > max_bytes)):
+							break
+						victims.append((namespace, old_key))
+						count -= 1
+						total -= size
+					connection.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", victims)
+					evicted = len(victims)
+				connection.execute("COMMIT")
+			except BaseException:
+				connection.execute("ROLLBACK")
+				raise
+		if evicted:
+			self._count(namespace, 'evictions', evicted)
+
+	def clear(self, namespace=None):
+		"""Delete every entry, or only those of one namespace"""
+		with self._lock:
+			if namespace is None:
+				self._connection.execute("DELETE FROM entries")
+			else:
+				self._connection.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+
+	def _sizes(self):
+		with self._lock:
+			rows = self._connection.execute(
+				"SELECT namespace, COUNT(*), COALESCE(SUM(size), 0) FROM entries GROUP BY namespace"
+			).fetchall()
+		return {namespace: (count, size) for namespace, count, size in rows}
+
+# Cache backend that never stores anything
+class NullCache(CacheBackend):
+	"""Disable caching, so every call recomputes"""
+
+	def get(self, namespace, key):
+		self._count(namespace, 'misses')
+		return None
+
+	def set(self, namespace, key, value, ttl=None, max_entries=None, max_bytes=None):
+		pass
+
+	def clear(self, namespace=None):
+		pass
+
+CACHE_BACKENDS = {
+	'memory': MemoryCache,
+	'disk': DiskCache,
+	'sqlite': SQLiteCache,
+	'none': NullCache
+}
+
+def create_cache_backend(kind='memory', path=None):
+	"""Create a backend by name; disk and sqlite backends store under `path`"""
+	if kind not in CACHE_BACKENDS:
+		raise ValueError(f"Unknown cache backend {kind!r}; choose from {', '.join(CACHE_BACKENDS)}")
+	if kind == 'disk':
+		return DiskCache(path or os.path.join('.cache', 'news_speed'))
+	if kind == 'sqlite':
+		return SQLiteCache(path or os.path.join('.cache', 'news_speed.sqlite'))
+	return CACHE_BACKENDS[kind]()
+
+# The backend can be chosen without code changes, e.g. NEWS_SPEED_CACHE=sqlite for several app workers
+_backend = create_cache_backend(os.environ.get('NEWS_SPEED_CACHE', 'memory'), os.environ.get('NEWS_SPEED_CACHE_PATH'))
+
+def get_cache_backend():
+	"""Return the backend used by memoized functions"""
+	return _backend
+
+def set_cache_backend(backend):
+	"""Replace the backend used by memoized functions (any object with get/set/clear/stats)"""
+	global _backend
+	_backend = backend
+
+def cache_stats():
+	"""Per-namespace counters and sizes of the active backend"""
+	return _backend.stats()
+
+def _key_value(value):
+	"""Stand-in for an argument in cache keys: its precomputed digest if it has one (see Dataset)"""
+	cache_key = getattr(value, 'cache_key', None)
+	if callable(cache_key):
+		return (type(value).__name__, cache_key())
+	if isinstance(value, (set, frozenset)):
+		return tuple(sorted(value, key=repr))
+	return value
+
+def _cache_arguments(signature, args, kwargs):
+	"""Bound arguments identifying a call; names starting with an underscore are left out"""
+	bound = signature.bind(*args, **kwargs)
+	bound.apply_defaults()
+	return tuple(
+		(name, _key_value(value))
+		for name, value in bound.arguments.items()
+		if not name.startswith('_')
+	)
+
+def make_key(*parts):
+	"""Digest of key parts; values carrying a cache_key() contribute only that"""
+	return hashlib.blake2b(pickle.dumps(tuple(_key_value(part) for part in parts), protocol=5), digest_size=16).hexdigest()
+
+def load_cached(namespace, key):
+	"""Return (True, value) if the active backend holds the key, else (False, None); backend errors count as misses"""
+	try:
+		data = _backend.get(namespace, key)
+	except (OSError, sqlite3.Error) as e:
+		logger.warning("Cache lookup in %s failed (%s); computing instead", namespace, e)
+		return False, None
+	if data is None:
+		return False, None
+	return True, pickle.loads(data)
+
+def store_cached(namespace, key, value):
+	"""Store a value under the namespace limits; unpicklable values and backend errors are skipped"""
+	try:
+		data = pickle.dumps(value, protocol=5)
+	except (pickle.PicklingError, TypeError, AttributeError):
+		logger.debug("Value for %s/%s cannot be pickled; not caching", namespace, key)
+		return
+	try:
+		_backend.set(namespace, key, data, **namespace_limits(namespace))
+	except (OSError, sqlite3.Error) as e:
+		logger.warning("Cache store in %s failed (%s); not caching", namespace, e)
+
+def memoize(namespace, ttl=None, max_entries=None, max_bytes=None):
+	"""Cache return values in the active backend, keyed by the call's arguments
+
+	Follows the st.cache_data conventions: arguments whose names start with
+	an underscore (such as `_self`) are not hashed, and every hit returns a
+	fresh copy of the stored value. The given limits become the namespace
+	defaults unless configure_namespace() already set them.
+	"""
+	defaults = {'ttl': ttl, 'max_entries': max_entries, 'max_bytes': max_bytes}
+	if namespace not in _namespace_limits:
+		configure_namespace(namespace, **{name: value for name, value in defaults.items() if value is not None})
+
+	def decorator(func):
+		signature = inspect.signature(func)
+
+		@functools.wraps(func)
+		def wrapper(*args, **kwargs):
+			try:
+				key = make_key(func.__module__, func.__qualname__, _cache_arguments(signature, args, kwargs))
+			except (pickle.PicklingError, TypeError, AttributeError):
+				logger.debug("Arguments of %s cannot be hashed; not caching", func.__qualname__)
+				return func(*args, **kwargs)
+
+			found, value = load_cached(namespace, key)
+			if found:
+				return value
+
+			value = func(*args, **kwargs)
+			store_cached(namespace, key, value)
+			return value
+
+		wrapper.clear = lambda: _backend.clear(namespace)
+		return wrapper
+	return decorator
+
+def memoize_resource(maxsize=None):
+	"""Share one object per distinct arguments within the process (like st.cache_resource)
+
+	Arguments whose names start with an underscore are not part of the key;
+	the remaining ones must be hashable. With `maxsize`, the least recently
+	used objects are dropped first. Concurrent calls with the same key wait
+	for one computation instead of repeating it.
+	"""
+	def decorator(func):
+		signature = inspect.signature(func)
+		resources = OrderedDict()
+		key_locks = {}
+		lock = threading.Lock()
+
+		@functools.wraps(func)
+		def wrapper(*args, **kwargs):
+			key = _cache_arguments(signature, args, kwargs)
+			with lock:
+				if key in resources:
+					resources.move_to_end(key)
+					return resources[key]
+				key_lock = key_locks.setdefault(key, threading.Lock())
+
+			with key_lock:
+				with lock:
+					if key in resources:
+						return resources[key]
+				value = func(*args, **kwargs)
+				with lock:
+					resources[key] = value
+					key_locks.pop(key, None)
+					while maxsize and len(resources) > maxsize:
+						resources.popitem(last=False)
+			return value
+
+		wrapper.clear = resources.clear
+		return wrapper
+	return decorator
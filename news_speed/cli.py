@@ -0,0 +1,225 @@
+import argparse
+import json
+import logging
+import os
+import re
+from collections import Counter
+from .collector import NewsDataCollector
+from .analyzer import SentimentAnalyzer
+from .summarizer import TextSummarizer
+from .tokens import get_token_index
+from .matcher import get_keyword_filter
+from . import metrics, profiling
+from .exporter import DataExporter, IncrementalExporter, STREAM_WRITERS
+from .store import ArticleStore, DEFAULT_STORE_PATH, history_key
+from .dataset import Dataset
+from .cache import CACHE_BACKENDS, cache_stats, create_cache_backend, set_cache_backend
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ['BUSINESS', 'TECHNOLOGY', 'HEALTH', 'SCIENCE', 'SPORTS']
+
+def slugify(text):
+	"""File-name friendly version of a query"""
+	return re.sub(r'[^\w-]+', '-', text.lower()).strip('-')
+
+def analyze_query(collector, analyzer, summarizer, query=None, region='US', category=None, max_articles=50,
+				  keyword_filter='', exclude_words=(), batch_size=16, articles=None):
+	"""Collect (unless `articles` were fetched already) and analyze the news of one query; returns (articles DataFrame, report dict) or None"""
+	if articles is None:
+		articles = collector.collect_news_data(query=query, region=region, category=category, max_articles=max_articles)
+	if not articles:
+		logger.error("No articles found for %r", query or category or 'Top stories')
+		return None
+
+	dataset = Dataset.from_articles(articles)
+	keyword_filter = get_keyword_filter(keyword_filter)
+	if keyword_filter:
+		dataset = dataset.subset(keyword_filter.mask(dataset.titles))
+	if not len(dataset):
+		logger.error("No articles of %r match the keyword filter", query or category or 'Top stories')
+		return None
+
+	# Sentiment, in the same batches as the app
+	titles = dataset.titles
+	sentiment_labels = []
+	for start in range(0, len(titles), batch_size):
+		sentiment_labels.extend(result['sentiment_label'] for result in analyzer.analyze_batch(titles[start:start + batch_size]))
+	dataset = dataset.with_column('sentiment_label', [label.capitalize() for label in sentiment_labels])
+	df = dataset.to_frame()
+
+	report = {
+		'query': query,
+		'region': region,
+		'category': category,
+		'total_articles': len(df),
+		'sentiment': dict(Counter(sentiment_labels)),
+		'top_keywords': get_token_index(titles).most_common(20, exclude_words=exclude_words),
+		'summary': summarizer.summarize_headlines(titles) if summarizer and summarizer.available else None
+	}
+	return df, report
+
+def export_results(df, report, output_dir, name, formats):
+	"""Write the articles in each requested format plus a JSON report; returns the written paths"""
+	os.makedirs(output_dir, exist_ok=True)
+	writers = {
+		'csv': DataExporter.to_csv,
+		'json': DataExporter.to_json
+	}
+	paths = []
+	for fmt in formats:
+		path = os.path.join(output_dir, f"{name}.{fmt}")
+		if fmt in STREAM_WRITERS:
+			STREAM_WRITERS[fmt](DataExporter.iter_chunks(df), path)
+		else:
+			with open(path, 'w', encoding='utf-8') as f:
+				f.write(writers[fmt](df))
+		paths.append(path)
+
+	path = os.path.join(output_dir, f"{name}_report.json")
+	with open(path, 'w', encoding='utf-8') as f:
+		json.dump(report, f, indent=2, default=str)
+	paths.append(path)
+	return paths
+
+def export_store(store, output_dir, formats, chunk_size=10_000):
+	"""Stream the whole article history into each requested format; returns the written paths"""
+	os.makedirs(output_dir, exist_ok=True)
+	paths = []
+	for fmt in formats:
+		path = os.path.join(output_dir, f"articles.{fmt}")
+		rows = STREAM_WRITERS[fmt](store.iter_frames(chunk_size), path)
+		logger.info("Exported %d stored articles to %s", rows, path)
+		paths.append(path)
+	return paths
+
+def export_increment(store, output_dir, consumer, fmt):
+	"""Write the articles added since the consumer's last export to a new delta file; returns its path or None"""
+	path = IncrementalExporter(store, output_dir).export(consumer, fmt)
+	if path is None:
+		logger.info("No new articles for %s", consumer)
+	else:
+		logger.info("Wrote %s", path)
+	return path
+
+def build_parser():
+	"""Command line options of the batch runner"""
+	parser = argparse.ArgumentParser(
+		prog='news_speed',
+		description="Collect, analyze, summarize and export Google News headlines without the web UI"
+	)
+	parser.add_argument('queries', nargs='*', help="Search queries to run; with none, the top stories of the region/category are used")
+	parser.add_argument('--region', default='US', help="Region code (default: US)")
+	parser.add_argument('--category', choices=CATEGORIES, help="News category, used for runs without a query")
+	parser.add_argument('--max-articles', type=int, default=50, help="Maximum articles per query (default: 50)")
+	parser.add_argument('--filter', default='', help="Keyword filter: comma-separated terms, +required, -excluded")
+	parser.add_argument('--exclude-words', default="news, says, new, get, make, with, this",
+						help="Comma-separated words to leave out of the top keywords")
+	parser.add_argument('--format', nargs='+', choices=['csv', 'json', *STREAM_WRITERS], default=['csv'], dest='formats',
+						help="Article export formats (default: csv); parquet, feather, csv.gz and ndjson.gz are written in chunks")
+	parser.add_argument('--output-dir', default='output', help="Directory for exported files (default: output)")
+	parser.add_argument('--cache', choices=list(CACHE_BACKENDS), default=os.environ.get('NEWS_SPEED_CACHE', 'memory'),
+						help="Cache backend (default: memory, or $NEWS_SPEED_CACHE)")
+	parser.add_argument('--cache-path', default=os.environ.get('NEWS_SPEED_CACHE_PATH'),
+						help="Directory (disk) or database file (sqlite) of the cache")
+	parser.add_argument('--feed-url', help="Feed base URL, e.g. a local stand-in server (default: $NEWS_SPEED_FEED_URL or Google News)")
+	parser.add_argument('--timeout', type=float, help="Feed request timeout in seconds (default: $NEWS_SPEED_FEED_TIMEOUT or 10)")
+	parser.add_argument('--fetch-workers', type=int, default=8, help="Feeds fetched concurrently (default: 8)")
+	parser.add_argument('--store', default=DEFAULT_STORE_PATH, help=f"Article history database (default: {DEFAULT_STORE_PATH})")
+	parser.add_argument('--no-store', action='store_true', help="Do not add the analyzed articles to the history")
+	parser.add_argument('--export-store', action='store_true',
+						help="Instead of collecting, stream the whole article history to articles.<format> (streaming formats only)")
+	parser.add_argument('--consumer', help="With --export-store, write only the articles added since this consumer's last export")
+	parser.add_argument('--no-summary', action='store_true', help="Skip loading the summarization model")
+	parser.add_argument('--metrics-file', default=metrics.METRICS_FILE,
+						help="Record stage timings and write them to this file in Prometheus text format (default: $NEWS_SPEED_METRICS_FILE)")
+	parser.add_argument('--batch-size', type=int, default=16, help="Headlines per sentiment model call (default: 16)")
+	parser.add_argument('--profile', action='store_true',
+						help="Profile the model calls and write inference_profile.json to the output directory (default: $NEWS_SPEED_PROFILE)")
+	parser.add_argument('--profile-traces', type=float, metavar='RATE',
+						help="With --profile, dump a torch.profiler trace for this fraction of model calls (default: $NEWS_SPEED_PROFILE_TRACE_RATE)")
+	parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], help="Logging level (default: INFO)")
+	return parser
+
+def main(argv=None):
+	"""Run the batch pipeline for every query; returns the process exit status"""
+	args = build_parser().parse_args(argv)
+	logging.basicConfig(level=args.log_level, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+	set_cache_backend(create_cache_backend(args.cache, args.cache_path))
+	if args.metrics_file:
+		metrics.enable()
+	if args.profile or profiling.enabled():
+		profiling.enable(trace_rate=args.profile_traces)
+
+	if args.export_store:
+		unsupported = [fmt for fmt in args.formats if fmt not in STREAM_WRITERS]
+		if unsupported:
+			logger.error("--export-store needs streaming formats (%s), not %s", ', '.join(STREAM_WRITERS), ', '.join(unsupported))
+			return 2
+		if args.consumer and len(args.formats) != 1:
+			logger.error("--consumer exports a single format")
+			return 2
+		try:
+			if args.consumer:
+				export_increment(ArticleStore(args.store), args.output_dir, args.consumer, args.formats[0])
+			else:
+				export_store(ArticleStore(args.store), args.output_dir, args.formats)
+		except Exception:
+			logger.exception("Exporting the article history failed")
+			return 1
+		return 0
+
+	exclude_words = {w.strip().lower() for w in args.exclude_words.split(',') if w.strip()}
+	store = None if args.no_store else ArticleStore(args.store)
+	queries = args.queries or [None]
+
+	try:
+		collector = NewsDataCollector(base_url=args.feed_url, timeout=args.timeout)
+		analyzer = SentimentAnalyzer()
+		summarizer = TextSummarizer() if not args.no_summary else None
+	except Exception:
+		logger.exception("Could not initialize the analyzers")
+		return 1
+
+	# Fetch every feed concurrently before the CPU-bound analysis
+	feeds = collector.collect_many([(query, args.region, args.category, args.max_articles) for query in queries],
+								   max_workers=args.fetch_workers)
+
+	failures = 0
+	for query, articles in zip(queries, feeds):
+		name = slugify(query or args.category or 'top stories') + f"_{args.region.lower()}"
+		try:
+			result = analyze_query(
+				collector, analyzer, summarizer, query, args.region, args.category,
+				args.max_articles, args.filter, exclude_words, args.batch_size, articles
+			)
+			if result is None:
+				failures += 1
+				continue
+			df, report = result
+			if store is not None:
+				store.add_articles(df.to_dict('records'), query=history_key(query, args.region, args.category))
+			for path in export_results(df, report, args.output_dir, name, args.formats):
+				logger.info("Wrote %s", path)
+		except Exception:
+			logger.exception("Processing %r failed", query or 'Top stories')
+			failures += 1
+
+	for namespace, stats in cache_stats().items():
+		logger.debug("Cache %s: %d hits, %d misses, %d evictions, %d entries, %d bytes", namespace,
+					 stats['hits'], stats['misses'], stats['evictions'], stats['entries'], stats['bytes'])
+
+	if profiling.enabled():
+		os.makedirs(args.output_dir, exist_ok=True)
+		path = os.path.join(args.output_dir, 'inference_profile.json')
+		with open(path, 'w', encoding='utf-8') as f:
+			json.dump(profiling.report(), f, indent=2)
+		logger.info("Wrote inference profile to %s", path)
+
+	if args.metrics_file:
+		logger.info("Wrote metrics to %s", metrics.write_prometheus(args.metrics_file))
+
+	if failures:
+		logger.error("%d of %d queries failed", failures, len(queries))
+		return 1
+	return 0
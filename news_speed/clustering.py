@@ -0,0 +1,118 @@
+import numpy as np
+from scipy import sparse
+from .tokens import get_token_index
+
+# Group headlines into topic clusters
+class TopicClusterer:
+	"""Topic clustering of headlines using TF-IDF vectors and cosine mini-batch k-means"""
+
+	def __init__(self, max_clusters=8, batch_size=256, max_iter=50, tol=1e-4, random_state=42):
+		self.max_clusters = max_clusters
+		self.batch_size = batch_size
+		self.max_iter = max_iter
+		self.tol = tol
+		self.random_state = random_state
+
+	def vectorize(self, index):
+		"""Build an L2-normalized TF-IDF matrix from a token index"""
+		tf = index.matrix.astype(np.float32)
+
+		# Smoothed inverse document frequency
+		doc_freq = np.bincount(tf.indices, minlength=tf.shape[1])
+		idf = np.log((1 + tf.shape[0]) / (1 + doc_freq)).astype(np.float32) + 1
+		tfidf = (tf @ sparse.diags(idf)).tocsr()
+
+		# Row-normalize so that dot products are cosine similarities
+		norms = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1)).ravel())
+		norms[norms == 0] = 1
+		tfidf.data /= np.repeat(norms, np.diff(tfidf.indptr)).astype(np.float32)
+
+		return tfidf
+
+	def choose_k(self, n_docs):
+		"""Pick a cluster count from the corpus size (rule of thumb k ~ sqrt(n/2))"""
+		if n_docs < 4:
+			return 1
+		return int(min(self.max_clusters, max(2, round(np.sqrt(n_docs / 2)))))
+
+	def _init_centroids(self, X, k, rng):
+		"""Pick spread-out initial centroids with k-means++ on cosine distance"""
+		n_docs = X.shape[0]
+		chosen = [int(rng.integers(n_docs))]
+		distance = 1 - (X @ X[chosen[0]].T).toarray().ravel()
+		for _ in range(1, k):
+			weights = np.clip(distance, 0, None)
+			total = weights.sum()
+			idx = int(rng.choice(n_docs, p=weights / total)) if total > 0 else int(rng.integers(n_docs))
+			chosen.append(idx)
+			distance = np.minimum(distance, 1 - (X @ X[idx].T).toarray().ravel())
+		return X[chosen].toarray()
+
+	def _fit_centroids(self, X, k):
+		"""Run spherical mini-batch k-means and return unit-length centroids"""
+		rng = np.random.default_rng(self.random_state)
+		centroids = self._init_centroids(X, k, rng)
+		counts = np.zeros(k)
+		n_docs = X.shape[0]
+		batch_size = min(self.batch_size, n_docs)
+
+		for _ in range(self.max_iter):
+			batch = X[rng.choice(n_docs, size=batch_size, replace=False)]
+			assign = np.asarray(batch @ centroids.T).argmax(axis=1)
+
+			# Per-cluster sums of the batch in one sparse product
+			membership = sparse.csr_matrix(
+				(np.ones(batch_size), (assign, np.arange(batch_size))),
+				shape=(k, batch_size)
+			)
+			batch_sums = np.asarray((membership @ batch).todense())
+			batch_counts = np.bincount(assign, minlength=k)
+			counts += batch_counts
+
+			# Move each centroid towards its batch mean with a per-center learning rate
+			updated = batch_counts > 0
+			eta = (batch_counts[updated] / counts[updated])[:, None]
+			previous = centroids.copy()
+			centroids[updated] = (1 - eta) * centroids[updated] + eta * (batch_sums[updated] / batch_counts[updated][:, None])
+			norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+			norms[norms == 0] = 1
+			centroids /= norms
+
+			if np.abs(centroids - previous).max() < self.tol:
+				break
+
+		return centroids
+
+	def cluster(self, titles, n_clusters=None):
+		"""Assign each headline to a topic cluster
+
+		Returns an array of cluster ids (0 being the largest cluster) and,
+		for each cluster, its three most characteristic terms.
+		"""
+		if not titles:
+			return np.array([], dtype=int), []
+
+		index = get_token_index(titles)
+		X, terms = self.vectorize(index), index.terms
+		k = min(n_clusters or self.choose_k(len(titles)), len(titles))
+		if k <= 1 or X.shape[1] == 0:
+			return np.zeros(len(titles), dtype=int), [self._top_terms(np.asarray(X.sum(axis=0)).ravel(), terms)]
+
+		centroids = self._fit_centroids(X, k)
+		labels = np.asarray(X @ centroids.T).argmax(axis=1)
+
+		# Relabel by cluster size, dropping clusters that ended up empty
+		sizes = np.bincount(labels, minlength=k)
+		order = [c for c in np.argsort(-sizes, kind='stable') if sizes[c] > 0]
+		remap = np.empty(k, dtype=int)
+		remap[order] = np.arange(len(order))
+		top_terms = [self._top_terms(centroids[c], terms) for c in order]
+		return remap[labels], top_terms
+
+	@staticmethod
+	def _top_terms(weights, terms, n_terms=3):
+		"""Return the highest-weighted terms of a centroid"""
+		if len(terms) == 0:
+			return []
+		top = np.argsort(-weights, kind='stable')[:n_terms]
+		return [terms[i] for i in top if weights[i] > 0]
@@ -1,23 +1,40 @@
-import streamlit as st
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import feedparser
 import requests
 from datetime import datetime
 from dateutil import parser
 import hashlib
+from . import metrics
+from .cache import memoize
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://news.google.com/rss"
 
 # Collect news data from the Google News RSS feed
 class NewsDataCollector:
 	"""Handles news data collection from various RSS sources"""
 	
-	def __init__(self):
+	def __init__(self, base_url=None, timeout=None, max_validators=256):
+		# Point at a stand-in server (e.g. tests/feed_server.py) with base_url or NEWS_SPEED_FEED_URL
+		self.base_url = (base_url or os.environ.get('NEWS_SPEED_FEED_URL') or DEFAULT_BASE_URL).rstrip('/')
+		self.timeout = timeout if timeout is not None else float(os.environ.get('NEWS_SPEED_FEED_TIMEOUT', 10))
 		self.session = requests.Session()
 		self.session.headers.update({
 			'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
 		})
+		# ETag / Last-Modified and body of recent responses, for conditional requests
+		self._validators = OrderedDict()
+		self._validators_lock = threading.Lock()
+		self.max_validators = max_validators
 		
 	def get_google_news_url(self, query, region='US', language='en', category=None):
 		"""Generate Google News RSS URL with parameters"""
-		base_url = "https://news.google.com/rss"
+		base_url = self.base_url
 		
 		# Prioritize query over category
 		if query:
@@ -34,29 +51,70 @@ class NewsDataCollector:
 		"""Create a consistent cache key for RSS requests"""
 		return hashlib.md5(f"{url}_{max_articles}".encode()).hexdigest()
 	
-	@st.cache_data(ttl=300)  # Cache for 5 minutes
+	def _fetch(self, url):
+		"""Download a feed over HTTP(S); anything else (e.g. a file path) is left for feedparser to open"""
+		if not url.startswith(('http://', 'https://')):
+			return url
+		
+		# Revalidate what we fetched before; a 304 means the stored body is still current
+		with self._validators_lock:
+			cached = self._validators.get(url)
+		headers = {}
+		if cached:
+			etag, last_modified, _ = cached
+			if etag:
+				headers['If-None-Match'] = etag
+			if last_modified:
+				headers['If-Modified-Since'] = last_modified
+		
+		response = self.session.get(url, headers=headers, timeout=self.timeout)
+		if response.status_code == 304 and cached:
+			metrics.count('feed_not_modified')
+			with self._validators_lock:
+				self._validators.move_to_end(url)
+			return cached[2]
+		response.raise_for_status()
+		metrics.count('fetched_bytes', len(response.content))
+		
+		etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+		with self._validators_lock:
+			self._validators.pop(url, None)
+			if etag or last_modified:
+				self._validators[url] = (etag, last_modified, response.content)
+				while len(self._validators) > self.max_validators:
+					self._validators.popitem(last=False)
+		return response.content
+	
+	@staticmethod
+	def _published_date(entry):
+		"""Parse the published date of a feed entry for sorting"""
+		if hasattr(entry, 'published_parsed') and entry.published_parsed:
+			try:
+				return datetime(*entry.published_parsed[:6])
+			except:
+				pass
+		
+		# Fallback: try to parse published string
+		if entry.get('published'):
+			try:
+				return parser.parse(entry.published)
+			except:
+				pass
+		return None
+	
+	@memoize('feeds', ttl=300, max_entries=128)  # Cache for 5 minutes
 	def scrape_rss_feed(_self, url, max_articles=50):
 		"""Scrape articles from RSS feed and sort by recency"""
 		try:
-			feed = feedparser.parse(url)
+			with metrics.timer('fetch'):
+				content = _self._fetch(url)
+			with metrics.timer('parse'):
+				feed = feedparser.parse(content)
+			with metrics.timer('dates', items=len(feed.entries)):
+				published_dates = [_self._published_date(entry) for entry in feed.entries]
 			articles = []
 			
-			for entry in feed.entries:
-				# Parse the published date for sorting
-				published_date = None
-				if hasattr(entry, 'published_parsed') and entry.published_parsed:
-					try:
-						published_date = datetime(*entry.published_parsed[:6])
-					except:
-						pass
-			
-				# Fallback: try to parse published string
-				if not published_date and entry.get('published'):
-					try:
-						published_date = parser.parse(entry.published)
-					except:
-						pass
-				
+			for entry, published_date in zip(feed.entries, published_dates):
 				raw_title = entry.get('title', '') # Get title from feed entry
 				# Clean the title by removing trailing ' - Source Name'
 				clean_title = raw_title.rsplit(' - ', 1)[0] if ' - ' in raw_title else raw_title
@@ -81,11 +139,16 @@ class NewsDataCollector:
 			return articles[:max_articles]
 
 		except Exception as e:
-			st.error(f"Error scraping feed: {str(e)}")
+			logger.error("Error scraping feed: %s", e)
 			return []
 	
-	@st.cache_data(ttl=300)  # Cache for 5 minutes
-	def collect_news_data(_self, query=None, region='US', category=None, max_articles=50):
+	# Not memoized itself: the feed cache keys on the full URL, which includes base_url
+	def collect_news_data(self, query=None, region='US', category=None, max_articles=50):
 		"""Main method to collect news data"""
-		url = _self.get_google_news_url(query, region, category=category)
-		return _self.scrape_rss_feed(url, max_articles)
\ No newline at end of file
+		url = self.get_google_news_url(query, region, category=category)
+		return self.scrape_rss_feed(url, max_articles)
+	
+	def collect_many(self, jobs, max_workers=8):
+		"""Collect several (query, region, category, max_articles) requests concurrently, in order"""
+		with ThreadPoolExecutor(max_workers=max_workers) as executor:
+			return list(executor.map(lambda job: self.collect_news_data(*job), jobs))
\ No newline at end of file
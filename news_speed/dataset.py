@@ -0,0 +1,106 @@
+import hashlib
+import numpy as np
+import pandas as pd
+
+ARTICLE_FIELDS = ('title', 'link', 'published', 'summary', 'source')
+
+def _digest(*parts):
+	"""Short content digest of a sequence of strings"""
+	return hashlib.blake2b('\x1f'.join(parts).encode(), digest_size=16).hexdigest()
+
+# One column of a dataset, carrying its own digest
+class Column(tuple):
+	"""Read-only sequence of values whose cache key is a precomputed digest
+
+	Behaves like a tuple, so cached stages accept it wherever they took a
+	list, but memoized functions hash only `digest` instead of the values.
+	"""
+
+	def __new__(cls, values, digest):
+		column = super().__new__(cls, values)
+		column.digest = digest
+		return column
+
+	def __reduce__(self):
+		return Column, (tuple(self), self.digest)
+
+	def cache_key(self):
+		return self.digest
+
+# Immutable collection of articles
+class Dataset:
+	"""Articles stored column by column, identified by a digest computed once at collection
+
+	Derived datasets (subsets, added columns) get their digest from the
+	parent digest plus what changed, so no stage ever rehashes the content.
+	Columns carried over unchanged keep their digest, so cached results
+	that depend only on them stay valid.
+	"""
+
+	__slots__ = ('_columns', 'digest')
+
+	def __init__(self, columns, digest):
+		object.__setattr__(self, '_columns', {
+			name: values if isinstance(values, Column) else Column(values, _digest(digest, name))
+			for name, values in columns.items()
+		})
+		object.__setattr__(self, 'digest', digest)
+
+	def __setattr__(self, name, value):
+		raise AttributeError("Dataset is immutable")
+
+	def __reduce__(self):
+		return Dataset, (self._columns, self.digest)
+
+	@classmethod
+	def from_articles(cls, articles):
+		"""Build a dataset from collected article dicts, hashing their content once"""
+		columns = {field: tuple(str(article.get(field) or '') for article in articles) for field in ARTICLE_FIELDS}
+		digest = _digest(*('\x1e'.join(values) for values in columns.values()))
+		return cls(columns, digest)
+
+	def __len__(self):
+		return len(self._columns['title'])
+
+	def __contains__(self, name):
+		return name in self._columns
+
+	def __getitem__(self, name):
+		"""Return a column, keyed by (dataset digest, column name)"""
+		return self._columns[name]
+
+	@property
+	def columns(self):
+		return list(self._columns)
+
+	@property
+	def titles(self):
+		return self['title']
+
+	def cache_key(self):
+		return self.digest
+
+	def subset(self, mask):
+		"""Return the rows selected by a boolean mask as a new dataset"""
+		mask = np.asarray(mask, dtype=bool)
+		rows = np.flatnonzero(mask)
+		columns = {name: [values[i] for i in rows] for name, values in self._columns.items()}
+		return Dataset(columns, _digest(self.digest, 'subset', np.packbits(mask).tobytes().hex()))
+
+	def with_column(self, name, values):
+		"""Return a new dataset with a column added or replaced (e.g. sentiment labels)"""
+		values = tuple(values)
+		if len(values) != len(self):
+			raise ValueError(f"Column {name!r} has {len(values)} values for {len(self)} rows")
+		columns = dict(self._columns)
+		columns[name] = values
+		return Dataset(columns, _digest(self.digest, name, *map(str, values)))
+
+	def records(self):
+		"""Return the rows as a list of article dicts"""
+		names = list(self._columns)
+		return [dict(zip(names, row)) for row in zip(*self._columns.values())]
+
+	def to_frame(self):
+		"""Return the dataset as a new DataFrame"""
+		return pd.DataFrame(self._columns)
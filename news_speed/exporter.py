@@ -1,8 +1,36 @@
+import gzip
+import itertools
+import json
+import os
+import re
+import tempfile
+import time
+import zipfile
 from io import BytesIO
+import pyarrow as pa
+import pyarrow.parquet as pq
+from .cache import memoize
 
-# Export data as CSV, JSON, or PNG
+def _arrow_table(chunk, schema=None):
+	"""Convert a DataFrame chunk to Arrow, typing all-empty columns as strings so every chunk shares one schema"""
+	if schema is not None:
+		return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+	table = pa.Table.from_pandas(chunk, preserve_index=False)
+	schema = pa.schema([
+		field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+		for field in table.schema
+	]).remove_metadata()
+	return table.cast(schema)
+
+# Export data as CSV, JSON, Parquet, Feather or PNG
 class DataExporter:
-	"""Handle data export in multiple formats"""
+	"""Handle data export in multiple formats
+
+	The to_* methods render one DataFrame in memory. The write_* methods
+	stream an iterable of DataFrame chunks (e.g. ArticleStore.iter_frames)
+	to a path or binary file object, holding one chunk at a time, and
+	return the number of rows written.
+	"""
 	
 	@staticmethod
 	def to_csv(df):
@@ -14,12 +42,225 @@ class DataExporter:
 		"""Export DataFrame to JSON"""
 		return df.to_json(orient='records', date_format='iso')
 	
+	@staticmethod
+	def to_parquet(df, compression='zstd'):
+		"""Export DataFrame to Parquet bytes"""
+		buffer = BytesIO()
+		DataExporter.write_parquet([df], buffer, compression=compression)
+		return buffer.getvalue()
+	
+	@staticmethod
+	def to_feather(df, compression='zstd'):
+		"""Export DataFrame to Feather (Arrow IPC) bytes"""
+		buffer = BytesIO()
+		DataExporter.write_feather([df], buffer, compression=compression)
+		return buffer.getvalue()
+	
+	@staticmethod
+	def iter_chunks(df, chunk_size=10_000):
+		"""Split a DataFrame into chunks for the streaming writers"""
+		for start in range(0, max(len(df), 1), chunk_size):
+			yield df.iloc[start:start + chunk_size]
+	
+	@staticmethod
+	def write_parquet(chunks, destination, compression='zstd'):
+		"""Stream chunks into one Parquet file, one row group per chunk"""
+		writer, rows = None, 0
+		try:
+			for chunk in chunks:
+				table = _arrow_table(chunk, writer.schema if writer else None)
+				if writer is None:
+					writer = pq.ParquetWriter(destination, table.schema, compression=compression)
+				writer.write_table(table)
+				rows += table.num_rows
+		finally:
+			if writer is not None:
+				writer.close()
+		return rows
+	
+	@staticmethod
+	def write_feather(chunks, destination, compression='zstd'):
+		"""Stream chunks into one Feather v2 (Arrow IPC) file, one record batch per chunk"""
+		writer, schema, rows = None, None, 0
+		options = pa.ipc.IpcWriteOptions(compression=compression)
+		try:
+			for chunk in chunks:
+				table = _arrow_table(chunk, schema)
+				if writer is None:
+					schema = table.schema
+					writer = pa.ipc.new_file(destination, schema, options=options)
+				writer.write_table(table)
+				rows += table.num_rows
+		finally:
+			if writer is not None:
+				writer.close()
+		return rows
+	
+	@staticmethod
+	def write_csv_gz(chunks, destination, compresslevel=6):
+		"""Stream chunks into one gzip-compressed CSV file with a single header row"""
+		rows, header = 0, True
+		with gzip.open(destination, 'wt', compresslevel=compresslevel, encoding='utf-8', newline='') as f:
+			for chunk in chunks:
+				chunk.to_csv(f, header=header, index=False)
+				header = False
+				rows += len(chunk)
+		return rows
+	
+	@staticmethod
+	def write_ndjson_gz(chunks, destination, compresslevel=6):
+		"""Stream chunks into one gzip-compressed newline-delimited JSON file"""
+		rows = 0
+		with gzip.open(destination, 'wt', compresslevel=compresslevel, encoding='utf-8') as f:
+			for chunk in chunks:
+				if len(chunk):
+					lines = chunk.to_json(orient='records', lines=True, date_format='iso', force_ascii=False)
+					f.write(lines if lines.endswith('\n') else lines + '\n')
+				rows += len(chunk)
+		return rows
+	
+	@staticmethod
+	def to_zip(files):
+		"""Package (file name, bytes) pairs into one ZIP archive, skipping empty ones"""
+		buffer = BytesIO()
+		with zipfile.ZipFile(buffer, 'w') as archive:
+			for name, data in files:
+				if not data:
+					continue
+				# Parquet, Feather and PNG are compressed already
+				compressed = name.endswith(('.parquet', '.feather', '.png'))
+				archive.writestr(name, data, compress_type=zipfile.ZIP_STORED if compressed else zipfile.ZIP_DEFLATED)
+		return buffer.getvalue()
+	
 	@staticmethod
 	def wordcloud_to_png(wordcloud):
 		"""Convert wordcloud to PNG bytes"""
 		if wordcloud is None:
 			return None
+		
+		# Already rendered by DataVisualizer.create_wordcloud
+		if isinstance(wordcloud, bytes):
+			return wordcloud
 			
 		img_buffer = BytesIO()
 		wordcloud.to_image().save(img_buffer, format='PNG')
 		return img_buffer.getvalue()
+
+# Streaming writers by file extension
+STREAM_WRITERS = {
+	'parquet': DataExporter.write_parquet,
+	'feather': DataExporter.write_feather,
+	'csv.gz': DataExporter.write_csv_gz,
+	'ndjson.gz': DataExporter.write_ndjson_gz
+}
+
+# Download formats by file extension: (MIME type, DataFrame -> bytes)
+EXPORT_FORMATS = {
+	'csv': ('text/csv', lambda df: DataExporter.to_csv(df).encode('utf-8')),
+	'json': ('application/json', lambda df: DataExporter.to_json(df).encode('utf-8')),
+	'parquet': ('application/vnd.apache.parquet', DataExporter.to_parquet),
+	'feather': ('application/vnd.apache.arrow.file', DataExporter.to_feather)
+}
+
+@memoize('exports', max_entries=32)
+def export_dataset(dataset, fmt):
+	"""Render a dataset in one download format, cached by dataset digest and format"""
+	return EXPORT_FORMATS[fmt][1](dataset.to_frame())
+
+# Append-only exports of the article store for downstream consumers
+class IncrementalExporter:
+	"""Write each consumer only the stored articles added or updated since its previous export
+
+	Every consumer has a watermark, the (revision, link_hash) of the last
+	row it received, kept in `<directory>/.watermarks/<consumer>.json`.
+	An export reads the store from that position on the revision index,
+	writes the rows to a new numbered delta file and only then replaces
+	the watermark, so its cost follows the number of new rows and a crash
+	before the watermark is saved just rewrites the same delta next time.
+	Revisions commit in order, so a batch whose write waited on another
+	process is not skipped, and an exported article whose sentiment label
+	is filled in later is written again in a later delta.
+	"""
+
+	def __init__(self, store, directory):
+		self.store = store
+		self.directory = directory
+		self.watermark_dir = os.path.join(directory, '.watermarks')
+		os.makedirs(self.watermark_dir, exist_ok=True)
+
+	def _watermark_path(self, consumer):
+		if not re.fullmatch(r'[\w.-]+', consumer):
+			raise ValueError(f"Invalid consumer name {consumer!r}; use letters, digits, '.', '_' or '-'")
+		return os.path.join(self.watermark_dir, f"{consumer}.json")
+
+	def watermark(self, consumer):
+		"""Return the consumer's saved watermark dict, or None before its first export"""
+		try:
+			with open(self._watermark_path(consumer), encoding='utf-8') as f:
+				return json.load(f)
+		except FileNotFoundError:
+			return None
+
+	def reset(self, consumer):
+		"""Forget the consumer's watermark so its next export starts from the oldest article"""
+		try:
+			os.remove(self._watermark_path(consumer))
+		except FileNotFoundError:
+			pass
+
+	def _save_watermark(self, consumer, watermark):
+		"""Write the watermark to a temporary file and atomically move it into place"""
+		fd, tmp_path = tempfile.mkstemp(dir=self.watermark_dir, suffix='.tmp')
+		try:
+			with os.fdopen(fd, 'w', encoding='utf-8') as f:
+				json.dump(watermark, f)
+				f.flush()
+				os.fsync(f.fileno())
+			os.replace(tmp_path, self._watermark_path(consumer))
+		except BaseException:
+			os.unlink(tmp_path)
+			raise
+
+	def export(self, consumer, fmt='ndjson.gz', chunk_size=10_000, query=None):
+		"""Write the articles new or updated since the consumer's watermark; returns the delta path, or None if nothing is new"""
+		writer = STREAM_WRITERS[fmt]
+		previous = self.watermark(consumer) or {}
+		if 'revision' in previous:
+			after = (previous['revision'], previous['link_hash'])
+		elif previous:
+			# Watermarks saved before revisions were tracked hold a time
+			after = self.store.revision_at(previous.get('updated_at', previous.get('ingested_at')), previous['link_hash'])
+		else:
+			after = None
+		frames = self.store.iter_frames(chunk_size, after=after, query=query, order='revision')
+		first = next(frames)
+		if first.empty:
+			return None
+
+		position = {}
+
+		def chunks():
+			for chunk in itertools.chain([first], frames):
+				last = chunk.iloc[-1]
+				position.update(revision=int(last['revision']), link_hash=str(last['link_hash']))
+				yield chunk
+
+		sequence = previous.get('sequence', 0) + 1
+		path = os.path.join(self.directory, f"{consumer}-{sequence:06d}.{fmt}")
+		fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+		os.close(fd)
+		try:
+			rows = writer(chunks(), tmp_path)
+			os.replace(tmp_path, path)
+		except BaseException:
+			os.unlink(tmp_path)
+			raise
+
+		self._save_watermark(consumer, {
+			**position,
+			'sequence': sequence,
+			'rows': rows,
+			'file': os.path.basename(path),
+			'exported_at': time.time()
+		})
+		return path
@@ -0,0 +1,171 @@
+import re
+import numpy as np
+from collections import deque
+from .cache import memoize_resource
+
+WORD_PATTERN = re.compile(r"\w+|\n")  # Words, plus the newline that separates headlines
+SYMBOL_PATTERN = re.compile(r"[^\w\s]")
+
+def _is_word_char(char):
+	return char.isalnum() or char == '_'
+
+# Aho-Corasick automaton over a stream of symbols (words or characters)
+class _Automaton:
+
+	def __init__(self, patterns):
+		"""Build the trie and failure links of `patterns`, a dict of pattern id -> sequence of symbols"""
+		self.goto = [{}]
+		self.output = [[]]
+		for pattern_id, pattern in patterns.items():
+			state = 0
+			for symbol in pattern:
+				next_state = self.goto[state].get(symbol)
+				if next_state is None:
+					next_state = self.goto[state][symbol] = len(self.goto)
+					self.goto.append({})
+					self.output.append([])
+				state = next_state
+			self.output[state].append(pattern_id)
+
+		# Failure links (breadth-first), merging the outputs of each suffix state
+		self.fail = [0] * len(self.goto)
+		queue = deque(self.goto[0].values())
+		while queue:
+			state = queue.popleft()
+			for symbol, next_state in self.goto[state].items():
+				queue.append(next_state)
+				fallback = self.fail[state]
+				while fallback and symbol not in self.goto[fallback]:
+					fallback = self.fail[fallback]
+				self.fail[next_state] = self.goto[fallback].get(symbol, 0)
+				self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+	def __bool__(self):
+		return len(self.goto) > 1
+
+	def scan(self, symbols, accept=None):
+		"""Yield the set of pattern ids found in each newline-separated text; `accept(pattern_id, end)` may reject a match"""
+		goto, fail, output = self.goto, self.fail, self.output
+		state = 0
+		matched = set()
+		for end, symbol in enumerate(symbols):
+			if symbol == '\n':
+				yield matched
+				matched = set()
+				state = 0
+				continue
+
+			while state and symbol not in goto[state]:
+				state = fail[state]
+			state = goto[state].get(symbol, 0)
+			if output[state]:
+				if accept is None:
+					matched.update(output[state])
+				else:
+					matched.update(pattern_id for pattern_id in output[state] if accept(pattern_id, end))
+		yield matched
+
+# Match many keywords and phrases against headlines at once
+class KeywordMatcher:
+	"""Aho-Corasick automata that find every pattern in a single pass over the text
+
+	With `whole_words` patterns of plain words run over word tokens, so they
+	only match complete words and phrases match across any punctuation or
+	spacing between their words. Patterns containing other characters
+	("c++", "c#", "node.js") run over characters and match literally, as
+	long as no word character continues them on either side. Without
+	`whole_words` every pattern runs over characters and matches anywhere,
+	like a substring search.
+	"""
+
+	def __init__(self, patterns, whole_words=True):
+		self.whole_words = whole_words
+		self.patterns = [' '.join(pattern.lower().split()) for pattern in patterns]
+		words, literals = {}, {}
+		for pattern_id, pattern in enumerate(self.patterns):
+			if whole_words and not SYMBOL_PATTERN.search(pattern):
+				words[pattern_id] = WORD_PATTERN.findall(pattern)
+			elif pattern:
+				literals[pattern_id] = pattern
+		self._words = _Automaton(words)
+		self._literals = _Automaton(literals)
+
+	def _bounded(self, text):
+		"""Match filter rejecting literal matches that a word character in `text` continues at a word-character edge"""
+		def accept(pattern_id, end):
+			pattern = self.patterns[pattern_id]
+			start = end - len(pattern) + 1
+			if _is_word_char(pattern[0]) and start > 0 and _is_word_char(text[start - 1]):
+				return False
+			return not (_is_word_char(pattern[-1]) and end + 1 < len(text) and _is_word_char(text[end + 1]))
+		return accept
+
+	def scan(self, texts):
+		"""Yield the set of matched pattern ids for each text, scanning all texts in one pass per automaton"""
+		texts = list(texts)
+		if not texts:
+			return
+
+		# One lowercase symbol stream with a separator that no pattern contains
+		joined = '\n'.join(' '.join(str(text).split()) for text in texts).lower()
+		passes = []
+		if self._words:
+			passes.append(self._words.scan(WORD_PATTERN.findall(joined)))
+		if self._literals:
+			passes.append(self._literals.scan(joined, self._bounded(joined) if self.whole_words else None))
+		if not passes:
+			yield from (set() for _ in texts)
+			return
+		for found in zip(*passes):
+			yield set().union(*found)
+
+# Keyword filter with OR, AND (+term) and NOT (-term) semantics
+class KeywordFilter:
+	"""Filter headlines by a comma-separated keyword expression
+
+	Plain terms match if any of them occurs, terms prefixed with '+' must
+	all occur and terms prefixed with '-' must not occur. Terms may be
+	multi-word phrases, and terms with symbols are matched literally.
+	"""
+
+	def __init__(self, expression, whole_words=True):
+		self.any_terms, self.all_terms, self.none_terms = [], [], []
+		for term in expression.lower().split(','):
+			term = term.strip()
+			terms = self.any_terms
+			if term[:1] == '+':
+				terms, term = self.all_terms, term[1:].strip()
+			elif term[:1] == '-':
+				terms, term = self.none_terms, term[1:].strip()
+			if term:
+				terms.append(term)
+
+		patterns = self.any_terms + self.all_terms + self.none_terms
+		self.matcher = KeywordMatcher(patterns, whole_words=whole_words)
+		any_end = len(self.any_terms)
+		all_end = any_end + len(self.all_terms)
+		self.any_ids = frozenset(range(any_end))
+		self.all_ids = frozenset(range(any_end, all_end))
+		self.none_ids = frozenset(range(all_end, len(patterns)))
+
+	def __bool__(self):
+		return bool(self.any_ids or self.all_ids or self.none_ids)
+
+	def mask(self, titles):
+		"""Return a boolean array marking the titles that pass the filter"""
+		any_ids, all_ids, none_ids = self.any_ids, self.all_ids, self.none_ids
+		return np.fromiter(
+			(
+				(not any_ids or not matched.isdisjoint(any_ids))
+				and all_ids <= matched
+				and matched.isdisjoint(none_ids)
+				for matched in self.matcher.scan(titles)
+			),
+			dtype=bool,
+			count=len(titles)
+		)
+
+@memoize_resource(maxsize=32)
+def get_keyword_filter(expression, whole_words=True):
+	"""Compile and cache the keyword filter for an expression"""
+	return KeywordFilter(expression, whole_words=whole_words)
@@ -0,0 +1,229 @@
+import functools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .cache import cache_stats
+from .models import get_model_registry
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_enabled = os.environ.get('NEWS_SPEED_METRICS', '').lower() in ('1', 'true', 'yes')
+METRICS_FILE = os.environ.get('NEWS_SPEED_METRICS_FILE')
+METRICS_PORT = os.environ.get('NEWS_SPEED_METRICS_PORT')
+
+_lock = threading.Lock()
+_counters = {}  # (name, labels) -> total
+_timings = {}  # (stage, labels) -> [count, total seconds, max seconds, per-bucket counts]
+
+def enabled():
+	return _enabled
+
+def enable(on=True):
+	"""Turn recording on or off at runtime (default: NEWS_SPEED_METRICS)"""
+	global _enabled
+	_enabled = on
+
+def reset():
+	"""Forget everything recorded so far"""
+	with _lock:
+		_counters.clear()
+		_timings.clear()
+
+def _label_key(labels):
+	return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def count(name, value=1, **labels):
+	"""Add to a counter"""
+	if not _enabled:
+		return
+	key = (name, _label_key(labels))
+	with _lock:
+		_counters[key] = _counters.get(key, 0) + value
+
+def observe(stage, seconds, items=None, **labels):
+	"""Record one timed execution of a stage and log it as a JSON line"""
+	if not _enabled:
+		return
+	key = (stage, _label_key(labels))
+	with _lock:
+		timing = _timings.get(key)
+		if timing is None:
+			timing = _timings[key] = [0, 0.0, 0.0, [0] * len(DURATION_BUCKETS)]
+		timing[0] += 1
+		timing[1] += seconds
+		timing[2] = max(timing[2], seconds)
+		for i, bound in enumerate(DURATION_BUCKETS):
+			if seconds <= bound:
+				timing[3][i] += 1
+				break
+		if items is not None:
+			items_key = ('stage_items', _label_key({'stage': stage, **labels}))
+			_counters[items_key] = _counters.get(items_key, 0) + items
+	logger.info(json.dumps({'stage': stage, 'seconds': round(seconds, 6), **({'items': items} if items is not None else {}), **labels}))
+
+# Context manager that times one stage execution
+class _Timer:
+
+	__slots__ = ('stage', 'items', 'labels', 'started')
+
+	def __init__(self, stage, items, labels):
+		self.stage = stage
+		self.items = items
+		self.labels = labels
+
+	def __enter__(self):
+		self.started = time.perf_counter()
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		# Failed executions are counted, not timed
+		if exc_type is not None:
+			count('stage_errors', stage=self.stage, **self.labels)
+			return
+		observe(self.stage, time.perf_counter() - self.started, self.items, **self.labels)
+
+# Shared stand-in returned while recording is off
+class _NullTimer:
+
+	__slots__ = ()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		return None
+
+_NULL_TIMER = _NullTimer()
+
+def timer(stage, items=None, **labels):
+	"""Time a block as one execution of `stage` (`items` processed); a shared no-op when disabled"""
+	if not _enabled:
+		return _NULL_TIMER
+	return _Timer(stage, items, labels)
+
+def timed(stage, **labels):
+	"""Decorator form of timer(); disabled calls go straight to the function"""
+	def decorator(func):
+		@functools.wraps(func)
+		def wrapper(*args, **kwargs):
+			if not _enabled:
+				return func(*args, **kwargs)
+			with _Timer(stage, None, labels):
+				return func(*args, **kwargs)
+		return wrapper
+	return decorator
+
+def snapshot():
+	"""Recorded stage timings and counters as lists of dicts (e.g. for a debug table)"""
+	with _lock:
+		stages = [
+			{'stage': stage, **dict(labels), 'count': timing[0], 'total_s': timing[1],
+			 'mean_ms': 1000 * timing[1] / timing[0], 'max_ms': 1000 * timing[2]}
+			for (stage, labels), timing in sorted(_timings.items())
+		]
+		counters = [{'counter': name, **dict(labels), 'value': value} for (name, labels), value in sorted(_counters.items())]
+	return stages, counters
+
+def _format_labels(labels):
+	if not labels:
+		return ''
+	escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+	return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+def prometheus_text():
+	"""All metrics, cache statistics and model residency in the Prometheus text exposition format"""
+	lines = [
+		"# HELP news_speed_stage_seconds Time spent in each instrumented stage",
+		"# TYPE news_speed_stage_seconds histogram"
+	]
+	with _lock:
+		timings = sorted((key, [value[0], value[1], value[2], list(value[3])]) for key, value in _timings.items())
+		counters = sorted(_counters.items())
+	for (stage, labels), (total_count, total_seconds, _, buckets) in timings:
+		labels = (('stage', stage),) + labels
+		cumulative = 0
+		for bound, bucket in zip(DURATION_BUCKETS, buckets):
+			cumulative += bucket
+			lines.append(f"news_speed_stage_seconds_bucket{_format_labels(labels + (('le', str(bound)),))} {cumulative}")
+		lines.append(f"news_speed_stage_seconds_bucket{_format_labels(labels + (('le', '+Inf'),))} {total_count}")
+		lines.append(f"news_speed_stage_seconds_sum{_format_labels(labels)} {total_seconds}")
+		lines.append(f"news_speed_stage_seconds_count{_format_labels(labels)} {total_count}")
+
+	for name in sorted({name for (name, _), _ in counters}):
+		lines.append(f"# TYPE news_speed_{name}_total counter")
+		lines.extend(
+			f"news_speed_{name}_total{_format_labels(labels)} {value}"
+			for (counter, labels), value in counters if counter == name
+		)
+
+	caches = cache_stats()
+	for field, kind in (('hits', 'counter'), ('misses', 'counter'), ('evictions', 'counter'),
+						('expirations', 'counter'), ('entries', 'gauge'), ('bytes', 'gauge')):
+		metric = f"news_speed_cache_{field}" + ('_total' if kind == 'counter' else '')
+		lines.append(f"# TYPE {metric} {kind}")
+		lines.extend(f"{metric}{_format_labels((('namespace', namespace),))} {stats[field]}" for namespace, stats in sorted(caches.items()))
+
+	models = get_model_registry().stats()
+	lines.append("# TYPE news_speed_model_resident_bytes gauge")
+	lines.extend(
+		f"news_speed_model_resident_bytes{_format_labels((('model', name),))} {stats['bytes'] if stats['loaded'] else 0}"
+		for name, stats in models.items()
+	)
+	lines.append("# TYPE news_speed_model_events_total counter")
+	lines.extend(
+		f"news_speed_model_events_total{_format_labels((('model', name), ('event', event)))} {stats[event]}"
+		for name, stats in models.items()
+		for event in ('load', 'reload', 'evict', 'load_failed')
+	)
+	return '\n'.join(lines) + '\n'
+
+def write_prometheus(path=None):
+	"""Atomically write prometheus_text() to a file (default: NEWS_SPEED_METRICS_FILE); returns the path"""
+	path = path or METRICS_FILE
+	if not path or not _enabled:
+		return None
+	directory = os.path.dirname(os.path.abspath(path))
+	os.makedirs(directory, exist_ok=True)
+	fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+	try:
+		with os.fdopen(fd, 'w', encoding='utf-8') as f:
+			f.write(prometheus_text())
+		os.replace(tmp_path, path)
+	except BaseException:
+		os.unlink(tmp_path)
+		raise
+	return path
+
+# Serves GET /metrics
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+	def do_GET(self):
+		if self.path.split('?')[0] != '/metrics':
+			self.send_error(404)
+			return
+		body = prometheus_text().encode('utf-8')
+		self.send_response(200)
+		self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		logger.debug(format, *args)
+
+def serve(port=None, host='127.0.0.1'):
+	"""Serve the metrics at http://host:port/metrics from a daemon thread; returns the server (None if no port)"""
+	port = METRICS_PORT if port is None else port
+	if port is None or port == '':
+		return None
+	server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+	threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+	logger.info("Serving metrics on http://%s:%d/metrics", host, server.server_port)
+	return server
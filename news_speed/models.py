@@ -0,0 +1,391 @@
+import gc
+import glob
+import itertools
+import json
+import logging
+import math
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+logger = logging.getLogger(__name__)
+
+# Loaders of the models the registry can hold, by name
+MODEL_LOADERS = {}
+
+def model_loader(name):
+	"""Register a function that loads a model (raising if it cannot) under `name`"""
+	def decorator(func):
+		MODEL_LOADERS[name] = func
+		return func
+	return decorator
+
+def process_resident_bytes():
+	"""Current resident set size of the process, or 0 where /proc is unavailable"""
+	try:
+		with open('/proc/self/statm') as f:
+			return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+	except (OSError, ValueError, IndexError):
+		return 0
+
+def model_bytes(model):
+	"""Bytes held by a model's weights (parameters and buffers); 0 if it is not a torch model"""
+	module = getattr(model, 'model', model)
+	if not callable(getattr(module, 'parameters', None)) or not callable(getattr(module, 'buffers', None)):
+		return 0
+	return sum(tensor.numel() * tensor.element_size() for tensor in itertools.chain(module.parameters(), module.buffers()))
+
+def _release_memory():
+	"""Return freed model memory to the allocator (and the GPU, if torch is using one)"""
+	gc.collect()
+	torch = sys.modules.get('torch')
+	if torch is not None and torch.cuda.is_available():
+		torch.cuda.empty_cache()
+
+# Shared-weights mode: convert each model once to safetensors and map it read-only in every process
+SHARED_WEIGHTS = os.environ.get('NEWS_SPEED_SHARED_WEIGHTS', '').lower() in ('1', 'true', 'yes')
+WEIGHTS_DIR = os.environ.get('NEWS_SPEED_WEIGHTS_DIR', os.path.join('.cache', 'weights'))
+
+# Model class for each pipeline task we load
+TASK_MODEL_CLASSES = {
+	'sentiment-analysis': 'AutoModelForSequenceClassification',
+	'summarization': 'AutoModelForSeq2SeqLM'
+}
+
+_SAFETENSORS_DTYPES = {
+	'F64': 'float64', 'F32': 'float32', 'F16': 'float16', 'BF16': 'bfloat16',
+	'I64': 'int64', 'I32': 'int32', 'I16': 'int16', 'I8': 'int8', 'U8': 'uint8', 'BOOL': 'bool'
+}
+
+def load_pipeline(task, model, **kwargs):
+	"""Build a transformers pipeline, from memory-mapped shared weights when SHARED_WEIGHTS is on"""
+	from transformers import pipeline
+	if not SHARED_WEIGHTS:
+		return pipeline(task, model=model, **kwargs)
+	from transformers import AutoTokenizer
+	directory = export_safetensors(task, model)
+	return pipeline(task, model=mmap_model(task, directory), tokenizer=AutoTokenizer.from_pretrained(directory), **kwargs)
+
+@contextmanager
+def _exclusive_lock(path):
+	"""Hold an exclusive lock on a file across processes: flock on POSIX, msvcrt.locking on Windows"""
+	with open(path, 'a+b') as f:
+		try:
+			import fcntl
+		except ImportError:
+			import msvcrt
+			f.seek(0)
+			while True:
+				try:
+					msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+					break
+				except OSError:
+					pass  # LK_LOCK gives up after 10 attempts; keep waiting like flock does
+			try:
+				yield
+			finally:
+				f.seek(0)
+				msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+		else:
+			# Released when the file is closed
+			fcntl.flock(f, fcntl.LOCK_EX)
+			yield
+
+def export_safetensors(task, model, weights_dir=None):
+	"""Convert a model to a local safetensors directory once per host; returns its path
+
+	The first process converts under a file lock into a temporary directory
+	and renames it into place, so the others either wait or find it done.
+	"""
+	weights_dir = weights_dir or WEIGHTS_DIR
+	directory = os.path.join(weights_dir, model.replace('/', '--'))
+	if os.path.isdir(directory):
+		return directory
+	os.makedirs(weights_dir, exist_ok=True)
+	with _exclusive_lock(directory + '.lock'):
+		if os.path.isdir(directory):
+			return directory
+		import transformers
+		logger.info("Converting %s to safetensors in %s", model, directory)
+		model_class = getattr(transformers, TASK_MODEL_CLASSES[task])
+		tmp_dir = tempfile.mkdtemp(dir=weights_dir, suffix='.tmp')
+		try:
+			# One shard, so each process maps a single file
+			model_class.from_pretrained(model).save_pretrained(tmp_dir, max_shard_size='100GB')
+			transformers.AutoTokenizer.from_pretrained(model).save_pretrained(tmp_dir)
+			os.replace(tmp_dir, directory)
+		except BaseException:
+			shutil.rmtree(tmp_dir, ignore_errors=True)
+			raise
+	return directory
+
+def mmap_state_dict(directory):
+	"""Tensors of every safetensors file in a directory, backed by private read-only file mappings
+
+	The tensors point straight into the page cache, which every process
+	mapping the same file shares; nothing is deserialized or copied.
+	"""
+	import torch
+	state = {}
+	for path in sorted(glob.glob(os.path.join(directory, '*.safetensors'))):
+		with open(path, 'rb') as f:
+			# Copy-on-write mapping: shared pages, and torch accepts it as a writable buffer
+			buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+		header_size = struct.unpack('<Q', buffer[:8])[0]
+		header = json.loads(buffer[8:8 + header_size])
+		for name, info in header.items():
+			if name == '__metadata__':
+				continue
+			dtype = getattr(torch, _SAFETENSORS_DTYPES[info['dtype']])
+			start, end = info['data_offsets']
+			count = math.prod(info['shape'])
+			if count == 0:
+				state[name] = torch.empty(info['shape'], dtype=dtype)
+				continue
+			state[name] = torch.frombuffer(buffer, dtype=dtype, count=count, offset=8 + header_size + start).view(info['shape'])
+	return state
+
+def mmap_model(task, directory):
+	"""Instantiate a converted model without initializing weights and point its parameters at the mapped files"""
+	import transformers
+	try:
+		from transformers.initialization import no_init_weights
+	except ImportError:
+		try:
+			from transformers.modeling_utils import no_init_weights
+		except ImportError:
+			no_init_weights = nullcontext
+	config = transformers.AutoConfig.from_pretrained(directory)
+	with no_init_weights():
+		model = getattr(transformers, TASK_MODEL_CLASSES[task]).from_config(config)
+	state = mmap_state_dict(directory)
+	result = model.load_state_dict(state, strict=False, assign=True)
+	# Tied weights (e.g. the LM head) are saved once; tie them back to the mapped tensor
+	model.tie_weights()
+	mapped = {tensor.data_ptr() for tensor in state.values()}
+	parameters = dict(model.named_parameters(remove_duplicate=False))
+	unloaded = [name for name in result.missing_keys if name in parameters and parameters[name].data_ptr() not in mapped]
+	if unloaded:
+		raise RuntimeError(f"Weights missing from {directory}: {', '.join(unloaded[:5])}")
+	model.requires_grad_(False)
+	return model.eval()
+
+# Models resident in this process
+class ModelRegistry:
+	"""Load models on first use and evict them under a memory budget or after idling
+
+	When a load would take resident models over `budget_bytes`, the least
+	recently used ones that are not in use are evicted first; models unused
+	for `idle_timeout` seconds are evicted by a background sweep. An evicted
+	model is reloaded transparently on its next use. A model that failed to
+	load is unavailable for `retry_seconds`, then loading is tried again.
+	Every load, reload, eviction and failed load is logged and passed to the
+	listeners.
+	"""
+
+	def __init__(self, budget_bytes=None, idle_timeout=None, retry_seconds=300):
+		self.budget_bytes = budget_bytes
+		self.idle_timeout = idle_timeout
+		self.retry_seconds = retry_seconds
+		self._models = {}  # name -> model, least recently used first
+		self._sizes = {}  # name -> bytes measured at its last load (kept after eviction)
+		self._last_used = {}
+		self._in_use = {}
+		self._failed = {}  # name -> monotonic time after which loading is retried
+		self._counts = {}
+		self._listeners = []
+		self._lock = threading.RLock()
+		self._load_locks = {}
+		self._sweeper = None
+		self._stop = threading.Event()
+
+	def add_listener(self, callback):
+		"""Call `callback(event, name, info)` on 'load', 'reload', 'evict' and 'load_failed' events"""
+		self._listeners.append(callback)
+
+	def _emit(self, event, name, **info):
+		counts = self._counts.setdefault(name, {'load': 0, 'reload': 0, 'evict': 0, 'load_failed': 0})
+		counts[event] += 1
+		if event == 'load_failed':
+			logger.warning("Model %s not available\n\nReason:\n%s", name, info['error'])
+		else:
+			logger.info("Model %s: %s %s", name, event, ' '.join(f"{key}={value}" for key, value in info.items()))
+		for callback in self._listeners:
+			try:
+				callback(event, name, info)
+			except Exception:
+				logger.exception("Model registry listener failed")
+
+	def _blocked(self, name):
+		"""Whether the model failed to load less than `retry_seconds` ago"""
+		retry_at = self._failed.get(name)
+		return retry_at is not None and time.monotonic() < retry_at
+
+	def available(self, name):
+		"""False while a failed load waits for its retry; models not loaded yet count as available"""
+		return not self._blocked(name)
+
+	def loaded(self, name):
+		return name in self._models
+
+	def get(self, name):
+		"""Return the model, loading it first if needed; None if it cannot be loaded"""
+		with self.use(name) as model:
+			return model
+
+	@contextmanager
+	def use(self, name):
+		"""Hold the model for the duration of the block so it cannot be evicted mid-inference"""
+		model = self._acquire(name)
+		try:
+			yield model
+		finally:
+			with self._lock:
+				self._in_use[name] -= 1
+				self._last_used[name] = time.monotonic()
+				# Models kept over budget because they were in use can go now
+				self._evict_for(0, keep=name)
+
+	def _acquire(self, name):
+		self.evict_idle()
+		with self._lock:
+			load_lock = self._load_locks.setdefault(name, threading.Lock())
+		# One thread loads a model while the others wait for it
+		with load_lock:
+			with self._lock:
+				model = self._models.get(name)
+				if model is None and not self._blocked(name):
+					# Make room for the size seen at the previous load before loading again
+					self._evict_for(self._sizes.get(name, 0), keep=name)
+			if model is None and not self._blocked(name):
+				model = self._load(name)
+			with self._lock:
+				self._in_use[name] = self._in_use.get(name, 0) + 1
+				self._last_used[name] = time.monotonic()
+				if model is not None:
+					self._models.pop(name, None)
+					self._models[name] = model  # Most recently used last
+				return model
+
+	def _load(self, name):
+		reload = name in self._sizes
+		rss_before = process_resident_bytes()
+		started = time.perf_counter()
+		try:
+			model = MODEL_LOADERS[name]()
+		except Exception as e:
+			self._failed[name] = time.monotonic() + self.retry_seconds
+			self._emit('load_failed', name, error=str(e))
+			return None
+		self._failed.pop(name, None)
+		size = model_bytes(model) or max(process_resident_bytes() - rss_before, 0)
+		with self._lock:
+			self._models[name] = model
+			self._sizes[name] = size
+			self._evict_for(0, keep=name)
+			if self.budget_bytes is not None and self.resident_bytes() > self.budget_bytes:
+				logger.warning("Model budget of %d bytes exceeded by models in use: %d bytes resident", self.budget_bytes, self.resident_bytes())
+		self._emit('reload' if reload else 'load', name, bytes=size, seconds=round(time.perf_counter() - started, 3))
+		self._ensure_sweeper()
+		return model
+
+	def _evict_for(self, needed, keep=None):
+		"""Evict least recently used idle models until `needed` more bytes fit in the budget"""
+		if self.budget_bytes is None:
+			return
+		for name in list(self._models):
+			if self.resident_bytes() + needed <= self.budget_bytes:
+				return
+			if name != keep and not self._in_use.get(name):
+				self._evict(name, 'budget')
+
+	def _evict(self, name, reason):
+		with self._lock:
+			model = self._models.pop(name, None)
+		if model is None:
+			return False
+		del model
+		_release_memory()
+		self._emit('evict', name, reason=reason, bytes=self._sizes.get(name, 0))
+		return True
+
+	def evict(self, name):
+		"""Drop a model now unless it is in use; returns whether it was evicted"""
+		with self._lock:
+			if self._in_use.get(name):
+				return False
+			return self._evict(name, 'manual')
+
+	def evict_idle(self, now=None):
+		"""Evict every model unused for longer than the idle timeout"""
+		if self.idle_timeout is None:
+			return
+		now = time.monotonic() if now is None else now
+		with self._lock:
+			for name in list(self._models):
+				if not self._in_use.get(name) and now - self._last_used.get(name, now) > self.idle_timeout:
+					self._evict(name, 'idle')
+
+	def _ensure_sweeper(self):
+		"""Start the background idle sweep once a model is resident"""
+		if self.idle_timeout is None or self._sweeper is not None:
+			return
+		interval = min(max(self.idle_timeout / 2, 1), 60)
+
+		def sweep():
+			while not self._stop.wait(interval):
+				self.evict_idle()
+
+		self._sweeper = threading.Thread(target=sweep, name='model-registry-sweeper', daemon=True)
+		self._sweeper.start()
+
+	def close(self):
+		"""Stop the idle sweep, evict every model and forget failed loads"""
+		self._stop.set()
+		self._failed.clear()
+		for name in list(self._models):
+			self._evict(name, 'manual')
+
+	def resident_bytes(self):
+		return sum(self._sizes.get(name, 0) for name in self._models)
+
+	def stats(self):
+		"""Per-model residency, size and event counts"""
+		now = time.monotonic()
+		with self._lock:
+			return {
+				name: {
+					'loaded': name in self._models,
+					'available': not self._blocked(name),
+					'bytes': self._sizes.get(name, 0),
+					'idle_seconds': now - self._last_used[name] if name in self._last_used else None,
+					**self._counts.get(name, {'load': 0, 'reload': 0, 'evict': 0, 'load_failed': 0})
+				}
+				for name in sorted(set(self._sizes) | set(self._failed) | set(self._counts))
+			}
+
+def _env_number(name):
+	value = os.environ.get(name)
+	return float(value) if value else None
+
+_budget_mb = _env_number('NEWS_SPEED_MODEL_BUDGET_MB')
+_registry = ModelRegistry(
+	budget_bytes=int(_budget_mb * 1024 ** 2) if _budget_mb is not None else None,
+	idle_timeout=_env_number('NEWS_SPEED_MODEL_IDLE_SECONDS')
+)
+
+def get_model_registry():
+	"""Return the registry shared by the analyzers of this process"""
+	return _registry
+
+def set_model_registry(registry):
+	"""Replace the shared registry (e.g. with a different budget)"""
+	global _registry
+	_registry.close()
+	_registry = registry
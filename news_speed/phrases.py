@@ -0,0 +1,104 @@
+import numpy as np
+from wordcloud import STOPWORDS
+
+# Find multi-word phrases ("puerto rico", "artificial intelligence") in tokenized headlines
+class PhraseExtractor:
+	"""Vectorized bigram/trigram counting with PMI/NPMI collocation scoring"""
+
+	def __init__(self, min_count=2, min_npmi=0.5, max_n=3):
+		self.min_count = min_count
+		self.min_npmi = min_npmi
+		self.max_n = max_n
+
+	@staticmethod
+	def _pack(windows, vocab_size):
+		"""Encode each n-gram row of token ids as one int64 key (collision-free mixed radix)"""
+		if vocab_size ** windows.shape[1] >= 2 ** 63:
+			# Vocabulary too large to pack; fall back to row-wise uniqueness
+			_, keys = np.unique(windows, axis=0, return_inverse=True)
+			return keys.ravel()
+		keys = np.zeros(len(windows), dtype=np.int64)
+		for column in windows.T:
+			keys = keys * vocab_size + column
+		return keys
+
+	@staticmethod
+	def _non_overlapping(starts, free, n):
+		"""Greedy left-to-right pick of the free n-token windows at ascending `starts`, none overlapping an accepted one"""
+		accepted = np.zeros(len(starts), dtype=bool)
+		last = None
+		for i in np.flatnonzero(free):
+			if last is None or starts[i] - last >= n:
+				accepted[i] = True
+				last = starts[i]
+		return accepted
+
+	def _score_ngrams(self, token_ids, doc_ids, n, edge_ok, inner_ok, log_unigram, log_total):
+		"""Count all valid n-grams and score them; returns occurrence starts and per-n-gram stats"""
+		starts = np.arange(max(len(token_ids) - n + 1, 0))
+
+		# Keep windows inside one headline whose edge words are not stopwords or numbers
+		valid = doc_ids[starts] == doc_ids[starts + n - 1]
+		valid &= edge_ok[token_ids[starts]] & edge_ok[token_ids[starts + n - 1]]
+		for offset in range(1, n - 1):
+			valid &= inner_ok[token_ids[starts + offset]]
+		starts = starts[valid]
+
+		windows = np.stack([token_ids[starts + offset] for offset in range(n)], axis=1)
+		keys = self._pack(windows, len(edge_ok))
+		_, first, inverse, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+		components = windows[first]
+
+		# PMI = log p(w1..wn) - sum log p(wi); NPMI rescales it to [-1, 1]
+		log_joint = np.log(counts) - log_total
+		pmi = log_joint - log_unigram[components].sum(axis=1)
+		npmi = pmi / ((n - 1) * np.maximum(-log_joint, 1e-12))
+		return starts, inverse.ravel(), components, counts, npmi
+
+	def find_phrases(self, token_ids, doc_ids, terms):
+		"""Select collocations and locate their non-overlapping occurrences
+
+		`token_ids` is the flat token sequence of all headlines, `doc_ids` the
+		headline each token belongs to and `terms` the vocabulary. Returns the
+		list of (phrase, count, npmi), the start positions of the accepted
+		occurrences, the phrase id of each occurrence, and a mask of every
+		token position consumed by a phrase.
+		"""
+		covered = np.zeros(len(token_ids), dtype=bool)
+		phrases, occurrence_starts, occurrence_ids = [], [], []
+		if len(token_ids) == 0:
+			return phrases, np.array([], dtype=int), np.array([], dtype=int), covered
+
+		edge_ok = np.array([len(t) > 1 and not t.isdigit() and t not in STOPWORDS for t in terms], dtype=bool)
+		inner_ok = np.array([not t.isdigit() for t in terms], dtype=bool)
+		log_total = np.log(len(token_ids))
+		log_unigram = np.log(np.bincount(token_ids, minlength=len(terms)).clip(min=1)) - log_total
+
+		# Longer phrases first, so "new york city" wins over "new york"
+		for n in range(self.max_n, 1, -1):
+			starts, inverse, components, counts, npmi = self._score_ngrams(
+				token_ids, doc_ids, n, edge_ok, inner_ok, log_unigram, log_total
+			)
+			selected = np.flatnonzero((counts >= self.min_count) & (npmi >= self.min_npmi))
+			if not len(selected):
+				continue
+
+			phrase_of = np.full(len(counts), -1)
+			phrase_of[selected] = np.arange(len(phrases), len(phrases) + len(selected))
+			for row in selected:
+				phrases.append((' '.join(terms[components[row]]), int(counts[row]), round(float(npmi[row]), 3)))
+
+			# Accept occurrences whose tokens are still free and that do not overlap the last accepted one
+			hits = phrase_of[inverse] >= 0
+			starts, ids = starts[hits], phrase_of[inverse][hits]
+			free = ~np.any([covered[starts + offset] for offset in range(n)], axis=0)
+			accepted = self._non_overlapping(starts, free, n)
+			starts, ids = starts[accepted], ids[accepted]
+			for offset in range(n):
+				covered[starts + offset] = True
+			occurrence_starts.append(starts)
+			occurrence_ids.append(ids)
+
+		if not occurrence_starts:
+			return phrases, np.array([], dtype=int), np.array([], dtype=int), covered
+		return phrases, np.concatenate(occurrence_starts), np.concatenate(occurrence_ids), covered
@@ -0,0 +1,220 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from . import metrics
+from .cache import configure_namespace, load_cached, make_key, store_cached
+
+logger = logging.getLogger(__name__)
+
+configure_namespace('pipeline', max_entries=256)
+
+# Stage results being computed right now, shared by every run so concurrent runs never repeat a stage
+_inflight = {}
+_inflight_lock = threading.RLock()  # Re-entrant: done-callbacks may run while it is held
+
+def _timed_call(func, kwargs):
+	"""Run a stage function and measure it (module level so process pools can pickle it)"""
+	started = time.perf_counter()
+	value = func(**kwargs)
+	return value, time.perf_counter() - started
+
+# One step of the analysis
+class Stage:
+	"""A named function whose keyword arguments are the results of its dependencies"""
+
+	def __init__(self, name, func, deps=(), cache=True):
+		self.name = name
+		self.func = func
+		self.deps = tuple(deps)
+		self.cache = cache
+		self.identity = f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}"
+
+# Dependency graph of stages
+class Pipeline:
+	"""Run stages concurrently as soon as their dependencies are available
+
+	Each stage result is cached under a key derived from the stage and the
+	keys of its inputs (never from the result values themselves), so an
+	unchanged dataset and options resolve every stage from the cache.
+	End-to-end latency is the critical path of the graph rather than the
+	sum of all stages.
+	"""
+
+	def __init__(self, max_workers=4, processes=False):
+		self.stages = {}
+		self.max_workers = max_workers
+		self.processes = processes
+		self._executor = None
+		self._executor_lock = threading.Lock()
+
+	def add(self, name, func, deps=(), cache=True):
+		"""Declare a stage; `deps` name inputs or other stages and are passed as keyword arguments"""
+		if name in self.stages:
+			raise ValueError(f"Stage {name!r} is already defined")
+		self.stages[name] = Stage(name, func, deps, cache)
+		return self
+
+	def stage(self, name=None, deps=(), cache=True):
+		"""Decorator form of add()"""
+		def decorator(func):
+			self.add(name or func.__name__, func, deps, cache)
+			return func
+		return decorator
+
+	@property
+	def executor(self):
+		"""Worker pool shared by every run of this pipeline (created on first use)"""
+		with self._executor_lock:
+			if self._executor is None:
+				pool = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+				self._executor = pool(max_workers=self.max_workers)
+			return self._executor
+
+	def shutdown(self):
+		"""Stop the worker pool"""
+		with self._executor_lock:
+			if self._executor is not None:
+				self._executor.shutdown(wait=True)
+				self._executor = None
+
+	def _required(self, targets):
+		"""Stages needed for the targets, in dependency order"""
+		order, visiting, done = [], set(), set()
+
+		def visit(name):
+			if name in done or name not in self.stages:
+				return
+			if name in visiting:
+				raise ValueError(f"Stage {name!r} is part of a dependency cycle")
+			visiting.add(name)
+			for dep in self.stages[name].deps:
+				visit(dep)
+			visiting.discard(name)
+			done.add(name)
+			order.append(name)
+
+		for target in targets:
+			if target not in self.stages:
+				raise ValueError(f"Unknown stage {target!r}")
+			visit(target)
+		return order
+
+	def start(self, inputs, targets=None, pending=()):
+		"""Start computing the targets (default: every stage) and return the PipelineRun
+
+		Inputs named in `pending` are not known yet; stages that need them
+		wait until PipelineRun.provide() supplies them.
+		"""
+		order = self._required(targets or list(self.stages))
+		known = set(inputs) | set(pending) | set(order)
+		for name in order:
+			missing = [dep for dep in self.stages[name].deps if dep not in known]
+			if missing:
+				raise ValueError(f"Stage {name!r} needs unknown inputs: {', '.join(missing)}")
+		return PipelineRun(self, order, inputs, pending)
+
+	def run(self, inputs, targets=None, timeout=None):
+		"""Compute the targets and return {stage: result}"""
+		return self.start(inputs, targets).results(timeout)
+
+# One execution of a pipeline
+class PipelineRun:
+	"""Futures and cache keys of every input and stage of one pipeline execution"""
+
+	def __init__(self, pipeline, order, inputs, pending=()):
+		self.pipeline = pipeline
+		self.order = order
+		self.timings = {}  # stage -> seconds spent computing (0 when served from the cache)
+		self._futures = {}
+		self._keys = {}
+		self._lock = threading.Lock()
+
+		for name, value in inputs.items():
+			self._futures[name] = Future()
+			self.provide(name, value)
+		for name in pending:
+			self._futures[name] = Future()
+
+		for name in order:
+			self._futures[name] = Future()
+		for name in order:
+			self._schedule(pipeline.stages[name])
+
+	def provide(self, name, value):
+		"""Supply the value of an input, starting every stage that was waiting for it"""
+		self._keys[name] = make_key('input', name, value)
+		self._futures[name].set_result(value)
+
+	def _schedule(self, stage):
+		"""Launch a stage once all of its dependencies have resolved"""
+		remaining = [len(stage.deps)]
+
+		def dep_done(_):
+			with self._lock:
+				remaining[0] -= 1
+				ready = remaining[0] == 0
+			if ready:
+				self._launch(stage)
+
+		if not stage.deps:
+			self._launch(stage)
+		for dep in stage.deps:
+			self._futures[dep].add_done_callback(dep_done)
+
+	def _launch(self, stage):
+		"""Resolve a stage from the cache, an identical in-flight computation, or the worker pool"""
+		result = self._futures[stage.name]
+		failed = [dep for dep in stage.deps if self._futures[dep].exception() is not None]
+		if failed:
+			result.set_exception(RuntimeError(f"Stage {stage.name!r} skipped: {', '.join(failed)} failed"))
+			return
+
+		key = make_key('stage', stage.name, stage.identity, *(self._keys[dep] for dep in stage.deps))
+		self._keys[stage.name] = key
+		if stage.cache:
+			found, value = load_cached('pipeline', key)
+			if found:
+				metrics.count('pipeline_cache_hits', stage=stage.name)
+				self.timings[stage.name] = 0.0
+				result.set_result(value)
+				return
+
+		with _inflight_lock:
+			future = _inflight.get(key)
+			if future is None:
+				kwargs = {dep: self._futures[dep].result() for dep in stage.deps}
+				future = _inflight[key] = self.pipeline.executor.submit(_timed_call, stage.func, kwargs)
+				future.add_done_callback(lambda f: self._finish(stage, key, f))
+
+		def relay(f):
+			if f.exception() is not None:
+				result.set_exception(f.exception())
+			else:
+				value, elapsed = f.result()
+				self.timings.setdefault(stage.name, elapsed)
+				result.set_result(value)
+		future.add_done_callback(relay)
+
+	def _finish(self, stage, key, future):
+		"""Cache a computed stage result and retire its in-flight entry"""
+		with _inflight_lock:
+			_inflight.pop(key, None)
+		if future.exception() is not None:
+			logger.error("Stage %s failed: %s", stage.name, future.exception())
+			metrics.count('pipeline_failures', stage=stage.name)
+			return
+		metrics.observe(f"pipeline.{stage.name}", future.result()[1])
+		if stage.cache:
+			store_cached('pipeline', key, future.result()[0])
+
+	def result(self, name, timeout=None):
+		"""Wait for and return the result of a stage or input"""
+		return self._futures[name].result(timeout)
+
+	def done(self, name):
+		return self._futures[name].done()
+
+	def results(self, timeout=None):
+		"""Wait for every stage of this run and return {stage: result}"""
+		return {name: self.result(name, timeout) for name in self.order}
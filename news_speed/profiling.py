@@ -0,0 +1,224 @@
+import collections
+import logging
+import os
+import random
+import statistics
+import threading
+import time
+from contextlib import nullcontext
+from . import metrics
+from .models import process_resident_bytes
+
+logger = logging.getLogger(__name__)
+
+_enabled = os.environ.get('NEWS_SPEED_PROFILE', '').lower() in ('1', 'true', 'yes')
+# Fraction of profiled calls that also dump a torch.profiler trace, and where
+TRACE_RATE = float(os.environ.get('NEWS_SPEED_PROFILE_TRACE_RATE') or 0)
+TRACE_DIR = os.environ.get('NEWS_SPEED_PROFILE_DIR', os.path.join('.cache', 'profiles'))
+# Latencies kept per (model, batch size) for the percentiles
+SAMPLES = 1000
+
+PHASES = ('tokenize', 'forward', 'postprocess')
+# Pipeline method timed as each phase
+_PHASE_METHODS = {'tokenize': 'preprocess', 'forward': 'forward', 'postprocess': 'postprocess'}
+
+_lock = threading.Lock()
+_records = {}  # (model, batch size) -> _Record
+_local = threading.local()
+_rng = random.Random()
+_NULL = nullcontext()
+
+def enabled():
+	return _enabled
+
+def enable(on=True, trace_rate=None):
+	"""Turn profiling on or off at runtime (default: NEWS_SPEED_PROFILE), optionally with a new trace rate"""
+	global _enabled, TRACE_RATE
+	_enabled = on
+	if trace_rate is not None:
+		TRACE_RATE = trace_rate
+
+def reset():
+	"""Forget every profiled call"""
+	with _lock:
+		_records.clear()
+
+# Phase timings, token counts and sampled RSS of the call running on this thread
+class _Call:
+
+	__slots__ = ('phases', 'batches', 'tokens', 'padded', 'generated', 'peak_rss')
+
+	def __init__(self):
+		self.phases = dict.fromkeys(PHASES, 0.0)
+		self.batches = []
+		self.tokens = 0
+		self.padded = 0
+		self.generated = 0
+		self.peak_rss = process_resident_bytes()
+
+	def sample_rss(self):
+		"""Fold the current process RSS into the call's peak"""
+		self.peak_rss = max(self.peak_rss, process_resident_bytes())
+
+# Totals of every profiled call of one model at one batch size
+class _Record:
+
+	def __init__(self):
+		self.calls = 0
+		self.items = 0
+		self.seconds = 0.0
+		self.phases = dict.fromkeys(PHASES, 0.0)
+		self.tokens = 0
+		self.padded = 0
+		self.generated = 0
+		self.peak_rss = 0
+		self.latencies = collections.deque(maxlen=SAMPLES)
+		self.batch_latencies = collections.deque(maxlen=SAMPLES)
+
+def _count_tokens(call, model_inputs, model_outputs):
+	"""Real and padded input tokens of a forward batch (and generated tokens, for seq2seq models)"""
+	mask = model_inputs.get('attention_mask') if isinstance(model_inputs, dict) else None
+	if mask is not None:
+		call.tokens += int(mask.sum())
+		call.padded += mask.numel()
+	output_ids = model_outputs.get('output_ids') if isinstance(model_outputs, dict) else None
+	if output_ids is not None:
+		call.generated += output_ids.numel()
+
+def _timed_phase(phase, method):
+	def wrapper(*args, **kwargs):
+		call = getattr(_local, 'call', None)
+		if call is None:
+			return method(*args, **kwargs)
+		started = time.perf_counter()
+		result = method(*args, **kwargs)
+		elapsed = time.perf_counter() - started
+		call.phases[phase] += elapsed
+		call.sample_rss()
+		if phase == 'forward':
+			call.batches.append(elapsed)
+			_count_tokens(call, args[0] if args else kwargs.get('model_inputs'), result)
+		return result
+	return wrapper
+
+def instrument(pipeline):
+	"""Time a Hugging Face pipeline's preprocess, forward and postprocess calls (once per pipeline)"""
+	if getattr(pipeline, '_news_speed_profiled', False):
+		return pipeline
+	for phase, name in _PHASE_METHODS.items():
+		method = getattr(pipeline, name, None)
+		if method is not None:
+			setattr(pipeline, name, _timed_phase(phase, method))
+	pipeline._news_speed_profiled = True
+	return pipeline
+
+def _torch_trace():
+	"""A torch.profiler session for one call, or None without torch"""
+	try:
+		import torch
+	except ImportError:
+		return None
+	activities = [torch.profiler.ProfilerActivity.CPU]
+	if torch.cuda.is_available():
+		activities.append(torch.profiler.ProfilerActivity.CUDA)
+	return torch.profiler.profile(activities=activities, record_shapes=True, profile_memory=True)
+
+# Context manager that profiles one pipeline call
+class _Profile:
+
+	def __init__(self, model, pipeline, items, batch_size):
+		self.model = model
+		self.pipeline = pipeline
+		self.items = items
+		self.batch_size = batch_size or items
+		self.trace = None
+
+	def __enter__(self):
+		instrument(self.pipeline)
+		self.call = _local.call = _Call()
+		if TRACE_RATE and _rng.random() < TRACE_RATE:
+			self.trace = _torch_trace()
+		if self.trace is not None:
+			self.trace.__enter__()
+		self.started = time.perf_counter()
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		seconds = time.perf_counter() - self.started
+		_local.call = None
+		if self.trace is not None:
+			self.trace.__exit__(exc_type, exc_value, traceback)
+		# Failed calls are not profiled
+		if exc_type is not None:
+			return
+		if self.trace is not None:
+			self._export_trace()
+		self._record(seconds)
+
+	def _record(self, seconds):
+		call = self.call
+		call.sample_rss()
+		with _lock:
+			record = _records.get((self.model, self.batch_size))
+			if record is None:
+				record = _records[(self.model, self.batch_size)] = _Record()
+			record.calls += 1
+			record.items += self.items
+			record.seconds += seconds
+			for phase, elapsed in call.phases.items():
+				record.phases[phase] += elapsed
+			record.tokens += call.tokens
+			record.padded += call.padded
+			record.generated += call.generated
+			record.peak_rss = max(record.peak_rss, call.peak_rss)
+			record.latencies.append(seconds)
+			record.batch_latencies.extend(call.batches)
+		for phase, elapsed in call.phases.items():
+			metrics.observe(f"inference.{phase}", elapsed, model=self.model, batch_size=self.batch_size)
+		metrics.count('inference_tokens', call.tokens, model=self.model)
+		metrics.count('inference_padding_tokens', call.padded - call.tokens, model=self.model)
+
+	def _export_trace(self):
+		os.makedirs(TRACE_DIR, exist_ok=True)
+		path = os.path.join(TRACE_DIR, f"{self.model}-b{self.batch_size}-{time.strftime('%Y%m%d_%H%M%S')}-{os.getpid()}-{threading.get_ident()}.json")
+		try:
+			self.trace.export_chrome_trace(path)
+			logger.info("Wrote inference trace %s", path)
+		except Exception as e:
+			logger.warning("Could not write inference trace %s: %s", path, e)
+
+def profile(model, pipeline, items, batch_size=None):
+	"""Profile one call of `pipeline` on `items` inputs as `model`; a shared no-op when disabled"""
+	if not _enabled or pipeline is None:
+		return _NULL
+	return _Profile(model, pipeline, items, batch_size)
+
+def _percentile(values, q):
+	return statistics.quantiles(values, n=100, method='inclusive')[q - 1] if len(values) > 1 else values[0]
+
+def report():
+	"""One row per (model, batch size): latency percentiles, throughput, padding, phase split and peak RSS"""
+	with _lock:
+		records = sorted(_records.items())
+		rows = []
+		for (model, batch_size), record in records:
+			latencies = list(record.latencies)
+			timed = sum(record.phases.values())
+			rows.append({
+				'model': model,
+				'batch_size': batch_size,
+				'calls': record.calls,
+				'items': record.items,
+				'p50_ms': 1000 * _percentile(latencies, 50),
+				'p95_ms': 1000 * _percentile(latencies, 95),
+				'p99_ms': 1000 * _percentile(latencies, 99),
+				'batch_mean_ms': 1000 * statistics.fmean(record.batch_latencies) if record.batch_latencies else None,
+				'items_per_s': record.items / record.seconds if record.seconds else None,
+				'tokens_per_s': record.tokens / record.seconds if record.seconds else None,
+				'generated_tokens': record.generated,
+				'padding_ratio': 1 - record.tokens / record.padded if record.padded else None,
+				**{f"{phase}_pct": 100 * record.phases[phase] / record.seconds if record.seconds else None for phase in PHASES},
+				'other_pct': 100 * (record.seconds - timed) / record.seconds if record.seconds else None,
+				'peak_rss_mb': record.peak_rss / 2 ** 20
+			})
+	return rows
@@ -0,0 +1,173 @@
+import heapq
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from .tokens import tokenize
+
+def article_timestamp(article, now):
+	"""Return an article's published time as a Unix timestamp, or now if it cannot be parsed"""
+	try:
+		return min(parsedate_to_datetime(article.get('published', '')).timestamp(), now)
+	except (TypeError, ValueError):
+		return now
+
+# Remember which articles were already counted
+class RecentKeys:
+	"""Bounded set of recently seen keys; the oldest keys are forgotten first"""
+
+	def __init__(self, max_keys=100_000):
+		self.max_keys = max_keys
+		self._keys = set()
+		self._order = deque()
+
+	def add(self, key):
+		"""Add a key; returns False if it was already present"""
+		if key in self._keys:
+			return False
+		self._keys.add(key)
+		self._order.append(key)
+		if len(self._order) > self.max_keys:
+			self._keys.discard(self._order.popleft())
+		return True
+
+# Heavy-hitters summary with a fixed number of counters
+class SpaceSaving:
+	"""Space-Saving sketch (Metwally et al.) for approximate top-k counting
+
+	With m counters over a stream of total weight N, every monitored
+	item's count overestimates its true count by at most its recorded
+	error, which never exceeds N / m. Any item whose true count exceeds
+	N / m is guaranteed to be monitored.
+	"""
+
+	def __init__(self, capacity=200):
+		self.capacity = capacity
+		self.counters = {}  # item -> [count, error]
+		self.total = 0
+		self._heap = []  # One (count, item) entry per counter; counts are refreshed lazily
+
+	def add(self, item, weight=1):
+		"""Count one occurrence (or a weighted occurrence) of an item"""
+		self.total += weight
+		counter = self.counters.get(item)
+		if counter is not None:
+			counter[0] += weight
+			return
+
+		if len(self.counters) < self.capacity:
+			self.counters[item] = [weight, 0]
+			heapq.heappush(self._heap, (weight, item))
+			return
+
+		# Replace the smallest counter; the new item inherits its count as error
+		min_count, min_item = self._pop_min()
+		del self.counters[min_item]
+		self.counters[item] = [min_count + weight, min_count]
+		heapq.heappush(self._heap, (min_count + weight, item))
+
+	def _pop_min(self):
+		"""Pop the counter with the smallest up-to-date count"""
+		while True:
+			count, item = heapq.heappop(self._heap)
+			current = self.counters[item][0]
+			if current == count:
+				return count, item
+			heapq.heappush(self._heap, (current, item))
+
+	@property
+	def min_count(self):
+		"""Upper bound on the true count of any item that is not monitored"""
+		if len(self.counters) < self.capacity:
+			return 0
+		return min(count for count, _ in self.counters.values())
+
+	def top(self, k=20):
+		"""Return the k items with the largest estimated counts as (item, count, error)"""
+		items = heapq.nlargest(k, self.counters.items(), key=lambda entry: entry[1][0])
+		return [(item, count, error) for item, (count, error) in items]
+
+# Streaming keyword statistics per query over a sliding time window
+class KeywordStream:
+	"""Bounded-memory keyword counts per query, kept in time buckets
+
+	Each query keeps at most `n_buckets` buckets of `bucket_seconds`, and
+	each bucket is a SpaceSaving sketch with `capacity` counters, so memory
+	is fixed at max_queries * n_buckets * capacity counters no matter how
+	many articles arrive. For a window holding N tokens, every reported
+	count is within its reported error of the true count, and the error is
+	at most N / capacity (decay weights scale both N and the error).
+	"""
+
+	def __init__(self, capacity=200, bucket_seconds=3600, n_buckets=72, max_queries=20, max_seen=100_000):
+		self.capacity = capacity
+		self.bucket_seconds = bucket_seconds
+		self.n_buckets = n_buckets
+		self.max_queries = max_queries
+		self._queries = {}  # query -> {bucket_id: SpaceSaving}, ordered by last update
+		self._seen = RecentKeys(max_seen)  # Recently counted (query, link) pairs, so refreshes are not double counted
+		self._lock = threading.Lock()
+
+	def add_articles(self, query, articles, now=None):
+		"""Incrementally count the keywords of newly arrived articles; returns how many were new"""
+		now = time.time() if now is None else now
+		newest_bucket = int(now // self.bucket_seconds)
+		added = 0
+
+		with self._lock:
+			buckets = self._queries.pop(query, {})
+			self._queries[query] = buckets  # Move to the end (most recently updated)
+			if len(self._queries) > self.max_queries:
+				del self._queries[next(iter(self._queries))]
+
+			for article in articles:
+				bucket_id = int(article_timestamp(article, now) // self.bucket_seconds)
+				if bucket_id <= newest_bucket - self.n_buckets:
+					continue  # Older than the retained horizon
+				if not self._seen.add((query, article.get('link') or article.get('title', ''))):
+					continue
+
+				sketch = buckets.get(bucket_id)
+				if sketch is None:
+					sketch = buckets[bucket_id] = SpaceSaving(self.capacity)
+				for token in tokenize(article.get('title', '')):
+					sketch.add(token)
+				added += 1
+
+			# Expire buckets that slid out of the horizon
+			for bucket_id in [b for b in buckets if b <= newest_bucket - self.n_buckets]:
+				del buckets[bucket_id]
+
+		return added
+
+	def top_terms(self, query, k=20, window=24 * 3600, half_life=None, exclude_words=None, now=None):
+		"""Return approximate top-k terms over the last `window` seconds as (term, count, error)
+
+		When `half_life` (seconds) is given, each bucket is weighted by
+		0.5 ** (age / half_life) so recent activity dominates.
+		"""
+		now = time.time() if now is None else now
+		newest_bucket = int(now // self.bucket_seconds)
+		oldest_bucket = newest_bucket - max(1, int(window // self.bucket_seconds))
+		exclude_words = exclude_words or set()
+
+		with self._lock:
+			buckets = [(b, s) for b, s in self._queries.get(query, {}).items() if oldest_bucket < b <= newest_bucket]
+
+			# Merge the bucket sketches; an unmonitored item may hide up to min_count per bucket
+			merged = {}
+			missing_error = 0
+			for bucket_id, sketch in buckets:
+				weight = 0.5 ** ((newest_bucket - bucket_id) * self.bucket_seconds / half_life) if half_life else 1
+				floor = sketch.min_count * weight
+				missing_error += floor
+				for item, (count, error) in sketch.counters.items():
+					entry = merged.setdefault(item, [0, 0])
+					entry[0] += count * weight
+					entry[1] += error * weight - floor  # Replaces this bucket's missing-item share
+
+		ranked = heapq.nlargest(
+			k, ((item, count, error + missing_error) for item, (count, error) in merged.items() if item not in exclude_words),
+			key=lambda entry: entry[1]
+		)
+		return [(item, round(count, 2), round(error, 2)) for item, count, error in ranked]
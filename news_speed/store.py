@@ -0,0 +1,153 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import pandas as pd
+
+STORE_FIELDS = ('query', 'title', 'link', 'published', 'summary', 'source', 'sentiment_label')
+DEFAULT_STORE_PATH = os.environ.get('NEWS_SPEED_STORE', os.path.join('.cache', 'articles.sqlite'))
+
+def history_key(query=None, region='US', category=None):
+	"""Query under which the app and the CLI both keep a feed's articles in the history, e.g. bitcoin|US"""
+	return f"{query or category or 'Top stories'}|{region}"
+
+def link_hash(article):
+	"""Stable identity of an article: a digest of its link (or title when there is no link)"""
+	return hashlib.blake2b((article.get('link') or article.get('title') or '').encode(), digest_size=16).hexdigest()
+
+# Persistent history of analyzed articles
+class ArticleStore:
+	"""SQLite table of every article seen, deduplicated by link, for exports over long histories
+
+	Rows keep the time they were first ingested, the time they last changed
+	(updated_at) and the revision of the write that last changed them.
+	Revisions count write transactions and are assigned under SQLite's
+	write lock, so they commit in order and a reader that has seen revision
+	n will never later find a row with a smaller one, whatever the clocks
+	of the writing processes say. Readers page through the rows in
+	(ingested_at, link_hash) or (revision, link_hash) order, so exports hold
+	one chunk in memory at a time no matter how large the history grows.
+	"""
+
+	def __init__(self, path=DEFAULT_STORE_PATH):
+		self.path = path
+		os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+		self._lock = threading.Lock()
+		self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+		self._connection.execute("PRAGMA journal_mode=WAL")
+		# Under the write lock, so processes opening an older store at once migrate it once
+		self._connection.execute("BEGIN IMMEDIATE")
+		try:
+			self._connection.execute(
+				"CREATE TABLE IF NOT EXISTS articles ("
+				"link_hash TEXT PRIMARY KEY, query TEXT, title TEXT, link TEXT, published TEXT, summary TEXT, "
+				"source TEXT, sentiment_label TEXT, ingested_at REAL NOT NULL, updated_at REAL, revision INTEGER)"
+			)
+			self._migrate()
+			self._connection.execute("CREATE INDEX IF NOT EXISTS articles_ingested ON articles (ingested_at, link_hash)")
+			self._connection.execute("CREATE INDEX IF NOT EXISTS articles_revision ON articles (revision, link_hash)")
+		except BaseException:
+			self._connection.execute("ROLLBACK")
+			raise
+		self._connection.execute("COMMIT")
+
+	def _migrate(self):
+		"""Add the columns that stores created by earlier versions lack"""
+		columns = {row[1] for row in self._connection.execute("PRAGMA table_info(articles)")}
+		if 'updated_at' not in columns:
+			self._connection.execute("ALTER TABLE articles ADD COLUMN updated_at REAL")
+			self._connection.execute("UPDATE articles SET updated_at = ingested_at")
+		if 'revision' not in columns:
+			# One revision per existing row, in the order the rows were written
+			self._connection.execute("ALTER TABLE articles ADD COLUMN revision INTEGER")
+			self._connection.execute(
+				"UPDATE articles SET revision = ranked.number FROM ("
+				"SELECT link_hash, ROW_NUMBER() OVER (ORDER BY updated_at, link_hash) AS number FROM articles"
+				") AS ranked WHERE articles.link_hash = ranked.link_hash"
+			)
+			self._connection.execute("DROP INDEX IF EXISTS articles_updated")
+
+	def add_articles(self, articles, query=None, now=None):
+		"""Insert new articles; known ones only get a missing sentiment label filled in, which moves their updated_at and revision. Returns the row count written"""
+		articles = list(articles)
+		with self._lock:
+			# One transaction per batch; in autocommit mode every row would be its own commit
+			self._connection.execute("BEGIN IMMEDIATE")
+			try:
+				# Stamped once the write lock is held, which may take a while with other writers
+				now = time.time() if now is None else now
+				revision = self._connection.execute("SELECT COALESCE(MAX(revision), 0) + 1 FROM articles").fetchone()[0]
+				rows = [
+					(link_hash(article), query, *(article.get(field) for field in STORE_FIELDS[1:]), now, now, revision)
+					for article in articles
+				]
+				cursor = self._connection.executemany(
+					"INSERT INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+					"ON CONFLICT (link_hash) DO UPDATE SET sentiment_label = COALESCE(articles.sentiment_label, excluded.sentiment_label), "
+					"updated_at = CASE WHEN articles.sentiment_label IS NULL AND excluded.sentiment_label IS NOT NULL "
+					"THEN excluded.updated_at ELSE articles.updated_at END, "
+					"revision = CASE WHEN articles.sentiment_label IS NULL AND excluded.sentiment_label IS NOT NULL "
+					"THEN excluded.revision ELSE articles.revision END",
+					rows
+				)
+			except BaseException:
+				self._connection.execute("ROLLBACK")
+				raise
+			self._connection.execute("COMMIT")
+			return cursor.rowcount
+
+	def revision_at(self, updated_at, link_hash):
+		"""The (revision, link_hash) position of the last row at or before an (updated_at, link_hash) position, or None"""
+		with self._lock:
+			return self._connection.execute(
+				"SELECT revision, link_hash FROM articles WHERE (updated_at, link_hash) <= (?, ?) "
+				"ORDER BY revision DESC, link_hash DESC LIMIT 1",
+				(updated_at, link_hash)
+			).fetchone()
+
+	def __len__(self):
+		with self._lock:
+			return self._connection.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+	def iter_frames(self, chunk_size=10_000, after=None, query=None, order='ingested_at'):
+		"""Yield the stored articles as DataFrames of at most `chunk_size` rows, oldest first
+
+		`order` is 'ingested_at' or 'revision', the column the rows are
+		sorted by. `after` is an (<order value>, link_hash) position; only
+		rows after it are returned. Pages are fetched by key, not by offset,
+		so each page costs the same however deep into the table it is.
+		With no rows to return it yields one empty frame with the columns, so
+		writers still produce a file with a header or schema.
+		"""
+		if order not in ('ingested_at', 'revision'):
+			raise ValueError(f"Unknown order {order!r}; use 'ingested_at' or 'revision'")
+		position = after or (float('-inf'), '')
+		columns = ['ingested_at', 'updated_at', 'revision', 'link_hash', *STORE_FIELDS]
+		conditions, extra = "", ()
+		if query is not None:
+			conditions, extra = conditions + " AND query = ?", extra + (query,)
+		empty = True
+		while True:
+			sql = (
+				f"SELECT {', '.join(columns)} FROM articles WHERE ({order}, link_hash) > (?, ?)"
+				+ conditions
+				+ f" ORDER BY {order}, link_hash LIMIT ?"
+			)
+			params = (*position, *extra, chunk_size)
+			with self._lock:
+				rows = self._connection.execute(sql, params).fetchall()
+			if not rows:
+				if empty:
+					yield pd.DataFrame.from_records(rows, columns=columns).astype({'ingested_at': 'float64', 'updated_at': 'float64', 'revision': 'int64'})
+				return
+			empty = False
+			last = rows[-1]
+			position = (last[columns.index(order)], last[columns.index('link_hash')])
+			yield pd.DataFrame.from_records(rows, columns=columns)
+			if len(rows) < chunk_size:
+				return
+
+	def close(self):
+		with self._lock:
+			self._connection.close()
@@ -1,67 +1,101 @@
-import streamlit as st
+import logging
 import random
-from transformers import pipeline
+from . import metrics, profiling
+from .cache import memoize
+from .models import get_model_registry, load_pipeline, model_loader
 
-@st.cache_resource
+logger = logging.getLogger(__name__)
+
+@model_loader('summarizer')
 def load_summarizer():
 	"""Load summarization model"""
 	try:
-		summarizer = pipeline("summarization", 
-							model="facebook/bart-large-cnn",
-							max_length=150, 
-							min_length=30,
-							do_sample=False)
-		return summarizer, True
-	except:
-		try:
-			# Fallback to smaller model
-			summarizer = pipeline("summarization",
-								model="sshleifer/distilbart-cnn-12-6",
-								max_length=120,
-								min_length=25)
-			return summarizer, True
-		except Exception as e:
-			st.warning(f"Summarization model not available\n\nReason:\n{e}")
-			return None, False
+		return load_pipeline("summarization", 
+							 model="facebook/bart-large-cnn",
+							 max_length=150, 
+							 min_length=30,
+							 do_sample=False)
+	except Exception:
+		# Fallback to smaller model
+		return load_pipeline("summarization",
+							 model="sshleifer/distilbart-cnn-12-6",
+							 max_length=120,
+							 min_length=25)
 
 # Summarize news headlines
 class TextSummarizer:
-	"""Text summarization using Hugging Face transformers"""
+	"""Text summarization using Hugging Face transformers
+	
+	The model is held by the model registry, loaded on the first summary
+	and possibly evicted when idle or over the memory budget.
+	"""
+
+	def __init__(self, registry=None):
+		self.registry = registry or get_model_registry()
+
+	@property
+	def available(self):
+		return self.registry.available('summarizer')
+
+	def _combine_headlines(self, headlines):
+		"""Join a random selection of headlines into one summarizer input"""
+		# Shuffle headlines to get random selection
+		headlines_copy = list(headlines)
+		random.shuffle(headlines_copy)
+
+		combined_text = ""
+		for headline in headlines_copy:
+			if len(combined_text) >= 1000:
+				break
+			combined_text += headline.strip() + ". "
 
-	def __init__(self):
-		self.summarizer, self.available = load_summarizer()
+		combined_text = combined_text.strip()
 
-	@st.cache_data
+		# Limit input for summarizer (most models prefer <1024 tokens ~ 1000–1500 characters)
+		return combined_text[:1000]
+
+	@memoize('summaries', max_entries=256)
 	def summarize_headlines(_self, headlines):  
 		"""Summarize a list of headlines"""
 		if not _self.available or not headlines:
 			return "Summarization not available"
 	
 		try:
-			# Create a cache key based on headlines
-			headlines_str = '|'.join(sorted(headlines))
-			
-			# Shuffle headlines to get random selection
-			headlines_copy = headlines.copy()
-			random.shuffle(headlines_copy)
-
-			combined_text = ""
-			for headline in headlines_copy:
-				if len(combined_text) >= 1000:
-					break
-				combined_text += headline.strip() + ". "
-		
-			combined_text = combined_text.strip()
+			combined_text = _self._combine_headlines(headlines)
 
 			if len(combined_text) < 50:
 				return "Insufficient text for summarization"
 
-			# Limit input for summarizer (most models prefer <1024 tokens ~ 1000–1500 characters)
-			if len(combined_text) > 1000:
-				combined_text = combined_text[:1000]
-
-			summary = _self.summarizer(combined_text)[0]['summary_text']
+			with _self.registry.use('summarizer') as summarizer:
+				if summarizer is None:
+					return "Summarization not available"
+				with metrics.timer('summarization', items=1), profiling.profile('summarizer', summarizer, 1):
+					summary = summarizer(combined_text)[0]['summary_text']
 			return summary
 
 		except Exception as e:
-			return f"Summarization error: {e}"
\ No newline at end of file
+			return f"Summarization error: {e}"
+
+	@memoize('summaries', max_entries=256)
+	def summarize_headline_groups(_self, groups, batch_size=8):
+		"""Summarize several groups of headlines in one batched model call"""
+		if not _self.available:
+			return ["Summarization not available"] * len(groups)
+
+		texts = [_self._combine_headlines(group) for group in groups]
+		summaries = [None if len(text) >= 50 else "Insufficient text for summarization" for text in texts]
+		batch = [text for text in texts if len(text) >= 50]
+		if not batch:
+			return summaries
+
+		try:
+			with _self.registry.use('summarizer') as summarizer:
+				if summarizer is None:
+					return ["Summarization not available"] * len(groups)
+				with metrics.timer('summarization', items=len(batch)), \
+						profiling.profile('summarizer', summarizer, len(batch), batch_size=min(batch_size, len(batch))):
+					outputs = iter(summarizer(batch, batch_size=batch_size))
+			return [summary or next(outputs)['summary_text'] for summary in summaries]
+
+		except Exception as e:
+			return [summary or f"Summarization error: {e}" for summary in summaries]
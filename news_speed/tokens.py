@@ -0,0 +1,103 @@
+import re
+import hashlib
+import numpy as np
+from scipy import sparse
+from wordcloud import STOPWORDS
+from .phrases import PhraseExtractor
+from .cache import memoize_resource
+
+# Shared tokenizer rules for every keyword view (top keywords, word cloud, clustering)
+TOKEN_PATTERN = re.compile(r"\w+(?:-\w+)*")  # Words, keeping internal hyphens
+MIN_TOKEN_LENGTH = 4
+
+def is_keyword_token(token):
+	"""Check whether a lowercased token counts as a keyword on its own"""
+	return len(token) >= MIN_TOKEN_LENGTH and not token.isdigit() and token not in STOPWORDS
+
+def tokenize(text):
+	"""Split text into lowercased tokens, dropping short words, pure numbers and stopwords"""
+	return [token for token in TOKEN_PATTERN.findall(text.lower()) if is_keyword_token(token)]
+
+def dataset_fingerprint(titles):
+	"""Create a content digest identifying a list of titles"""
+	return hashlib.blake2b('\x1f'.join(titles).encode(), digest_size=16).hexdigest()
+
+# Tokenize a dataset once and share the result
+class TokenIndex:
+	"""Sparse document-term matrix plus vocabulary (words and phrases) for a list of titles"""
+
+	def __init__(self, titles, extractor=None):
+		# Encode every headline into one flat sequence of word ids
+		word_ids = {}
+		token_ids, lengths = [], []
+		for title in titles:
+			tokens = TOKEN_PATTERN.findall(title.lower())
+			token_ids.extend([word_ids.setdefault(token, len(word_ids)) for token in tokens])
+			lengths.append(len(tokens))
+		words = np.array(list(word_ids), dtype=object)
+		token_ids = np.array(token_ids, dtype=np.int64)
+		doc_ids = np.repeat(np.arange(len(titles)), lengths)
+
+		# Multi-word phrases become single terms and consume their words
+		extractor = extractor or PhraseExtractor()
+		self.phrases, starts, phrase_ids, covered = extractor.find_phrases(token_ids, doc_ids, words)
+
+		# Remaining words count on their own if they pass the keyword rules
+		keyword = np.array([is_keyword_token(word) for word in words], dtype=bool)
+		positions = np.flatnonzero(~covered & keyword[token_ids]) if len(words) else np.array([], dtype=int)
+		rows = np.concatenate([doc_ids[positions], doc_ids[starts]])
+		columns = np.concatenate([token_ids[positions], len(words) + phrase_ids])
+
+		# Rows are documents, columns are terms (words in order of first appearance, then phrases)
+		terms = np.concatenate([words, np.array([phrase for phrase, _, _ in self.phrases], dtype=object)])
+		used = np.flatnonzero(np.bincount(columns, minlength=len(terms)))
+		remap = np.zeros(len(terms), dtype=np.int64)
+		remap[used] = np.arange(len(used))
+		self.matrix = sparse.csr_matrix(
+			(np.ones(len(columns), dtype=np.int32), (rows, remap[columns])),
+			shape=(len(titles), len(used))
+		)
+		self.matrix.sum_duplicates()
+		self.terms = terms[used]
+		self.vocabulary = {term: term_id for term_id, term in enumerate(self.terms)}
+		self.term_counts = np.asarray(self.matrix.sum(axis=0)).ravel()
+
+	def __len__(self):
+		return self.matrix.shape[0]
+
+	def term_mask(self, exclude_words=None):
+		"""Boolean mask over the vocabulary with excluded words switched off"""
+		mask = np.ones(len(self.terms), dtype=bool)
+		for word in exclude_words or ():
+			term_id = self.vocabulary.get(word.lower())
+			if term_id is not None:
+				mask[term_id] = False
+		return mask
+
+	def counts(self, rows=None):
+		"""Total count of each term, optionally restricted to a subset of documents"""
+		if rows is None:
+			return self.term_counts
+		return np.asarray(self.matrix[rows].sum(axis=0)).ravel()
+
+	def most_common(self, n=20, exclude_words=None, rows=None):
+		"""Return the n most frequent terms and their counts, like Counter.most_common"""
+		counts = np.where(self.term_mask(exclude_words), self.counts(rows), 0)
+		top = np.argsort(-counts, kind='stable')[:n]  # Stable sort keeps first-seen order for ties
+		return [(self.terms[i], int(counts[i])) for i in top if counts[i] > 0]
+
+	def frequencies(self, n=100, exclude_words=None, rows=None):
+		"""Return the n most frequent terms as a {term: count} mapping"""
+		return dict(self.most_common(n, exclude_words, rows))
+
+@memoize_resource(maxsize=16)
+def _cached_token_index(fingerprint, _titles):
+	"""Build the token index once per dataset fingerprint"""
+	return TokenIndex(_titles)
+
+def get_token_index(titles):
+	"""Return the shared token index for a list of titles (or a dataset Column, keyed by its digest)"""
+	if hasattr(titles, 'cache_key'):
+		return _cached_token_index(titles.cache_key(), titles)
+	titles = list(titles)
+	return _cached_token_index(dataset_fingerprint(titles), titles)
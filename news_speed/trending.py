@@ -0,0 +1,181 @@
+import threading
+import time
+import numpy as np
+from collections import Counter
+from .tokens import tokenize
+from .sketches import RecentKeys, article_timestamp
+
+# Detect terms whose current activity breaks away from their usual level
+class TrendDetector:
+	"""Per-term hourly counts in a ring buffer, scored against a rolling baseline
+
+	The baseline (mean and variance over the last `n_buckets - 1` completed
+	buckets) is kept as running sums that are updated when counts arrive or
+	the clock advances one bucket, so scoring is a single vectorized pass
+	over the tracked terms and never rescans the history.
+	"""
+
+	def __init__(self, bucket_seconds=3600, n_buckets=25, max_terms=50_000, initial_terms=1024, max_seen=100_000):
+		self.bucket_seconds = bucket_seconds
+		self.n_buckets = n_buckets
+		self.max_terms = max_terms
+		initial_terms = min(initial_terms, max_terms)
+		self.term_ids = {}
+		self.terms = []
+		self.counts = np.zeros((initial_terms, n_buckets), dtype=np.float32)  # Ring buffer of buckets
+		self.baseline_sum = np.zeros(initial_terms, dtype=np.float64)
+		self.baseline_sumsq = np.zeros(initial_terms, dtype=np.float64)
+		self.current_bucket = None
+		self.first_bucket = None
+		self._free_rows = []
+		self._seen = RecentKeys(max_seen)
+		self._lock = threading.Lock()
+
+	def _row(self, term, protected=()):
+		"""Return the row of a term, allocating (and if needed evicting) rows other than `protected`; None if all are"""
+		row = self.term_ids.get(term)
+		if row is not None:
+			return row
+
+		if not self._free_rows:
+			if len(self.terms) < len(self.counts):
+				self._free_rows.append(len(self.terms))
+				self.terms.append(None)
+			elif len(self.counts) < self.max_terms:
+				self._grow(min(len(self.counts) * 2, self.max_terms))
+				return self._row(term, protected)
+			else:
+				self._evict(max(1, self.max_terms // 10), protected)
+				if not self._free_rows:
+					return None
+
+		row = self._free_rows.pop()
+		self.terms[row] = term
+		self.term_ids[term] = row
+		return row
+
+	def _grow(self, size):
+		"""Enlarge the per-term arrays"""
+		extra = size - len(self.counts)
+		self.counts = np.vstack([self.counts, np.zeros((extra, self.n_buckets), dtype=np.float32)])
+		self.baseline_sum = np.concatenate([self.baseline_sum, np.zeros(extra)])
+		self.baseline_sumsq = np.concatenate([self.baseline_sumsq, np.zeros(extra)])
+
+	def _evict(self, n_rows, protected=()):
+		"""Free the rows of the least active terms, never those in `protected`"""
+		n_rows = min(n_rows, len(self.counts) - len(protected))
+		if n_rows <= 0:
+			return
+		activity = self.counts.sum(axis=1)
+		activity[list(protected)] = np.inf
+		for row in np.argpartition(activity, n_rows - 1)[:n_rows]:
+			del self.term_ids[self.terms[row]]
+			self.terms[row] = None
+			self.counts[row] = 0
+			self.baseline_sum[row] = 0
+			self.baseline_sumsq[row] = 0
+			self._free_rows.append(int(row))
+
+	def _advance(self, bucket_id):
+		"""Move the clock forward, folding completed buckets into the baseline"""
+		if self.current_bucket is None:
+			self.current_bucket = self.first_bucket = bucket_id
+			return
+		steps = bucket_id - self.current_bucket
+		if steps <= 0:
+			return
+
+		if steps >= self.n_buckets:
+			# Everything slid out of the window
+			self.counts[:] = 0
+			self.baseline_sum[:] = 0
+			self.baseline_sumsq[:] = 0
+			self.current_bucket = self.first_bucket = bucket_id
+			return
+
+		for bucket in range(self.current_bucket + 1, bucket_id + 1):
+			completed = self.counts[:, (bucket - 1) % self.n_buckets].astype(np.float64)
+			expired = self.counts[:, bucket % self.n_buckets].astype(np.float64)  # Oldest baseline bucket
+			self.baseline_sum += completed - expired
+			self.baseline_sumsq += completed ** 2 - expired ** 2
+			self.counts[:, bucket % self.n_buckets] = 0
+		self.current_bucket = bucket_id
+
+	def add_articles(self, articles, now=None):
+		"""Incrementally count the terms of newly arrived articles; returns how many were new"""
+		now = time.time() if now is None else now
+		increments = {}  # term -> Counter of bucket -> count
+		added = 0
+
+		with self._lock:
+			self._advance(int(now // self.bucket_seconds))
+			for article in articles:
+				bucket_id = int(article_timestamp(article, now) // self.bucket_seconds)
+				if bucket_id <= self.current_bucket - self.n_buckets:
+					continue  # Older than the tracked window
+				if not self._seen.add(article.get('link') or article.get('title', '')):
+					continue
+				self.first_bucket = min(self.first_bucket, bucket_id)
+				for term in set(tokenize(article.get('title', ''))):
+					increments.setdefault(term, Counter())[bucket_id] += 1
+				added += 1
+
+			# Resolve rows after counting, most frequent terms first; this batch's rows hold no counts yet, so they are
+			# protected from eviction and a full tracker drops the batch's rarest new terms instead
+			protected = set()
+			keys, values = [], []
+			for term, by_bucket in sorted(increments.items(), key=lambda item: -sum(item[1].values())):
+				row = self._row(term, protected)
+				if row is None:
+					continue
+				protected.add(row)
+				keys.extend((row, bucket_id) for bucket_id in by_bucket)
+				values.extend(by_bucket.values())
+
+			if keys:
+				keys = np.array(keys)
+				rows, buckets = keys[:, 0], keys[:, 1]
+				values = np.array(values, dtype=np.float64)
+				slots = buckets % self.n_buckets
+				old = self.counts[rows, slots].astype(np.float64)
+				self.counts[rows, slots] = old + values
+
+				# Late arrivals for completed buckets also update the running baseline
+				past = buckets < self.current_bucket
+				np.add.at(self.baseline_sum, rows[past], values[past])
+				np.add.at(self.baseline_sumsq, rows[past], (old[past] + values[past]) ** 2 - old[past] ** 2)
+
+		return added
+
+	def scores(self, now=None):
+		"""Return current counts, baseline means and z-scores for every tracked row"""
+		now = time.time() if now is None else now
+		with self._lock:
+			if self.current_bucket is None:
+				empty = np.zeros(0)
+				return empty, empty, empty
+			self._advance(int(now // self.bucket_seconds))
+
+			# Only count baseline buckets that actually lie after the first observation
+			window = min(max(self.current_bucket - self.first_bucket, 1), self.n_buckets - 1)
+			current = self.counts[:, self.current_bucket % self.n_buckets].astype(np.float64)
+			mean = self.baseline_sum / window
+			variance = np.maximum(self.baseline_sumsq / window - mean ** 2, 0)
+			return current, mean, (current - mean) / np.sqrt(variance + 1)
+
+	def trending(self, k=20, min_count=2, min_score=2.0, exclude_words=None, now=None):
+		"""Return the top emerging terms as (term, count, baseline, z_score)"""
+		current, mean, z_scores = self.scores(now)
+		candidates = np.flatnonzero((current >= min_count) & (z_scores >= min_score))
+		top = candidates[np.argsort(-z_scores[candidates], kind='stable')]
+
+		exclude_words = exclude_words or set()
+		results = []
+		for row in top:
+			term = self.terms[row]
+			if term is None or term in exclude_words:
+				continue
+			results.append((term, int(current[row]), round(float(mean[row]), 2), round(float(z_scores[row]), 2)))
+			if len(results) == k:
+				break
+		return results
@@ -2,14 +2,52 @@ from .collector import NewsDataCollector
 from .analyzer import SentimentAnalyzer
 from .summarizer import TextSummarizer
 from .visualizer import DataVisualizer
+from .clustering import TopicClusterer
+from .tokens import get_token_index
+from .sketches import KeywordStream
+from .trending import TrendDetector
+from .cache import memoize
+from .pipeline import Pipeline
+from .store import ArticleStore
+from . import metrics
 import streamlit as st
-import re
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import logging
+import numpy as np
 from collections import Counter
 
 # Suppress warnings for cleaner output
 import warnings
 warnings.filterwarnings('ignore')
 
+# Show warnings and errors logged by the core modules in the app
+class StreamlitLogHandler(logging.Handler):
+	"""Forward log records to st.warning / st.error while a script run is active"""
+	
+	def emit(self, record):
+		if get_script_run_ctx(suppress_warning=True) is None:
+			return  # Not called from a session (e.g. a background thread)
+		try:
+			message = self.format(record)
+			if record.levelno >= logging.ERROR:
+				st.error(message)
+			else:
+				st.warning(message)
+		except Exception:
+			self.handleError(record)
+
+def install_log_handler():
+	"""Attach the Streamlit handler to the news_speed logger once per process"""
+	package_logger = logging.getLogger('news_speed')
+	# Match by name, since reloading this module creates a new handler class
+	if not any(handler.get_name() == 'streamlit' for handler in package_logger.handlers):
+		handler = StreamlitLogHandler(level=logging.WARNING)
+		handler.set_name('streamlit')
+		handler.setFormatter(logging.Formatter('%(message)s'))
+		package_logger.addHandler(handler)
+
+install_log_handler()
+
 @st.cache_resource
 def get_analyzers():
 	"""Initialize and cache the analyzer objects"""
@@ -19,27 +57,99 @@ def get_analyzers():
 	visualizer = DataVisualizer()
 	return collector, analyzer, summarizer, visualizer
 
-@st.cache_data
+@st.cache_resource
+def get_keyword_stream():
+	"""Initialize and cache the streaming keyword statistics shared by all sessions"""
+	return KeywordStream()
+
+@st.cache_resource
+def get_metrics_server():
+	"""Start the Prometheus endpoint once per process when NEWS_SPEED_METRICS_PORT is set"""
+	return metrics.serve()
+
+@st.cache_resource
+def get_article_store():
+	"""Open the article history shared by all sessions"""
+	return ArticleStore()
+
+@st.cache_resource(max_entries=20)
+def get_trend_detector(stream_key):
+	"""Initialize and cache the trending-term detector of one query"""
+	return TrendDetector()
+
+def iter_sentiment_batches(titles, batch_size=16):
+	"""Yield sentiment results batch by batch as inference completes"""
+	_, analyzer, _, _ = get_analyzers()
+	for start in range(0, len(titles), batch_size):
+		yield analyzer.analyze_batch(titles[start:start + batch_size])
+
+@memoize('analysis', max_entries=64)
 def process_sentiment_analysis(titles):
 	"""Cache sentiment analysis results"""
-	_, analyzer, _, _ = get_analyzers()
 	results = []
-	for title in titles:
-		sentiment = analyzer.analyze_text(title)
-		results.append(sentiment)
+	for batch in iter_sentiment_batches(titles):
+		results.extend(batch)
 	return results
 
-@st.cache_data
+@memoize('analysis', max_entries=64)
 def generate_keyword_analysis(titles, exclude_words):
 	"""Cache keyword analysis"""
-	all_text = ' '.join(titles).lower()
-	words = re.findall(r'\b\w+\b', all_text)
+	return get_token_index(titles).most_common(20, exclude_words=exclude_words)
+
+@memoize('analysis', max_entries=64)
+def generate_topic_clusters(titles, sentiment_labels, _summarizer=None):
+	"""Cache topic clusters with per-cluster summaries and sentiment breakdowns"""
+	summarizer = _summarizer or get_analyzers()[2]
+	labels, top_terms = TopicClusterer().cluster(titles)
+	
+	clusters = []
+	for cluster_id, terms in enumerate(top_terms):
+		members = np.flatnonzero(labels == cluster_id)
+		sentiment_counts = Counter(sentiment_labels[i] for i in members)
+		clusters.append({
+			'terms': terms,
+			'size': len(members),
+			'headlines': [titles[i] for i in members],
+			'sentiment': {label: count / len(members) * 100 for label, count in sentiment_counts.items()}
+		})
+	
+	# Summarize every cluster in a single batched model call
+	summaries = summarizer.summarize_headline_groups([cluster['headlines'] for cluster in clusters])
+	for cluster, summary in zip(clusters, summaries):
+		cluster['summary'] = summary
+	
+	return clusters
+
+@st.cache_resource
+def get_analysis_pipeline():
+	"""Declare the analysis stages that follow collection, run concurrently on a shared thread pool"""
+	_, _, summarizer, visualizer = get_analyzers()
+	pipeline = Pipeline(max_workers=4)
+	
+	# Stages that only need the titles can start while sentiment inference runs
+	@pipeline.stage(deps=('titles', 'exclude_words'))
+	def keywords(titles, exclude_words):
+		return generate_keyword_analysis(titles, exclude_words)
+	
+	@pipeline.stage(deps=('titles', 'exclude_words', 'colormap'))
+	def wordcloud(titles, exclude_words, colormap):
+		return visualizer.create_wordcloud(titles, exclude_words=exclude_words, colormap=colormap)
+	
+	@pipeline.stage(deps=('titles',))
+	def summary(titles):
+		return summarizer.summarize_headlines(titles) if summarizer.available else None
+	
+	# Stages that need the sentiment labels
+	@pipeline.stage(deps=('sentiment_labels',))
+	def distribution(sentiment_labels):
+		return visualizer.plot_sentiment_distribution(sentiment_labels)
+	
+	@pipeline.stage(deps=('published', 'sentiment_labels'))
+	def timeline(published, sentiment_labels):
+		return visualizer.plot_sentiment_timeline(published, sentiment_labels)
 	
-	# Filter out excluded words
-	if exclude_words:
-		filtered_words = [w for w in words if len(w) > 3 and w not in exclude_words]
-	else:
-		filtered_words = [w for w in words if len(w) > 3]
+	@pipeline.stage(deps=('titles', 'sentiment_labels'))
+	def clusters(titles, sentiment_labels):
+		return generate_topic_clusters(titles, sentiment_labels, _summarizer=summarizer)
 	
-	word_freq = Counter(filtered_words)
-	return word_freq.most_common(20)
\ No newline at end of file
+	return pipeline
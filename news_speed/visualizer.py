@@ -1,50 +1,96 @@
-import streamlit as st
-import re
+import hashlib
+from io import BytesIO
 from collections import Counter
+from .tokens import get_token_index
+from . import metrics
+from .cache import memoize
+
+import numpy as np
+import pandas as pd
 
 # Visualization libraries
 import matplotlib.pyplot as plt
 from wordcloud import WordCloud
 import plotly.graph_objects as go
 
+def lttb_indices(x, y, n_out):
+	"""Pick n_out points that preserve the shape of a series (Largest-Triangle-Three-Buckets)"""
+	n_points = len(x)
+	if n_out >= n_points or n_out < 3:
+		return np.arange(n_points)
+	
+	# First and last points are kept; the rest is split into n_out - 2 buckets
+	edges = np.linspace(1, n_points - 1, n_out - 1).astype(int)
+	selected = np.empty(n_out, dtype=int)
+	selected[0], selected[-1] = 0, n_points - 1
+	
+	previous = 0
+	for i in range(n_out - 2):
+		start, end = edges[i], edges[i + 1]
+		following = slice(end, edges[i + 2]) if i + 2 < len(edges) else slice(n_points - 1, n_points)
+		avg_x, avg_y = x[following].mean(), y[following].mean()
+		
+		# Keep the point forming the largest triangle with the previous pick and the next bucket's average
+		area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous]) - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+		previous = start + int(area.argmax())
+		selected[i + 1] = previous
+	
+	return selected
+
+def parse_published(published):
+	"""Parse RSS published strings into UTC timestamps (NaT when unparseable)"""
+	published = pd.Series(published)
+	if pd.api.types.is_datetime64_any_dtype(published):
+		return pd.to_datetime(published, utc=True)
+	
+	# Google News uses RFC 822 dates in GMT; a literal zone is much faster to parse than %Z
+	published = published.astype(object).fillna('')
+	timestamps = pd.to_datetime(published, format='%a, %d %b %Y %H:%M:%S GMT', utc=True, errors='coerce')
+	
+	# Fall back to flexible parsing for any other date layout
+	missing = timestamps.isna() & published.astype(bool)
+	if missing.any():
+		timestamps[missing] = pd.to_datetime(published[missing], format='mixed', utc=True, errors='coerce')
+	return timestamps
+
 class DataVisualizer:
 	"""Advanced data visualization for insights"""
 	
 	def __init__(self):
 		plt.style.use('seaborn-v0_8')
 
-	@st.cache_data
-	def create_wordcloud(_self, text_data, exclude_words, colormap='viridis'):
-		"""Generate customizable word cloud"""
-		
-		# Convert set to sorted list for consistent caching
-		exclude_words = sorted(list(exclude_words)) if exclude_words else [] 
+	def create_wordcloud(_self, text_data, exclude_words, colormap='viridis', preview=False):
+		"""Generate customizable word cloud as PNG bytes (low resolution when previewing)"""
 		
-		# Clean and combine text
-		text = ' '.join(text_data).lower()
-		text = re.sub(r'[^\w\s-]', ' ', text)
+		# Read term frequencies from the shared token index instead of re-tokenizing
+		frequencies = get_token_index(text_data).frequencies(100, exclude_words=exclude_words)
 		
-		# Remove common words
-		words = [word for word in text.split() if len(word) > 3 and word not in exclude_words]
-		text = ' '.join(words)
-		
-		if not text.strip():
+		if not frequencies:
 			return None
-			
+		
+		width, height = (400, 200) if preview else (800, 400)
+		digest = hashlib.blake2b(repr(list(frequencies.items())).encode(), digest_size=16).hexdigest()
+		return _self.render_wordcloud(digest, frequencies, colormap, width, height)
+	
+	@memoize('wordclouds', max_entries=32)
+	@metrics.timed('wordcloud')
+	def render_wordcloud(_self, digest, _frequencies, colormap, width, height):
+		"""Lay out and rasterize a word cloud once, cached by (frequencies digest, colormap, size)"""
 		wordcloud = WordCloud(
-			width=800, 
-			height=400, 
+			width=width, 
+			height=height, 
 			background_color='white',
 			colormap=colormap,
 			max_words=100,
 			relative_scaling=0.5,
-			random_state=42,
-			regexp=r'\b(?!\d+\b)[\w-]+\b'  # Allow hyphens, strip pure numbers
-		).generate(text)
+			random_state=42
+		).generate_from_frequencies(_frequencies)
 		
-		return wordcloud
+		img_buffer = BytesIO()
+		wordcloud.to_image().save(img_buffer, format='PNG')
+		return img_buffer.getvalue()
 		
-	@st.cache_data
+	@memoize('charts', max_entries=64)
 	def plot_sentiment_distribution(_self, sentiments):
 		"""Create sentiment distribution bar chart with fixed order and matching colors"""
 		
@@ -79,4 +125,47 @@ class DataVisualizer:
 			template="plotly_white"
 		)
 		
-		return fig
\ No newline at end of file
+		return fig
+	
+	@memoize('charts', max_entries=64)
+	def plot_sentiment_timeline(_self, published, sentiments, freq='h', max_points=500):
+		"""Create sentiment-over-time line chart, aggregated and downsampled server-side"""
+		
+		sentiment_order = ['Positive', 'Neutral', 'Negative']
+		color_map = {
+			'Positive': '#00aa00',
+			'Neutral': '#888888',
+			'Negative': '#ff4444'
+		}
+		
+		# Count sentiments per time bucket
+		frame = pd.DataFrame({'time': parse_published(published), 'sentiment': list(sentiments)}).dropna(subset=['time'])
+		if frame.empty:
+			return None
+		
+		counts = frame.groupby([pd.Grouper(key='time', freq=freq), 'sentiment']).size().unstack(fill_value=0)
+		counts = counts.reindex(columns=sentiment_order, fill_value=0)
+		counts = counts.reindex(pd.date_range(counts.index.min(), counts.index.max(), freq=freq), fill_value=0)
+		
+		# Downsample every series to a fixed point budget so the payload size stays constant
+		x = counts.index.asi8.astype(np.float64)
+		fig = go.Figure()
+		for sentiment in sentiment_order:
+			y = counts[sentiment].to_numpy(dtype=np.float64)
+			keep = lttb_indices(x, y, max_points)
+			fig.add_trace(go.Scatter(
+				x=counts.index[keep],
+				y=y[keep],
+				mode='lines',
+				name=sentiment,
+				line=dict(color=color_map[sentiment])
+			))
+		
+		fig.update_layout(
+			title="Sentiment Over Time",
+			xaxis_title="Published",
+			yaxis_title="Articles",
+			template="plotly_white"
+		)
+		
+		return fig
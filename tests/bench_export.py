@@ -0,0 +1,70 @@
+from news_speed.exporter import DataExporter, STREAM_WRITERS
+from news_speed.store import ArticleStore
+import argparse
+import pandas as pd
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+WORDS = "market stocks rally fall bank rates inflation earnings tech energy oil growth jobs trade deal court election storm".split()
+SOURCES = ["Reuters", "AP News", "BBC", "Bloomberg", "CNBC", "The Guardian"]
+LABELS = ["Positive", "Neutral", "Negative"]
+
+def main():
+	parser = argparse.ArgumentParser(description="Compare export formats on a synthetic article store")
+	parser.add_argument('--rows', type=int, default=50_000)
+	parser.add_argument('--chunk-size', type=int, default=10_000)
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as directory:
+		store = ArticleStore(os.path.join(directory, 'articles.sqlite'))
+		fill_store(store, args.rows)
+		print(f"Store: {len(store):,} articles\n")
+		print(f"{'format':<10} {'seconds':>8} {'MB':>8} {'peak MB':>8}")
+
+		# csv and json render the whole history in memory; the rest stream chunk by chunk
+		for fmt in ['csv', 'json', *STREAM_WRITERS]:
+			path = os.path.join(directory, f"articles.{fmt}")
+			seconds, peak = measure(lambda: export(store, fmt, path, args.chunk_size))
+			print(f"{fmt:<10} {seconds:>8.2f} {os.path.getsize(path) / 1e6:>8.2f} {peak / 1e6:>8.1f}")
+		store.close()
+
+def fill_store(store, rows):
+	rng = random.Random(0)
+	for start in range(0, rows, 10_000):
+		store.add_articles([
+			{
+				'title': ' '.join(rng.choices(WORDS, k=8)).capitalize(),
+				'link': f"https://news.example.com/articles/{i}",
+				'published': f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:00",
+				'summary': ' '.join(rng.choices(WORDS, k=30)),
+				'source': rng.choice(SOURCES),
+				'sentiment_label': rng.choice(LABELS)
+			}
+			for i in range(start, min(start + 10_000, rows))
+		], query='benchmark', now=start)
+
+def export(store, fmt, path, chunk_size):
+	if fmt in STREAM_WRITERS:
+		STREAM_WRITERS[fmt](store.iter_frames(chunk_size), path)
+		return
+	df = pd.concat(store.iter_frames(chunk_size), ignore_index=True)
+	writer = DataExporter.to_csv if fmt == 'csv' else DataExporter.to_json
+	with open(path, 'w', encoding='utf-8') as f:
+		f.write(writer(df))
+
+def measure(func):
+	# Time and memory come from separate passes since tracing allocations slows everything down
+	started = time.perf_counter()
+	func()
+	seconds = time.perf_counter() - started
+	tracemalloc.start()
+	func()
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	return seconds, peak
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,250 @@
+from .feed_server import FeedServer
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from websockets.sync.client import connect
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+LEVELS = [1, 2, 4, 8]
+
+def percentile(values, q):
+	return statistics.quantiles(values, n=100, method='inclusive')[q - 1] if len(values) > 1 else values[0]
+
+def resident_bytes(pid):
+	"""Resident set size of a process, or 0 where /proc is unavailable"""
+	try:
+		with open(f'/proc/{pid}/statm') as f:
+			return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+	except (OSError, ValueError, IndexError):
+		return 0
+
+def free_port():
+	with socket.socket() as sock:
+		sock.bind(('127.0.0.1', 0))
+		return sock.getsockname()[1]
+
+# Samples a process's RSS in the background
+class MemorySampler:
+
+	def __init__(self, pid, interval=0.05):
+		self.pid = pid
+		self.interval = interval
+		self.peak = 0
+		self._stop = threading.Event()
+		self._thread = threading.Thread(target=self._run, name='memory-sampler', daemon=True)
+
+	def _run(self):
+		while not self._stop.is_set():
+			self.peak = max(self.peak, resident_bytes(self.pid))
+			self._stop.wait(self.interval)
+
+	def __enter__(self):
+		self._thread.start()
+		return self
+
+	def __exit__(self, *exc_info):
+		self._stop.set()
+		self._thread.join()
+
+# One simulated browser tab, speaking Streamlit's websocket protocol
+class Session:
+	"""Open the app like a browser and rerun it with new widget values
+
+	Widget ids are learned from the elements the server sends. A run ends
+	with the server's script_finished message; the number of elements of
+	each type it rendered is kept to check for results and exceptions.
+	"""
+
+	def __init__(self, connection, timeout):
+		self.connection = connection
+		self.timeout = timeout
+		self.widgets = {}  # (element type, label) -> widget id
+		self.page_script_hash = ''
+		self.elements = {}
+
+	def run(self, widget_states=()):
+		"""Rerun the script with these WidgetState field dicts; returns the seconds until it finished"""
+		message = BackMsg()
+		message.rerun_script.page_script_hash = self.page_script_hash
+		for state in widget_states:
+			message.rerun_script.widget_states.widgets.add(**state)
+		self.elements = {}
+		started = time.perf_counter()
+		self.connection.send(message.SerializeToString())
+		while True:
+			reply = ForwardMsg()
+			reply.ParseFromString(self.connection.recv(timeout=self.timeout))
+			kind = reply.WhichOneof('type')
+			if kind == 'new_session':
+				self.page_script_hash = reply.new_session.page_script_hash
+			elif kind == 'delta' and reply.delta.WhichOneof('type') == 'new_element':
+				self._collect(reply.delta.new_element)
+			elif kind == 'script_finished':
+				return time.perf_counter() - started
+
+	def _collect(self, element):
+		kind = element.WhichOneof('type')
+		self.elements[kind] = self.elements.get(kind, 0) + 1
+		widget = getattr(element, kind)
+		if getattr(widget, 'id', None) and getattr(widget, 'label', None):
+			self.widgets[(kind, widget.label)] = widget.id
+
+	def widget_id(self, kind, label):
+		if (kind, label) not in self.widgets:
+			raise LookupError(f"no {label!r} {kind}")
+		return self.widgets[(kind, label)]
+
+	def analyze(self, query, max_articles):
+		"""Run "Analyze News" for a query; returns the seconds until the results were rendered"""
+		return self.run([
+			{'id': self.widget_id('text_input', "Search Query"), 'string_value': query},
+			{'id': self.widget_id('slider', "Max Articles"), 'double_array_value': {'data': [max_articles]}},
+			{'id': self.widget_id('button', "🚀 Analyze News"), 'trigger_value': True}
+		])
+
+def run_session(url, session, queries, max_articles, timeout):
+	"""One simulated analyst: open the app, then analyze each query; returns (latencies, errors)"""
+	latencies, errors = [], []
+	try:
+		with connect(url, subprotocols=['streamlit'], max_size=None, open_timeout=timeout) as connection:
+			client = Session(connection, timeout)
+			client.run()
+			for query in queries:
+				try:
+					elapsed = client.analyze(query, max_articles)
+				except TimeoutError as e:
+					errors.append(f"session {session}: {e!r}")
+					break
+				if client.elements.get('exception'):
+					errors.append(f"session {session}: exception while analyzing {query!r}")
+				elif not client.elements.get('metric'):
+					errors.append(f"session {session}: no results for {query!r}")
+				else:
+					latencies.append(elapsed)
+	except Exception as e:
+		errors.append(f"session {session}: {e!r}")
+	return latencies, errors
+
+def run_level(url, pid, sessions, rounds, max_articles, timeout, shared_query):
+	"""Run `sessions` concurrent sessions of `rounds` analyses each; returns the level's statistics"""
+	def queries(session):
+		if shared_query:
+			return ["load test"] * rounds
+		return [f"load test {sessions} {session} {i}" for i in range(rounds)]
+
+	rss_before = resident_bytes(pid)
+	with MemorySampler(pid) as memory, ThreadPoolExecutor(max_workers=sessions) as executor:
+		started = time.perf_counter()
+		results = list(executor.map(lambda session: run_session(url, session, queries(session), max_articles, timeout), range(sessions)))
+		wall = time.perf_counter() - started
+
+	latencies = [latency for session_latencies, _ in results for latency in session_latencies]
+	errors = [error for _, session_errors in results for error in session_errors]
+	return {
+		'sessions': sessions,
+		'analyses': len(latencies),
+		'errors': len(errors),
+		'error_samples': errors[:5],
+		'p50_s': percentile(latencies, 50) if latencies else None,
+		'p95_s': percentile(latencies, 95) if latencies else None,
+		'p99_s': percentile(latencies, 99) if latencies else None,
+		'max_s': max(latencies) if latencies else None,
+		'throughput_per_min': 60 * len(latencies) / wall,
+		'wall_s': wall,
+		'rss_before_mb': rss_before / 2 ** 20,
+		'rss_peak_mb': memory.peak / 2 ** 20,
+		'rss_after_mb': resident_bytes(pid) / 2 ** 20
+	}
+
+def start_app(port, env, timeout):
+	"""Start `streamlit run app.py` headless and wait until it is healthy; returns the process"""
+	process = subprocess.Popen(
+		[sys.executable, '-m', 'streamlit', 'run', APP_PATH, '--server.headless', 'true', '--server.port', str(port),
+		 '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false'],
+		env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+	)
+	deadline = time.monotonic() + timeout
+	while time.monotonic() < deadline:
+		if process.poll() is not None:
+			raise RuntimeError(f"streamlit exited with status {process.returncode}")
+		try:
+			with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+				if response.status == 200:
+					return process
+		except OSError:
+			time.sleep(0.2)
+	process.terminate()
+	raise RuntimeError("streamlit did not become healthy in time")
+
+def main():
+	parser = argparse.ArgumentParser(description="Drive concurrent app sessions through \"Analyze News\" against the local feed server")
+	parser.add_argument('--sessions', type=int, nargs='+', default=LEVELS, help="Concurrency levels to run (default: 1 2 4 8)")
+	parser.add_argument('--rounds', type=int, default=3, help="Analyses per session (default: 3)")
+	parser.add_argument('--max-articles', type=int, default=50)
+	parser.add_argument('--items', type=int, default=100, help="Articles per synthetic feed (default: 100)")
+	parser.add_argument('--latency', type=float, default=0.2, help="Feed server latency in seconds (default: 0.2)")
+	parser.add_argument('--jitter', type=float, default=0.1, help="Feed server jitter in seconds (default: 0.1)")
+	parser.add_argument('--shared-query', action='store_true', help="Every session analyzes the same query (cache hits) instead of its own")
+	parser.add_argument('--url', help="Load an app that is already running (e.g. ws://host:8501/_stcore/stream) instead of starting one")
+	parser.add_argument('--timeout', type=float, default=600, help="Seconds one analysis may take (default: 600)")
+	parser.add_argument('--output', help="Also write the results to this JSON file")
+	args = parser.parse_args()
+
+	server = FeedServer(items=args.items, latency=args.latency, jitter=args.jitter).start()
+	workdir = tempfile.TemporaryDirectory(prefix='news_speed_load_')
+	app = pid = None
+	if args.url:
+		url = args.url
+		print(f"Load testing {url}; its memory is not sampled, and its NEWS_SPEED_FEED_URL should be {server.base_url}")
+	else:
+		port = free_port()
+		env = dict(os.environ, NEWS_SPEED_FEED_URL=server.base_url, NEWS_SPEED_STORE=os.path.join(workdir.name, 'articles.sqlite'))
+		app = start_app(port, env, args.timeout)
+		url, pid = f"ws://127.0.0.1:{port}/_stcore/stream", app.pid
+		print(f"Started the app on port {port} (pid {pid}) with feeds from {server.base_url}")
+
+	try:
+		# Load the models and fill the process-wide resources outside the measurements
+		print("Warming up…")
+		_, errors = run_session(url, 0, ["warm up"], args.max_articles, args.timeout)
+		if errors:
+			print("Warm-up failed:", *errors, sep='\n  ')
+			raise SystemExit(1)
+
+		print(f"\n{'sessions':>8} {'analyses':>8} {'errors':>6} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'per min':>8} {'RSS peak MB':>12}")
+		levels = []
+		for sessions in args.sessions:
+			stats = run_level(url, pid, sessions, args.rounds, args.max_articles, args.timeout, args.shared_query)
+			levels.append(stats)
+			latencies = ' '.join(f"{stats[key]:>7.2f}" if stats[key] is not None else f"{'-':>7}" for key in ('p50_s', 'p95_s', 'p99_s'))
+			memory = f"{stats['rss_peak_mb']:>12.0f}" if pid else f"{'-':>12}"
+			print(f"{sessions:>8} {stats['analyses']:>8} {stats['errors']:>6} {latencies} {stats['throughput_per_min']:>8.1f} {memory}")
+			for error in stats['error_samples']:
+				print("  ", error)
+
+		print(f"\nFeed server: {json.dumps(server.stats)}")
+		if args.output:
+			with open(args.output, 'w', encoding='utf-8') as f:
+				json.dump({'timestamp': datetime.now(timezone.utc).isoformat(), 'args': vars(args), 'levels': levels}, f, indent=2)
+			print(f"Saved {args.output}")
+	finally:
+		if app is not None:
+			app.terminate()
+			app.wait()
+		server.shutdown()
+		workdir.cleanup()
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,215 @@
+from news_speed.cache import create_cache_backend, set_cache_backend
+from news_speed.collector import NewsDataCollector
+from news_speed.analyzer import SentimentAnalyzer
+from news_speed.tokens import TokenIndex
+from news_speed.visualizer import DataVisualizer
+from news_speed.exporter import DataExporter
+from news_speed.models import get_model_registry
+from .corpus import render_rss, synthetic_articles
+from .feed_server import FeedServer
+from datetime import datetime, timezone
+from io import BytesIO
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import pandas as pd
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'benchmark_results')
+SIZES = [100, 1_000, 10_000, 100_000]
+
+# Synthetic feeds are written here and removed at exit
+_workdir = tempfile.TemporaryDirectory(prefix='news_speed_bench_')
+
+# Benchmarks by name: (setup(size) -> zero-argument callable, largest size it runs at)
+BENCHMARKS = {}
+
+def benchmark(name, max_size=None):
+	"""Register a setup function returning the callable to time for a corpus size"""
+	def decorator(setup):
+		BENCHMARKS[name] = (setup, max_size)
+		return setup
+	return decorator
+
+def synthetic_feed(size):
+	"""Write a Google News style RSS file with `size` synthetic items; returns its path"""
+	path = os.path.join(_workdir.name, f"synthetic_{size}.xml")
+	if not os.path.exists(path):
+		with open(path, 'w', encoding='utf-8') as f:
+			f.write(render_rss(synthetic_articles(size)))
+	return path
+
+def titles_for(size):
+	return [article['title'] for article in synthetic_articles(size)]
+
+@benchmark('scrape_rss_feed')
+def bench_scrape(size):
+	path = synthetic_feed(size)
+	collector = NewsDataCollector()
+	return lambda: collector.scrape_rss_feed(path, max_articles=size)
+
+@benchmark('fetch_concurrent', max_size=10_000)
+def bench_fetch(size):
+	# Eight feeds of `size` items from the local stand-in server, 50 ms ± 20 ms per response
+	server = FeedServer(items=size, latency=0.05, jitter=0.02, conditional=False).start()
+	collector = NewsDataCollector(base_url=server.base_url)
+	jobs = [(f"query {i}", 'US', None, size) for i in range(8)]
+	return lambda: collector.collect_many(jobs)
+
+@benchmark('sentiment_vader')
+def bench_vader(size):
+	analyzer = SentimentAnalyzer()
+	titles = titles_for(size)
+	return lambda: [analyzer.get_vader_sentiment_label(analyzer.vader.polarity_scores(title)['compound']) for title in titles]
+
+@benchmark('sentiment_hf', max_size=1_000)
+def bench_hf(size):
+	if get_model_registry().get('sentiment') is None:
+		return None
+	analyzer = SentimentAnalyzer()
+	titles = titles_for(size)
+	return lambda: [analyzer.analyze_batch(tuple(titles[start:start + 16])) for start in range(0, len(titles), 16)]
+
+@benchmark('keyword_analysis')
+def bench_keywords(size):
+	titles = titles_for(size)
+	return lambda: TokenIndex(titles).most_common(20)
+
+@benchmark('wordcloud')
+def bench_wordcloud(size):
+	visualizer = DataVisualizer()
+	titles = titles_for(size)
+	return lambda: visualizer.create_wordcloud(titles, exclude_words=set())
+
+@benchmark('export_csv')
+def bench_csv(size):
+	df = pd.DataFrame(synthetic_articles(size))
+	return lambda: DataExporter.to_csv(df)
+
+@benchmark('export_parquet')
+def bench_parquet(size):
+	df = pd.DataFrame(synthetic_articles(size))
+	return lambda: DataExporter.to_parquet(df)
+
+@benchmark('export_ndjson_gz')
+def bench_ndjson(size):
+	df = pd.DataFrame(synthetic_articles(size))
+	return lambda: DataExporter.write_ndjson_gz(DataExporter.iter_chunks(df), BytesIO())
+
+def recorded_benchmarks():
+	"""scrape_rss_feed on every recorded fixture, keyed by fixture name"""
+	collector = NewsDataCollector()
+	return {
+		os.path.splitext(os.path.basename(path))[0]: (lambda path=path: collector.scrape_rss_feed(path, max_articles=100))
+		for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.xml')))
+	}
+
+def measure(func, min_repeats=3, max_repeats=20, budget=1.0):
+	"""Time a callable several times (fewer when slow); returns seconds per run"""
+	times = []
+	while len(times) < max_repeats:
+		started = time.perf_counter()
+		func()
+		times.append(time.perf_counter() - started)
+		if len(times) >= min_repeats and sum(times) >= budget:
+			break
+		if times[0] > budget:
+			break
+	return {'min': min(times), 'median': statistics.median(times), 'repeats': len(times)}
+
+def record(query, name=None):
+	"""Save a live Google News feed as a fixture for later runs"""
+	collector = NewsDataCollector()
+	response = collector.session.get(collector.get_google_news_url(query), timeout=30)
+	response.raise_for_status()
+	path = os.path.join(FIXTURES_DIR, f"google_news_{name or query.lower().replace(' ', '_')}.xml")
+	with open(path, 'wb') as f:
+		f.write(response.content)
+	print(f"Recorded {path}")
+
+def compare(results, baseline_path, threshold):
+	"""Print the change of every benchmark against a baseline file; returns the number of regressions"""
+	with open(baseline_path, encoding='utf-8') as f:
+		baseline = json.load(f)['results']
+	regressions = 0
+	print(f"\nCompared with {baseline_path} (regression: > {threshold:.2f}x slower)")
+	for name, by_size in results.items():
+		for size, stats in by_size.items():
+			before = baseline.get(name, {}).get(size)
+			if not before or not stats:
+				continue
+			ratio = stats['min'] / before['min']
+			flag = "REGRESSION" if ratio > threshold else ("faster" if ratio < 1 / threshold else "")
+			regressions += flag == "REGRESSION"
+			print(f"{name:<20} {size:>8} {before['min'] * 1000:>10.2f} ms -> {stats['min'] * 1000:>10.2f} ms  {ratio:5.2f}x {flag}")
+	return regressions
+
+def git_commit():
+	try:
+		return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return 'unknown'
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark the NewsSpeed stages on recorded feeds and synthetic corpora")
+	parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+	parser.add_argument('--bench', nargs='+', choices=list(BENCHMARKS) + ['recorded'], help="Benchmarks to run (default: all)")
+	parser.add_argument('--output', help=f"Results file (default: {RESULTS_DIR}/<commit>-<timestamp>.json)")
+	parser.add_argument('--compare', metavar='BASELINE', help="Results file to compare against")
+	parser.add_argument('--threshold', type=float, default=1.2, help="Slowdown ratio reported as a regression (default: 1.2)")
+	parser.add_argument('--record', metavar='QUERY', help="Save the live feed for QUERY as a fixture and exit")
+	args = parser.parse_args()
+
+	if args.record:
+		record(args.record)
+		return
+
+	# Measure the work itself, not cache lookups
+	set_cache_backend(create_cache_backend('none'))
+	selected = args.bench or list(BENCHMARKS) + ['recorded']
+	results = {}
+
+	for name in selected:
+		if name == 'recorded':
+			continue
+		setup, max_size = BENCHMARKS[name]
+		results[name] = {}
+		for size in args.sizes:
+			if max_size and size > max_size:
+				continue
+			func = setup(size)
+			if func is None:
+				print(f"{name:<20} {size:>8}  skipped (not available)")
+				continue
+			stats = results[name][str(size)] = measure(func)
+			print(f"{name:<20} {size:>8} {stats['min'] * 1000:>10.2f} ms (median {stats['median'] * 1000:.2f} ms, {stats['repeats']} runs)")
+
+	if 'recorded' in selected:
+		results['scrape_recorded'] = {}
+		for fixture, func in recorded_benchmarks().items():
+			stats = results['scrape_recorded'][fixture] = measure(func)
+			print(f"{'scrape_recorded':<20} {fixture} {stats['min'] * 1000:.2f} ms")
+
+	output = args.output or os.path.join(RESULTS_DIR, f"{git_commit()}-{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+	os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+	with open(output, 'w', encoding='utf-8') as f:
+		json.dump({
+			'commit': git_commit(),
+			'timestamp': datetime.now(timezone.utc).isoformat(),
+			'python': platform.python_version(),
+			'platform': platform.platform(),
+			'results': results
+		}, f, indent=2)
+	print(f"\nSaved {output}")
+
+	if args.compare and compare(results, args.compare, args.threshold):
+		raise SystemExit(1)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,2 @@
+# test_1.py is an interactive script (python -m tests.test_1), not a unit test
+collect_ignore = ['test_1.py']
@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+import random
+
+WORDS = ("market stocks rally fall bank rates inflation earnings tech energy oil growth jobs trade deal court "
+		 "election storm president senate vote climate ai chip startup funding merger lawsuit strike union "
+		 "housing prices crypto bitcoin football final coach record film award music tour album").split()
+SOURCES = ["Reuters", "AP News", "BBC", "Bloomberg", "CNBC", "The Guardian", "Financial Times", "Al Jazeera"]
+
+def synthetic_articles(size, seed=0):
+	"""Deterministic headlines with a skewed (Zipf-like) word distribution"""
+	rng = random.Random(seed)
+	weights = [1 / rank for rank in range(1, len(WORDS) + 1)]
+	start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+	return [
+		{
+			'title': ' '.join(rng.choices(WORDS, weights, k=rng.randint(6, 12))).capitalize(),
+			'link': f"https://news.example.com/articles/{seed}/{i}",
+			'published': format_datetime(start + timedelta(minutes=7 * i)),
+			'summary': ' '.join(rng.choices(WORDS, weights, k=25)),
+			'source': rng.choice(SOURCES)
+		}
+		for i in range(size)
+	]
+
+def render_rss(articles, title='synthetic'):
+	"""Google News style RSS document for a list of article dicts"""
+	items = ''.join(
+		f"<item><title>{escape(article['title'])} - {escape(article['source'])}</title><link>{escape(article['link'])}</link>"
+		f"<guid isPermaLink=\"false\">{escape(article['link'])}</guid><pubDate>{article['published']}</pubDate>"
+		f"<description>{escape(article['summary'])}</description>"
+		f"<source url=\"https://example.com\">{escape(article['source'])}</source></item>"
+		for article in articles
+	)
+	return f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>{escape(title)}</title>{items}</channel></rss>'
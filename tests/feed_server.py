@@ -0,0 +1,164 @@
+from .corpus import render_rss, synthetic_articles
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# Local stand-in for news.google.com/rss
+class FeedServer(ThreadingHTTPServer):
+	"""Serve recorded or synthetic feeds at the Google News RSS URL shapes
+
+	/rss/search?q=..., /rss/headlines/section/topic/<TOPIC> and /rss (top
+	stories) return the recorded fixture named google_news_<query>.xml when
+	there is one, else a synthetic feed of `items` articles seeded by the
+	URL, so every URL always returns the same document. Each response is
+	delayed by `latency` ± `jitter` seconds, fails with a 503 at
+	`error_rate`, and carries an ETag and Last-Modified so conditional
+	requests get 304s (unless `conditional` is off).
+	"""
+
+	daemon_threads = True
+
+	def __init__(self, host='127.0.0.1', port=0, items=50, latency=0.0, jitter=0.0, error_rate=0.0,
+				 conditional=True, fixtures_dir=FIXTURES_DIR, seed=0):
+		super().__init__((host, port), _FeedHandler)
+		self.items = items
+		self.latency = latency
+		self.jitter = jitter
+		self.error_rate = error_rate
+		self.conditional = conditional
+		self.fixtures = {
+			os.path.basename(path)[len('google_news_'):-len('.xml')]: path
+			for path in glob.glob(os.path.join(fixtures_dir, 'google_news_*.xml'))
+		}
+		self.last_modified = formatdate(time.time(), usegmt=True)
+		self.stats = {'requests': 0, 'ok': 0, 'not_modified': 0, 'errors': 0, 'not_found': 0}
+		self._rng = random.Random(seed)
+		self._lock = threading.Lock()
+		self._feeds = {}
+
+	@property
+	def base_url(self):
+		"""Pass this to NewsDataCollector(base_url=...) or NEWS_SPEED_FEED_URL"""
+		host, port = self.server_address[:2]
+		return f"http://{host}:{port}/rss"
+
+	def feed(self, key, query):
+		"""Body and ETag of the feed for a URL, built once"""
+		with self._lock:
+			if key not in self._feeds:
+				slug = re.sub(r'\W+', '_', (query or '').lower()).strip('_')
+				if slug in self.fixtures:
+					with open(self.fixtures[slug], 'rb') as f:
+						body = f.read()
+				else:
+					articles = synthetic_articles(self.items, seed=zlib.crc32(key.encode()))
+					body = render_rss(articles, title=query or key).encode('utf-8')
+				self._feeds[key] = (body, '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"')
+			return self._feeds[key]
+
+	def draw(self):
+		"""(delay, fail) for one request from the seeded generator"""
+		with self._lock:
+			delay = max(self.latency + self._rng.uniform(-self.jitter, self.jitter), 0)
+			return delay, self._rng.random() < self.error_rate
+
+	def count(self, outcome):
+		with self._lock:
+			self.stats['requests'] += 1
+			self.stats[outcome] += 1
+
+	def start(self):
+		"""Serve from a daemon thread; returns self"""
+		threading.Thread(target=self.serve_forever, name='feed-server', daemon=True).start()
+		return self
+
+# Handles one feed request
+class _FeedHandler(BaseHTTPRequestHandler):
+
+	protocol_version = 'HTTP/1.1'
+
+	def do_GET(self):
+		server = self.server
+		url = urlsplit(self.path)
+		if url.path == '/__stats':
+			self._send(200, json.dumps(server.stats).encode(), 'application/json')
+			return
+
+		params = parse_qs(url.query)
+		topic = re.fullmatch(r'/rss/headlines/section/topic/(\w+)', url.path)
+		if url.path == '/rss/search' and params.get('q'):
+			query = params['q'][0]
+		elif topic:
+			query = topic.group(1)
+		elif url.path in ('/rss', '/rss/'):
+			query = None
+		else:
+			server.count('not_found')
+			self._send(404, b'Not found', 'text/plain')
+			return
+
+		delay, fail = server.draw()
+		time.sleep(delay)
+		if fail:
+			server.count('errors')
+			self._send(503, b'Service unavailable', 'text/plain')
+			return
+
+		body, etag = server.feed(self.path, query)
+		if server.conditional and (
+			self.headers.get('If-None-Match') == etag or self.headers.get('If-Modified-Since') == server.last_modified
+		):
+			server.count('not_modified')
+			self._send(304, b'', None, {'ETag': etag, 'Last-Modified': server.last_modified})
+			return
+		server.count('ok')
+		self._send(200, body, 'application/rss+xml; charset=utf-8', {'ETag': etag, 'Last-Modified': server.last_modified})
+
+	def _send(self, status, body, content_type, headers=None):
+		self.send_response(status)
+		if content_type:
+			self.send_header('Content-Type', content_type)
+		for name, value in (headers or {}).items():
+			self.send_header(name, value)
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass
+
+def main():
+	parser = argparse.ArgumentParser(description="Local stand-in for the Google News RSS endpoints")
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=8765)
+	parser.add_argument('--items', type=int, default=50, help="Articles per synthetic feed (default: 50)")
+	parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+	parser.add_argument('--jitter', type=float, default=0.0, help="Random ± seconds around the latency")
+	parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with a 503")
+	parser.add_argument('--no-304', action='store_true', help="Ignore conditional request headers")
+	parser.add_argument('--seed', type=int, default=0)
+	args = parser.parse_args()
+
+	server = FeedServer(args.host, args.port, args.items, args.latency, args.jitter, args.error_rate,
+						conditional=not args.no_304, seed=args.seed)
+	print(f"Serving feeds at {server.base_url} (fixtures: {', '.join(sorted(server.fixtures)) or 'none'})")
+	print(f"Run the app against it with NEWS_SPEED_FEED_URL={server.base_url}; stats at /__stats. Ctrl + C to stop")
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		print("\nStopped:", json.dumps(server.stats))
+
+if __name__ == "__main__":
+	main()
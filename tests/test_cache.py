@@ -0,0 +1,140 @@
+import sqlite3
+import pytest
+from news_speed import cache
+from news_speed.cache import (
+	MemoryCache, NullCache, cache_stats, configure_namespace, create_cache_backend,
+	get_cache_backend, memoize, set_cache_backend
+)
+
+@pytest.fixture
+def clock(monkeypatch):
+	now = [1_000_000.0]
+	monkeypatch.setattr(cache.time, 'time', lambda: now[0])
+	return now
+
+@pytest.fixture(params=['memory', 'disk', 'sqlite'])
+def backend(request, tmp_path):
+	path = {'memory': None, 'disk': str(tmp_path / 'disk'), 'sqlite': str(tmp_path / 'cache.sqlite')}[request.param]
+	return create_cache_backend(request.param, path)
+
+@pytest.fixture
+def active(backend):
+	previous = get_cache_backend()
+	set_cache_backend(backend)
+	yield backend
+	set_cache_backend(previous)
+
+def test_get_set_and_stats(backend):
+	assert backend.get('ns', 'a') is None
+	backend.set('ns', 'a', b'value')
+	assert backend.get('ns', 'a') == b'value'
+	stats = backend.stats()['ns']
+	assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+	assert stats['hit_rate'] == 0.5 and stats['bytes'] >= len(b'value')
+
+def test_ttl_expires_entries(backend, clock):
+	backend.set('ns', 'a', b'value', ttl=10)
+	clock[0] += 5
+	assert backend.get('ns', 'a') == b'value'
+	clock[0] += 10
+	assert backend.get('ns', 'a') is None
+	assert backend.stats()['ns']['expirations'] == 1
+
+def test_least_recently_used_entries_are_evicted(backend, clock):
+	for key in 'abc':
+		clock[0] += 1
+		backend.set('ns', key, b'x', max_entries=3)
+	clock[0] += 1
+	backend.get('ns', 'a')  # a is now the most recently used
+	clock[0] += 1
+	backend.set('ns', 'd', b'x', max_entries=3)
+	assert backend.get('ns', 'b') is None
+	assert all(backend.get('ns', key) == b'x' for key in 'acd')
+	assert backend.stats()['ns']['evictions'] == 1
+
+def test_byte_limit_evicts_and_rejects_oversized_values(backend, clock):
+	backend.set('ns', 'a', b'x' * 40, max_bytes=100)
+	clock[0] += 1
+	backend.set('ns', 'b', b'x' * 40, max_bytes=100)
+	clock[0] += 1
+	backend.set('ns', 'c', b'x' * 40, max_bytes=100)
+	assert backend.get('ns', 'a') is None and backend.get('ns', 'c') is not None
+	backend.set('ns', 'huge', b'x' * 200, max_bytes=100)
+	assert backend.get('ns', 'huge') is None
+
+def test_clear_one_namespace(backend):
+	backend.set('one', 'a', b'1')
+	backend.set('two', 'a', b'2')
+	backend.clear('one')
+	assert backend.get('one', 'a') is None and backend.get('two', 'a') == b'2'
+
+def test_memoize_caches_by_arguments(active):
+	calls = []
+
+	@memoize('test_memoize')
+	def square(x, _ignored=None):
+		calls.append(x)
+		return [x * x]
+
+	assert square(3) == [9]
+	assert square(3, _ignored=object()) == [9]
+	assert square(4) == [16]
+	assert calls == [3, 4]
+	# Every hit is a fresh copy
+	square(3).append('mutated')
+	assert square(3) == [9]
+	assert cache_stats()['test_memoize']['entries'] == 2
+
+def test_memoize_follows_the_active_backend(active):
+	calls = []
+
+	@memoize('test_switch')
+	def identity(x):
+		calls.append(x)
+		return x
+
+	identity(1)
+	set_cache_backend(NullCache())
+	identity(1)
+	identity(1)
+	set_cache_backend(active)
+	identity(1)
+	assert calls == [1, 1, 1]
+
+def test_namespace_limits_apply_to_memoize(active):
+	configure_namespace('test_limits', max_entries=2)
+
+	@memoize('test_limits', max_entries=100)
+	def identity(x):
+		return x
+
+	for x in range(5):
+		identity(x)
+	assert cache_stats()['test_limits']['entries'] == 2
+
+# Backend whose storage is unavailable
+class BrokenCache(MemoryCache):
+
+	def __init__(self, error):
+		super().__init__()
+		self.error = error
+
+	def get(self, namespace, key):
+		raise self.error
+
+	def set(self, namespace, key, value, ttl=None, max_entries=None, max_bytes=None):
+		raise self.error
+
+@pytest.mark.parametrize('error', [sqlite3.OperationalError('database is locked'), OSError(28, 'No space left on device')])
+def test_backend_errors_fall_through_to_computing(error):
+	previous = get_cache_backend()
+	set_cache_backend(BrokenCache(error))
+	try:
+		@memoize('test_broken')
+		def double(x):
+			return 2 * x
+
+		assert double(21) == 42
+		assert double(21) == 42
+	finally:
+		set_cache_backend(previous)
@@ -0,0 +1,59 @@
+import pytest
+from news_speed.cache import create_cache_backend, get_cache_backend, set_cache_backend
+from news_speed.collector import NewsDataCollector
+from tests.feed_server import FeedServer
+
+@pytest.fixture(autouse=True)
+def no_feed_cache():
+	"""Without the feeds cache every scrape reaches the server"""
+	previous = get_cache_backend()
+	set_cache_backend(create_cache_backend('none'))
+	yield
+	set_cache_backend(previous)
+
+@pytest.fixture
+def server():
+	server = FeedServer(port=0, items=10).start()
+	yield server
+	server.shutdown()
+	server.server_close()
+
+def test_revalidation_reuses_the_stored_body(server):
+	collector = NewsDataCollector(base_url=server.base_url)
+	url = collector.get_google_news_url("climate")
+	first = collector.scrape_rss_feed(url, max_articles=10)
+	assert len(first) == 10
+	assert collector._validators[url][0] is not None
+
+	# The second request carries the ETag and gets a 304; the articles come from the stored body
+	second = collector.scrape_rss_feed(url, max_articles=10)
+	assert second == first
+	assert (server.stats['ok'], server.stats['not_modified']) == (1, 1)
+
+def test_server_errors_yield_no_articles(server):
+	collector = NewsDataCollector(base_url=server.base_url)
+	url = collector.get_google_news_url("climate")
+	assert collector.scrape_rss_feed(url) != []
+	server.error_rate = 1.0
+	assert collector.scrape_rss_feed(url) == []
+	assert server.stats['errors'] == 1
+
+def test_servers_without_validators_get_plain_requests(server):
+	server.conditional = False
+	collector = NewsDataCollector(base_url=server.base_url)
+	url = collector.get_google_news_url("climate")
+	assert collector.scrape_rss_feed(url) == collector.scrape_rss_feed(url)
+	assert (server.stats['ok'], server.stats['not_modified']) == (2, 0)
+
+def test_validators_are_evicted_least_recently_used_first(server):
+	collector = NewsDataCollector(base_url=server.base_url, max_validators=2)
+	urls = [collector.get_google_news_url(query) for query in ("one", "two", "three")]
+	collector.scrape_rss_feed(urls[0])
+	collector.scrape_rss_feed(urls[1])
+	collector.scrape_rss_feed(urls[0])  # 304; "one" is now the most recently used
+	collector.scrape_rss_feed(urls[2])
+	assert list(collector._validators) == [urls[0], urls[2]]
+
+	# "two" was evicted, so it is fetched in full again
+	collector.scrape_rss_feed(urls[1])
+	assert (server.stats['ok'], server.stats['not_modified']) == (4, 1)
@@ -0,0 +1,160 @@
+import json
+import os
+import sqlite3
+import threading
+import pandas as pd
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import pytest
+from news_speed.exporter import IncrementalExporter, STREAM_WRITERS
+from news_speed.store import ArticleStore
+
+def article(i, sentiment_label=None):
+	return {'title': f"Headline {i}", 'link': f"https://example.com/{i}", 'sentiment_label': sentiment_label}
+
+def read_delta(path):
+	return pd.read_json(path, lines=True, compression='gzip')
+
+@pytest.fixture
+def store(tmp_path):
+	store = ArticleStore(str(tmp_path / 'articles.sqlite'))
+	yield store
+	store.close()
+
+@pytest.fixture
+def exporter(store, tmp_path):
+	return IncrementalExporter(store, str(tmp_path / 'out'))
+
+def test_watermark_advances_past_exported_rows(store, exporter):
+	store.add_articles([article(i) for i in range(3)], now=100.0)
+	first = exporter.export('bi')
+	assert os.path.basename(first) == 'bi-000001.ndjson.gz'
+	assert len(read_delta(first)) == 3
+	watermark = exporter.watermark('bi')
+	assert (watermark['sequence'], watermark['rows'], watermark['revision']) == (1, 3, 1)
+
+	store.add_articles([article(i) for i in range(3, 5)], now=200.0)
+	second = exporter.export('bi')
+	assert os.path.basename(second) == 'bi-000002.ndjson.gz'
+	assert sorted(read_delta(second)['title']) == ["Headline 3", "Headline 4"]
+
+def test_nothing_new_writes_no_file(store, exporter, tmp_path):
+	assert exporter.export('bi') is None
+	store.add_articles([article(1)], now=100.0)
+	exporter.export('bi')
+	assert exporter.export('bi') is None
+	assert sorted(os.listdir(tmp_path / 'out')) == ['.watermarks', 'bi-000001.ndjson.gz']
+
+def test_consumers_have_separate_watermarks(store, exporter):
+	store.add_articles([article(1)], now=100.0)
+	exporter.export('one')
+	store.add_articles([article(2)], now=200.0)
+	assert len(read_delta(exporter.export('one'))) == 1
+	assert len(read_delta(exporter.export('two'))) == 2
+	exporter.reset('one')
+	assert len(read_delta(exporter.export('one'))) == 2
+
+def test_writes_stamped_earlier_are_not_skipped(store, exporter):
+	# A batch whose timestamp is older than rows exported before it, e.g. one that waited for the write lock
+	store.add_articles([article(1)], now=100.0)
+	exporter.export('bi')
+	store.add_articles([article(2)], now=50.0)
+	assert list(read_delta(exporter.export('bi'))['title']) == ["Headline 2"]
+
+def test_revisions_count_writes(store):
+	store.add_articles([article(1), article(2)])
+	store.add_articles([article(3)])
+	frame = next(store.iter_frames(order='revision'))
+	assert list(frame['revision']) == [1, 1, 2]
+
+def test_filled_in_sentiment_is_exported_again(store, exporter):
+	store.add_articles([article(1), article(2)], now=100.0)
+	exporter.export('bi')
+
+	# Same article again: a label fill-in is an update, a repeat is not
+	store.add_articles([article(1, 'positive'), article(2)], now=200.0)
+	delta = read_delta(exporter.export('bi'))
+	assert list(delta['title']) == ["Headline 1"]
+	assert list(delta['sentiment_label']) == ['positive']
+	assert list(delta['ingested_at']) == [100.0]
+
+	# A label is only filled in once
+	store.add_articles([article(1, 'negative')], now=300.0)
+	assert exporter.export('bi') is None
+
+def test_ingestion_time_watermarks_still_resume(store, exporter):
+	store.add_articles([article(1)], now=100.0)
+	store.add_articles([article(2)], now=200.0)
+	first = next(store.iter_frames()).iloc[0]
+	with open(exporter._watermark_path('bi'), 'w', encoding='utf-8') as f:
+		json.dump({'ingested_at': 100.0, 'link_hash': first['link_hash'], 'sequence': 1}, f)
+	delta = exporter.export('bi')
+	assert os.path.basename(delta) == 'bi-000002.ndjson.gz'
+	assert list(read_delta(delta)['title']) == ["Headline 2"]
+
+def create_old_store(path, rows=1):
+	"""A store as created before updates and revisions were tracked"""
+	with sqlite3.connect(path) as connection:
+		connection.execute(
+			"CREATE TABLE articles (link_hash TEXT PRIMARY KEY, query TEXT, title TEXT, link TEXT, published TEXT, "
+			"summary TEXT, source TEXT, sentiment_label TEXT, ingested_at REAL NOT NULL)"
+		)
+		connection.executemany(
+			"INSERT INTO articles VALUES (?, NULL, ?, NULL, NULL, NULL, NULL, NULL, ?)",
+			[(f"h{i}", f"Old {i}", 50.0 - i) for i in range(rows)]
+		)
+	connection.close()
+
+def test_old_stores_are_migrated(tmp_path):
+	path = str(tmp_path / 'old.sqlite')
+	create_old_store(path, rows=2)
+	store = ArticleStore(path)
+	try:
+		frame = next(store.iter_frames(order='revision'))
+		assert list(frame['title']) == ["Old 1", "Old 0"]
+		assert list(frame['updated_at']) == [49.0, 50.0]
+		assert list(frame['revision']) == [1, 2]
+	finally:
+		store.close()
+
+def test_concurrent_opens_migrate_once(tmp_path):
+	path = str(tmp_path / 'old.sqlite')
+	create_old_store(path)
+	barrier = threading.Barrier(4)
+	errors = []
+
+	def open_store():
+		barrier.wait()
+		try:
+			ArticleStore(path).close()
+		except Exception as e:
+			errors.append(e)
+
+	threads = [threading.Thread(target=open_store) for _ in range(4)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	assert errors == []
+
+def test_consumer_names_are_checked(exporter):
+	with pytest.raises(ValueError):
+		exporter.export('../escape')
+
+@pytest.mark.parametrize('fmt', list(STREAM_WRITERS))
+def test_empty_store_exports_an_empty_file_with_the_columns(store, tmp_path, fmt):
+	path = str(tmp_path / f"articles.{fmt}")
+	assert STREAM_WRITERS[fmt](store.iter_frames(), path) == 0
+	assert os.path.exists(path)
+	if fmt == 'parquet':
+		assert pq.read_schema(path).names == list(next(store.iter_frames()).columns)
+	elif fmt == 'feather':
+		assert feather.read_table(path).num_rows == 0
+	elif fmt == 'csv.gz':
+		assert list(pd.read_csv(path).columns) == list(next(store.iter_frames()).columns)
+
+def test_chunked_exports_match_the_store(store, tmp_path):
+	store.add_articles([article(i) for i in range(5)], now=100.0)
+	path = str(tmp_path / 'articles.csv.gz')
+	assert STREAM_WRITERS['csv.gz'](store.iter_frames(chunk_size=2), path) == 5
+	assert sorted(pd.read_csv(path)['title']) == [f"Headline {i}" for i in range(5)]
@@ -0,0 +1,50 @@
+import pytest
+from news_speed.matcher import KeywordFilter, KeywordMatcher
+
+def passing(expression, titles, whole_words=True):
+	return [title for title, ok in zip(titles, KeywordFilter(expression, whole_words).mask(titles)) if ok]
+
+def test_plain_terms_are_or():
+	titles = ["Bitcoin hits record", "Ethereum upgrade ships", "Stocks fall"]
+	assert passing('bitcoin, ethereum', titles) == titles[:2]
+
+def test_plus_terms_are_and():
+	titles = ["Apple and Google settle", "Apple earnings beat", "Google antitrust case"]
+	assert passing('+apple, +google', titles) == titles[:1]
+	assert passing('earnings, +apple', titles) == ["Apple earnings beat"]
+
+def test_minus_terms_are_not():
+	titles = ["Election results", "Election polls open", "Weather update"]
+	assert passing('election, -polls', titles) == ["Election results"]
+	assert passing('-weather', titles) == titles[:2]
+
+def test_empty_expression_passes_everything():
+	keyword_filter = KeywordFilter(' , +, -')
+	assert not keyword_filter
+	assert keyword_filter.mask(["anything"]).tolist() == [True]
+
+def test_phrases_match_across_punctuation_and_spacing():
+	titles = ["New York: city budget", "new   york", "New-York", "York, New"]
+	assert passing('new york', titles) == titles[:3]
+
+def test_whole_words_versus_substrings():
+	titles = ["Rain in Spain", "Training day", "AI act passes", "Said the chair"]
+	assert passing('rain, ai', titles) == ["Rain in Spain", "AI act passes"]
+	assert passing('rain, ai', titles, whole_words=False) == titles
+
+@pytest.mark.parametrize('expression, titles, expected', [
+	('c++', ["I love c programming", "java c", "C++ rocks", "abc++ x", "Why (c++)?"], ["C++ rocks", "Why (c++)?"]),
+	('google+', ["google results", "Google+ shuts down"], ["Google+ shuts down"]),
+	('c#', ["C# 12 released", "c sharp", "abc# x"], ["C# 12 released"]),
+	('node.js', ["Node.js 22 is out", "node js", "nodes.jsx"], ["Node.js 22 is out"]),
+	('???', ["What???", "No questions"], ["What???"]),
+	('+???', ["What???", "No questions"], ["What???"]),
+	('ai, -c++', ["AI in C++", "AI in C"], ["AI in C"])
+])
+def test_terms_with_symbols_match_literally(expression, titles, expected):
+	assert passing(expression, titles) == expected
+
+def test_matcher_reports_every_pattern_per_text():
+	matcher = KeywordMatcher(['he', 'she', 'his', 'hers', 'c++'], whole_words=False)
+	assert list(matcher.scan(["ushers", "c++ and his", ""])) == [{0, 1, 3}, {2, 4}, set()]
+	assert list(matcher.scan([])) == []
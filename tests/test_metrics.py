@@ -0,0 +1,103 @@
+import os
+import urllib.error
+import urllib.request
+import pytest
+from news_speed import metrics
+
+@pytest.fixture(autouse=True)
+def recording():
+	previous = metrics.enabled()
+	metrics.enable()
+	metrics.reset()
+	yield
+	metrics.enable(previous)
+	metrics.reset()
+
+def sample_lines(text, prefix):
+	return [line for line in text.splitlines() if line.startswith(prefix)]
+
+def test_histogram_buckets_are_cumulative():
+	for seconds in (0.003, 0.03, 0.3, 100):
+		metrics.observe('fetch', seconds)
+	text = metrics.prometheus_text()
+	buckets = {
+		line.split('le="')[1].split('"')[0]: int(line.rsplit(' ', 1)[1])
+		for line in sample_lines(text, 'news_speed_stage_seconds_bucket{stage="fetch"')
+	}
+	assert list(buckets) == [str(bound) for bound in metrics.DURATION_BUCKETS] + ['+Inf']
+	assert (buckets['0.005'], buckets['0.01'], buckets['0.05'], buckets['0.5'], buckets['60']) == (1, 1, 2, 3, 3)
+	assert buckets['+Inf'] == 4
+	assert 'news_speed_stage_seconds_count{stage="fetch"} 4' in text
+	assert sample_lines(text, 'news_speed_stage_seconds_sum{stage="fetch"}')[0].endswith(str(0.003 + 0.03 + 0.3 + 100))
+	assert "# TYPE news_speed_stage_seconds histogram" in text
+
+def test_counters_are_exposed_with_a_total_suffix():
+	metrics.count('feed_requests', 2, status='ok')
+	metrics.count('feed_requests', status='ok')
+	metrics.observe('sentiment', 0.01, items=32, backend='vader')
+	text = metrics.prometheus_text()
+	assert "# TYPE news_speed_feed_requests_total counter" in text
+	assert 'news_speed_feed_requests_total{status="ok"} 3' in text
+	assert 'news_speed_stage_items_total{backend="vader",stage="sentiment"} 32' in text
+
+def test_label_values_are_escaped():
+	metrics.count('odd', path='a"b\\c\nd')
+	assert 'news_speed_odd_total{path="a\\"b\\\\c\\nd"} 1' in metrics.prometheus_text()
+
+def test_failed_blocks_are_counted_not_timed():
+	with pytest.raises(ValueError):
+		with metrics.timer('parse'):
+			raise ValueError("bad feed")
+	text = metrics.prometheus_text()
+	assert 'news_speed_stage_errors_total{stage="parse"} 1' in text
+	assert not sample_lines(text, 'news_speed_stage_seconds_count{stage="parse"}')
+
+def test_nothing_is_recorded_while_disabled(tmp_path):
+	metrics.enable(False)
+	metrics.count('feed_requests')
+	metrics.observe('fetch', 0.1)
+	assert metrics.timer('fetch') is metrics.timer('other')
+	with metrics.timer('fetch'):
+		pass
+
+	@metrics.timed('decorated')
+	def work():
+		return 42
+
+	assert work() == 42
+	assert metrics.snapshot() == ([], [])
+	assert metrics.write_prometheus(str(tmp_path / 'metrics.prom')) is None
+	assert not os.listdir(tmp_path)
+
+def test_write_prometheus_replaces_the_file_atomically(tmp_path, monkeypatch):
+	path = str(tmp_path / 'out' / 'metrics.prom')
+	metrics.count('feed_requests')
+	assert metrics.write_prometheus(path) == path
+	with open(path, encoding='utf-8') as f:
+		written = f.read()
+	assert written == metrics.prometheus_text()
+
+	# A failed write leaves the previous file in place and no temporary file behind
+	def broken():
+		raise RuntimeError("render failed")
+
+	monkeypatch.setattr(metrics, 'prometheus_text', broken)
+	with pytest.raises(RuntimeError):
+		metrics.write_prometheus(path)
+	with open(path, encoding='utf-8') as f:
+		assert f.read() == written
+	assert os.listdir(tmp_path / 'out') == ['metrics.prom']
+
+def test_metrics_endpoint():
+	metrics.count('feed_requests')
+	server = metrics.serve(port=0)
+	try:
+		base = f"http://127.0.0.1:{server.server_port}"
+		with urllib.request.urlopen(base + '/metrics', timeout=5) as response:
+			assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+			assert b'news_speed_feed_requests_total 1' in response.read()
+		with pytest.raises(urllib.error.HTTPError):
+			urllib.request.urlopen(base + '/other', timeout=5)
+	finally:
+		server.shutdown()
+		server.server_close()
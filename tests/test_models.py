@@ -0,0 +1,230 @@
+import glob
+import os
+import threading
+import time
+import pytest
+from news_speed import models
+from news_speed.models import ModelRegistry, _exclusive_lock, export_safetensors, mmap_model, mmap_state_dict
+
+# Tensor stand-in with a fixed size in bytes
+class FakeTensor:
+
+	def __init__(self, size):
+		self.size = size
+
+	def numel(self):
+		return self.size
+
+	def element_size(self):
+		return 1
+
+# Model stand-in whose weights take `size` bytes
+class FakeModel:
+
+	def __init__(self, name, size):
+		self.name = name
+		self.size = size
+
+	def parameters(self):
+		return [FakeTensor(self.size)]
+
+	def buffers(self):
+		return []
+
+@pytest.fixture
+def loaders(monkeypatch):
+	"""Register fake models by name and size; returns the list of names loaded, in order"""
+	calls = []
+
+	def register(name, size=100, fail_times=0):
+		failures = [fail_times]
+
+		def load():
+			calls.append(name)
+			if failures[0]:
+				failures[0] -= 1
+				raise OSError("hub timeout")
+			return FakeModel(name, size)
+
+		monkeypatch.setitem(models.MODEL_LOADERS, name, load)
+
+	register.calls = calls
+	return register
+
+@pytest.fixture
+def events():
+	return []
+
+@pytest.fixture
+def registry(request, events):
+	registry = ModelRegistry(**getattr(request, 'param', {}))
+	registry.add_listener(lambda event, name, info: events.append((event, name, info.get('reason'))))
+	yield registry
+	registry.close()
+
+@pytest.fixture
+def tiny_model(tmp_path):
+	"""A randomly initialized one-layer BERT classifier saved the way a hub download is, and the model itself"""
+	torch = pytest.importorskip('torch')
+	transformers = pytest.importorskip('transformers')
+	vocab = tmp_path / 'vocab.txt'
+	vocab.write_text('\n'.join(['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]', 'good', 'bad', 'news']), encoding='utf-8')
+	torch.manual_seed(0)
+	config = transformers.BertConfig(
+		vocab_size=8, hidden_size=8, num_hidden_layers=1, num_attention_heads=2, intermediate_size=16,
+		max_position_embeddings=16, num_labels=2
+	)
+	model = transformers.BertForSequenceClassification(config).eval()
+	source = str(tmp_path / 'tiny')
+	model.save_pretrained(source)
+	transformers.BertTokenizer(str(vocab)).save_pretrained(source)
+	return source, model
+
+def test_export_and_mmap_round_trip(tiny_model, tmp_path):
+	import torch
+	source, model = tiny_model
+	weights_dir = str(tmp_path / 'weights')
+	directory = export_safetensors('sentiment-analysis', source, weights_dir=weights_dir)
+	assert export_safetensors('sentiment-analysis', source, weights_dir=weights_dir) == directory
+	assert len(glob.glob(os.path.join(directory, '*.safetensors'))) == 1
+	assert not glob.glob(os.path.join(weights_dir, '*.tmp'))
+
+	expected = model.state_dict()
+	state = mmap_state_dict(directory)
+	for name, tensor in state.items():
+		assert torch.equal(tensor, expected[name]), name
+
+	mapped = mmap_model('sentiment-analysis', directory)
+	assert not any(parameter.requires_grad for parameter in mapped.parameters())
+	inputs = {'input_ids': torch.tensor([[2, 5, 7, 3]]), 'attention_mask': torch.ones(1, 4, dtype=torch.long)}
+	with torch.no_grad():
+		torch.testing.assert_close(mapped(**inputs).logits, model(**inputs).logits)
+
+def test_exclusive_lock_serializes_holders(tmp_path):
+	path = str(tmp_path / 'weights.lock')
+	order = []
+	held = threading.Event()
+
+	def second():
+		held.wait()
+		with _exclusive_lock(path):
+			order.append('second')
+
+	thread = threading.Thread(target=second)
+	thread.start()
+	with _exclusive_lock(path):
+		held.set()
+		thread.join(0.2)
+		order.append('first')
+	thread.join()
+	assert order == ['first', 'second']
+
+def test_models_load_once_and_report_their_size(registry, loaders, events):
+	loaders('a', size=123)
+	model = registry.get('a')
+	assert model.name == 'a' and registry.get('a') is model
+	assert loaders.calls == ['a']
+	assert events == [('load', 'a', None)]
+	stats = registry.stats()['a']
+	assert (stats['loaded'], stats['available'], stats['bytes'], stats['load']) == (True, True, 123, 1)
+
+@pytest.mark.parametrize('registry', [{'budget_bytes': 250}], indirect=True)
+def test_budget_evicts_the_least_recently_used_model(registry, loaders, events):
+	for name in 'abc':
+		loaders(name)
+	registry.get('a')
+	registry.get('b')
+	registry.get('a')  # b is now the least recently used
+	registry.get('c')
+	assert [name for name in 'abc' if registry.loaded(name)] == ['a', 'c']
+	assert ('evict', 'b', 'budget') in events
+	assert registry.resident_bytes() == 200
+
+@pytest.mark.parametrize('registry', [{'budget_bytes': 150}], indirect=True)
+def test_models_in_use_are_not_evicted(registry, loaders, events):
+	loaders('a')
+	loaders('b')
+	with registry.use('a') as a:
+		assert registry.get('b') is not None
+		# Both stay resident over budget while a is in use
+		assert registry.loaded('a') and registry.loaded('b')
+		assert registry.evict('a') is False
+		assert a.name == 'a'
+	# Leaving the block brings the registry back under budget, keeping the model just used
+	assert registry.loaded('a') and not registry.loaded('b')
+	assert events[-1] == ('evict', 'b', 'budget')
+
+def test_evicted_models_are_reloaded(registry, loaders, events):
+	loaders('a')
+	first = registry.get('a')
+	assert registry.evict('a') is True
+	assert registry.evict('a') is False
+	assert not registry.loaded('a')
+	assert registry.get('a') is not first
+	assert [event for event, _, _ in events] == ['load', 'evict', 'reload']
+	stats = registry.stats()['a']
+	assert (stats['load'], stats['evict'], stats['reload']) == (1, 1, 1)
+
+@pytest.mark.parametrize('registry', [{'idle_timeout': 10}], indirect=True)
+def test_idle_models_are_evicted(registry, loaders, events):
+	loaders('a')
+	loaders('b')
+	registry.get('a')
+	with registry.use('b'):
+		registry.evict_idle(now=time.monotonic() + 11)
+		assert not registry.loaded('a') and registry.loaded('b')
+	assert ('evict', 'a', 'idle') in events
+	registry.evict_idle(now=time.monotonic() + 5)
+	assert registry.loaded('b')
+
+@pytest.mark.parametrize('registry', [{'retry_seconds': 0.2}], indirect=True)
+def test_failed_loads_are_retried_after_the_backoff(registry, loaders, events):
+	loaders('a', fail_times=1)
+	assert registry.get('a') is None
+	assert not registry.available('a')
+	# Not retried before the backoff has passed
+	assert registry.get('a') is None
+	assert loaders.calls == ['a']
+	time.sleep(0.25)
+	assert registry.available('a')
+	assert registry.get('a').name == 'a'
+	assert [event for event, _, _ in events] == ['load_failed', 'load']
+	assert registry.stats()['a']['available']
+
+def test_close_forgets_failed_loads(registry, loaders):
+	loaders('a', fail_times=1)
+	registry.get('a')
+	assert not registry.available('a')
+	registry.close()
+	assert registry.available('a')
+
+def test_concurrent_users_share_one_load(registry, monkeypatch):
+	started, release = threading.Event(), threading.Event()
+	calls = []
+
+	def load():
+		calls.append(1)
+		started.set()
+		release.wait(5)
+		return FakeModel('slow', 100)
+
+	monkeypatch.setitem(models.MODEL_LOADERS, 'slow', load)
+	results = []
+	threads = [threading.Thread(target=lambda: results.append(registry.get('slow'))) for _ in range(4)]
+	for thread in threads:
+		thread.start()
+	started.wait(5)
+	release.set()
+	for thread in threads:
+		thread.join()
+	assert calls == [1]
+	assert len(results) == 4 and all(result is results[0] for result in results)
+
+def test_failing_listeners_do_not_break_loading(registry, loaders):
+	loaders('a')
+
+	def broken(event, name, info):
+		raise RuntimeError("listener bug")
+
+	registry.add_listener(broken)
+	assert registry.get('a') is not None
@@ -0,0 +1,23 @@
+import numpy as np
+from news_speed.phrases import PhraseExtractor
+
+def test_non_overlapping_compares_with_last_accepted():
+	starts = np.array([0, 1, 2, 5, 6])
+	free = np.ones(len(starts), dtype=bool)
+	# 1 overlaps 0, 2 only overlaps the rejected 1, 6 overlaps 5
+	assert PhraseExtractor._non_overlapping(starts, free, 2).tolist() == [True, False, True, True, False]
+
+def test_non_overlapping_skips_taken_windows():
+	starts = np.array([0, 1, 2])
+	free = np.array([False, True, True])
+	assert PhraseExtractor._non_overlapping(starts, free, 2).tolist() == [False, True, False]
+
+def test_repeated_phrase_occurrences_are_all_found():
+	# "ha ha ha ha" holds two non-overlapping "ha ha"; the other headlines are single rare words
+	terms = np.array(['ha'] + [f"w{i}" for i in range(36)])
+	token_ids = np.array([0, 0, 0, 0] + list(range(1, 37)))
+	doc_ids = np.array([0, 0, 0, 0] + list(range(1, 37)))
+	phrases, starts, ids, covered = PhraseExtractor(max_n=2).find_phrases(token_ids, doc_ids, terms)
+	assert [phrase for phrase, _, _ in phrases] == ['ha ha']
+	assert starts.tolist() == [0, 2]
+	assert covered[:4].all() and not covered[4:].any()
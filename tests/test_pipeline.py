@@ -0,0 +1,99 @@
+import threading
+import pytest
+from news_speed.cache import create_cache_backend, get_cache_backend, set_cache_backend
+from news_speed.pipeline import Pipeline
+
+@pytest.fixture(autouse=True)
+def memory_cache():
+	previous = get_cache_backend()
+	set_cache_backend(create_cache_backend('memory'))
+	yield
+	set_cache_backend(previous)
+
+@pytest.fixture
+def pipeline():
+	pipeline = Pipeline(max_workers=4)
+	yield pipeline
+	pipeline.shutdown()
+
+def test_stages_run_after_their_dependencies(pipeline):
+	finished = []
+	lock = threading.Lock()
+
+	def step(name, value):
+		with lock:
+			finished.append(name)
+		return value
+
+	pipeline.add('double', lambda x: step('double', x * 2), deps=['x'], cache=False)
+	pipeline.add('square', lambda x: step('square', x * x), deps=['x'], cache=False)
+	pipeline.add('total', lambda double, square: step('total', double + square), deps=['double', 'square'], cache=False)
+	assert pipeline._required(['total']) == ['double', 'square', 'total']
+	assert pipeline.run({'x': 3}) == {'double': 6, 'square': 9, 'total': 15}
+	assert finished[-1] == 'total'
+
+def test_only_required_stages_run(pipeline):
+	calls = []
+	pipeline.add('a', lambda x: calls.append('a') or x, deps=['x'], cache=False)
+	pipeline.add('b', lambda x: calls.append('b') or x, deps=['x'], cache=False)
+	assert pipeline.run({'x': 1}, targets=['a']) == {'a': 1}
+	assert calls == ['a']
+
+def test_invalid_graphs_are_rejected(pipeline):
+	pipeline.add('a', lambda b: b, deps=['b'])
+	pipeline.add('b', lambda a: a, deps=['a'])
+	pipeline.add('c', lambda missing: missing, deps=['missing'])
+	with pytest.raises(ValueError, match='cycle'):
+		pipeline.start({}, targets=['a'])
+	with pytest.raises(ValueError, match='unknown inputs'):
+		pipeline.start({}, targets=['c'])
+	with pytest.raises(ValueError, match='Unknown stage'):
+		pipeline.start({}, targets=['nope'])
+	with pytest.raises(ValueError, match='already defined'):
+		pipeline.add('a', lambda: None)
+
+def test_failures_propagate_to_dependents(pipeline):
+	def broken(x):
+		raise KeyError('boom')
+
+	pipeline.add('broken', broken, deps=['x'])
+	pipeline.add('after', lambda broken: broken, deps=['broken'])
+	pipeline.add('independent', lambda x: x + 1, deps=['x'])
+	run = pipeline.start({'x': 1})
+	with pytest.raises(KeyError):
+		run.result('broken', timeout=5)
+	with pytest.raises(RuntimeError, match="'after' skipped: broken failed"):
+		run.result('after', timeout=5)
+	assert run.result('independent', timeout=5) == 2
+
+def test_pending_inputs_start_stages_when_provided(pipeline):
+	pipeline.add('echo', lambda late: late, deps=['late'], cache=False)
+	run = pipeline.start({}, pending=['late'])
+	assert not run.done('echo')
+	run.provide('late', 'here')
+	assert run.result('echo', timeout=5) == 'here'
+
+def test_concurrent_identical_runs_compute_once(pipeline):
+	calls = []
+	release = threading.Event()
+
+	def slow(x):
+		calls.append(x)
+		release.wait(5)
+		return x * 10
+
+	pipeline.add('slow', slow, deps=['x'], cache=False)
+	runs = [pipeline.start({'x': 4}) for _ in range(3)]
+	release.set()
+	assert [run.result('slow', timeout=5) for run in runs] == [40, 40, 40]
+	assert calls == [4]
+
+def test_cached_results_are_reused_across_runs(pipeline):
+	calls = []
+	pipeline.add('cached', lambda x: calls.append(x) or x, deps=['x'])
+	first = pipeline.start({'x': 7})
+	assert first.result('cached', timeout=5) == 7
+	second = pipeline.start({'x': 7})
+	assert second.result('cached', timeout=5) == 7
+	assert second.timings['cached'] == 0.0
+	assert calls == [7]
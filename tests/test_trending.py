@@ -0,0 +1,48 @@
+import numpy as np
+from email.utils import format_datetime
+from datetime import datetime, timezone
+from news_speed.trending import TrendDetector
+
+HOUR = 3600
+
+def article(title, hour, link=None):
+	return {'title': title, 'link': link or f"{title}@{hour}", 'published': format_datetime(datetime.fromtimestamp(hour * HOUR, timezone.utc))}
+
+def test_initial_size_is_clamped_to_max_terms():
+	assert len(TrendDetector(max_terms=4, initial_terms=1024).counts) == 4
+
+def test_full_tracker_does_not_merge_terms_of_one_batch():
+	detector = TrendDetector(max_terms=4, initial_terms=4)
+	detector.add_articles([article('alpha bravo charlie delta echo epsilon', 2)], now=2 * HOUR)
+	assert detector.counts.sum(axis=1).tolist() == [1, 1, 1, 1]
+	assert sorted(detector.term_ids) == sorted(term for term in detector.terms)
+
+def test_batch_keeps_its_most_frequent_new_terms():
+	detector = TrendDetector(max_terms=2, initial_terms=2)
+	detector.add_articles([article('alpha bravo', 2, 'a'), article('alpha charlie', 2, 'b'), article('alpha bravo', 2, 'c')], now=2 * HOUR)
+	assert sorted(detector.term_ids) == ['alpha', 'bravo']
+	assert detector.counts[detector.term_ids['alpha']].sum() == 3
+	assert detector.counts[detector.term_ids['bravo']].sum() == 2
+
+def test_eviction_frees_least_active_terms():
+	detector = TrendDetector(max_terms=4, initial_terms=4)
+	detector.add_articles([article('alpha bravo charlie', 2, 'a'), article('alpha bravo delta', 2, 'b'), article('delta', 2, 'c')], now=2 * HOUR)
+	detector.add_articles([article('echo', 2)], now=2 * HOUR)
+	assert sorted(detector.term_ids) == ['alpha', 'bravo', 'delta', 'echo']
+	assert detector.counts[detector.term_ids['alpha']].sum() == 2
+	assert detector.counts[detector.term_ids['echo']].sum() == 1
+
+def test_late_arrival_updates_baseline_like_a_timely_one():
+	timely, late = TrendDetector(), TrendDetector()
+	timely.add_articles([article('alpha', 0, 'a')], now=0)
+	timely.add_articles([article('alpha', 1, 'b')], now=1 * HOUR)
+	timely.scores(now=3 * HOUR)
+
+	late.add_articles([article('alpha', 0, 'a')], now=0)
+	late.scores(now=3 * HOUR)
+	late.add_articles([article('alpha', 1, 'b')], now=3 * HOUR)
+
+	row = timely.term_ids['alpha']
+	assert late.term_ids['alpha'] == row
+	assert np.isclose(late.baseline_sum[row], timely.baseline_sum[row]) and late.baseline_sum[row] == 2
+	assert np.isclose(late.baseline_sumsq[row], timely.baseline_sumsq[row])